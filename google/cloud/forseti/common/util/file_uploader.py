@@ -30,12 +30,17 @@ def upload_json(data, gcs_upload_path):
     """Upload data in json format.
 
     Args:
-        data (dict): the data to upload
+        data (object): the data to upload, a dict, or an iterable written
+            as a json array one item at a time
         gcs_upload_path (string): the GCS upload path.
     """
     try:
         with tempfile.NamedTemporaryFile() as tmp_data:
-            tmp_data.write(parser.json_stringify(data).encode())
+            if isinstance(data, dict):
+                tmp_data.write(parser.json_stringify(data).encode())
+            else:
+                for piece in parser.json_stringify_iter(data):
+                    tmp_data.write(piece.encode())
             tmp_data.flush()
             storage_client = StorageClient({})
             storage_client.put_text_file(tmp_data.name, gcs_upload_path)
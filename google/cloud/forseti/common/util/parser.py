@@ -85,6 +85,23 @@ def json_stringify(obj_to_jsonify):
     return json.dumps(obj_to_jsonify, sort_keys=True)
 
 
+def json_stringify_iter(objs_to_jsonify):
+    """Convert an iterable of python objects to a json array, piecewise.
+
+    Args:
+        objs_to_jsonify (iterable): The objects to json stringify.
+
+    Yields:
+        str: Successive pieces of the json array, one per object.
+    """
+    yield '['
+    separator = ''
+    for obj_to_jsonify in objs_to_jsonify:
+        yield separator + json_stringify(obj_to_jsonify)
+        separator = ', '
+    yield ']'
+
+
 def json_unstringify(json_to_objify, default=None):
     """Convert a json string to a python object.
 
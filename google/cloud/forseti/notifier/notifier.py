@@ -78,6 +78,56 @@ def convert_to_timestamp(violations):
     return violations
 
 
+class ViolationStream(object):
+    """Violations of a scanner run, streamed from the database when iterated.
+
+    Every iteration reads the violations again, so notifiers can go over
+    them more than once without all of them being held in memory.
+    """
+
+    def __init__(self, violation_access, scanner_index_id, resource=None,
+                 count=None):
+        """Initialize.
+
+        Args:
+            violation_access (ViolationAccess): The violations facade.
+            scanner_index_id (int64): Scanner index id.
+            resource (str): If set, only the violations of this resource.
+            count (int): The number of violations, counted in the database
+                when first needed if not known.
+        """
+        self.violation_access = violation_access
+        self.scanner_index_id = scanner_index_id
+        self.count = count
+        self.resource = resource
+
+    def __len__(self):
+        """The number of violations.
+
+        Returns:
+            int: The number of violations.
+        """
+        if self.count is None:
+            if self.resource is None:
+                self.count = self.violation_access.count(
+                    self.scanner_index_id)
+            else:
+                self.count = self.violation_access.count_by_resource(
+                    self.scanner_index_id).get(self.resource, 0)
+        return self.count
+
+    def __iter__(self):
+        """Stream the violations.
+
+        Yields:
+            dict: The violations, with created_at_datetime converted to a
+                timestamp string.
+        """
+        for violation in self.violation_access.stream(self.scanner_index_id,
+                                                      self.resource):
+            yield convert_to_timestamp([violation])[0]
+
+
 # pylint: disable=too-many-branches
 # pylint: disable=too-many-statements
 def run(inventory_index_id,
@@ -119,28 +169,22 @@ def run(inventory_index_id,
                 'No success or partial success scanner index found for '
                 'inventory index: "%s".', str(inventory_index_id))
         else:
-            # get violations
+            # count violations, they are streamed to every notifier
             violation_access = scanner_dao.ViolationAccess(session)
-            violations = violation_access.list(
-                scanner_index_id=scanner_index_id)
-            violations_as_dict = []
-            for violation in violations:
-                violations_as_dict.append(
-                    scanner_dao.convert_sqlalchemy_object_to_dict(violation))
-            violations_as_dict = convert_to_timestamp(violations_as_dict)
-            violation_map = scanner_dao.map_by_resource(violations_as_dict)
-
-            for retrieved_v in violation_map:
+            violation_counts = violation_access.count_by_resource(
+                scanner_index_id)
+
+            for retrieved_v in violation_counts:
                 log_message = (
                     'Retrieved {} violations for resource \'{}\''.format(
-                        len(violation_map[retrieved_v]), retrieved_v))
+                        violation_counts[retrieved_v], retrieved_v))
                 LOGGER.info(log_message)
                 progress_queue.put(log_message)
 
             # build notification notifiers
             notifiers = []
             for resource in notifier_configs['resources']:
-                if violation_map.get(resource['resource']) is None:
+                if violation_counts.get(resource['resource']) is None:
                     log_message = 'Resource \'{}\' has no violations'.format(
                         resource['resource'])
                     progress_queue.put(log_message)
@@ -159,8 +203,12 @@ def run(inventory_index_id,
                         chosen_pipeline = find_notifiers(notifier['name'])
                         notifiers.append(chosen_pipeline(
                             resource['resource'], inventory_index_id,
-                            violation_map[resource['resource']], global_configs,
-                            notifier_configs, notifier.get('configuration')))
+                            ViolationStream(
+                                violation_access, scanner_index_id,
+                                resource['resource'],
+                                violation_counts[resource['resource']]),
+                            global_configs, notifier_configs,
+                            notifier.get('configuration')))
                     except Exception as e:  # pylint: disable=broad-except
                         error_message = ('Error running \'{}\' notifier for '
                                          'resource \'{}\':  \'{}\''.format(
@@ -184,7 +232,9 @@ def run(inventory_index_id,
                         '%s', source_id)
                     (cscc_notifier.CsccNotifier(inventory_index_id,
                                                 api_quota)
-                     .run(violations_as_dict, source_id=source_id))
+                     .run(ViolationStream(violation_access,
+                                          scanner_index_id),
+                          source_id=source_id))
 
         # Inventory Summary - Save to GCS and/or send email
         inventory_summary = InventorySummary(
@@ -28,7 +28,6 @@ from google.cloud.forseti.common.gcp_type import iam_policy
 from google.cloud.forseti.common.gcp_type import resource as resource_mod
 from google.cloud.forseti.common.gcp_type import resource_util
 from google.cloud.forseti.common.util import logger
-from google.cloud.forseti.common.util import relationship
 from google.cloud.forseti.scanner.audit import base_rules_engine as bre
 from google.cloud.forseti.scanner.audit import rules as scanner_rules
 from google.cloud.forseti.scanner.audit import errors as audit_errors
@@ -214,6 +213,9 @@ class IamRuleBook(bre.BaseRuleBook):
         super(IamRuleBook, self).__init__()
         self._rules_sema = threading.BoundedSemaphore(value=1)
         self.resource_rules_map = {}
+        self._rule_index = None
+        self._wildcard_rules = None
+        self._ancestry_cache = {}
         if not rule_defs:
             self.rule_defs = {}
         else:
@@ -366,6 +368,7 @@ class IamRuleBook(bre.BaseRuleBook):
                     # If the rule isn't in the mapping, add it.
                     if rule not in resource_rules.rules:
                         resource_rules.rules.add(rule)
+            self._rule_index = None
         finally:
             self._rules_sema.release()
 
@@ -387,6 +390,86 @@ class IamRuleBook(bre.BaseRuleBook):
 
         return resource_rules
 
+    def _build_rule_index(self):
+        """Compile the resource rules into lookups by (type, id) strings.
+
+        The ResourceRules of every resource are listed in the
+        RuleAppliesTo.apply_types order, the wildcard ('*') resources are
+        kept apart in buckets by resource type.
+        """
+        self._rules_sema.acquire()
+
+        try:
+            rule_index = {}
+            wildcard_rules = {}
+            for rule_applies_to in scanner_rules.RuleAppliesTo.apply_types:
+                for (gcp_resource, applies_to), resource_rules in (
+                        self.resource_rules_map.items()):
+                    if applies_to != rule_applies_to:
+                        continue
+                    if gcp_resource.id == '*':
+                        wildcard_rules.setdefault(
+                            gcp_resource.type, []).append(resource_rules)
+                    else:
+                        rule_index.setdefault(
+                            (gcp_resource.type, gcp_resource.id),
+                            []).append(resource_rules)
+            self._wildcard_rules = wildcard_rules
+            self._rule_index = rule_index
+        finally:
+            self._rules_sema.release()
+
+    def _get_indexed_rules(self, resource_type, resource_id):
+        """Get the resource rules and the wildcard rules of a resource.
+
+        Args:
+            resource_type (str): The resource type.
+            resource_id (str): The resource id.
+
+        Returns:
+            list: A list of ResourceRules, the wildcard ones last.
+        """
+        wildcard_rules = self._wildcard_rules.get(resource_type, [])
+        resource_rules = self._rule_index.get((resource_type, resource_id))
+        if not resource_rules:
+            return wildcard_rules
+        return resource_rules + wildcard_rules
+
+    def _get_ancestry(self, full_name, cache=False):
+        """Get the resources in a full name, nearest first.
+
+        The ancestry of the parent full name is cached, so the resources of
+        the organization and folders are parsed and created once for all the
+        projects and policies below them.
+
+        Args:
+            full_name (str): Full name of the resource in hierarchical format.
+            cache (bool): Whether to cache the ancestry of this full name.
+
+        Returns:
+            tuple: (resource_type, resource_id, Resource) tuples for the
+                resources which can be created, in ascending order in the
+                resource hierarchy.
+        """
+        ancestry = self._ancestry_cache.get(full_name)
+        if ancestry is not None:
+            return ancestry
+
+        full_name_parts = full_name.split('/')[:-1]
+        if len(full_name_parts) < 2:
+            return ()
+        resource_type, resource_id = full_name_parts[-2:]
+        ancestry = self._get_ancestry(
+            '/'.join(full_name_parts[:-2] + ['']), cache=True)
+        new_resource = resource_util.create_resource(resource_id,
+                                                     resource_type)
+        if new_resource:
+            ancestry = ((resource_type, resource_id, new_resource),) + ancestry
+
+        if cache:
+            self._ancestry_cache[full_name] = ancestry
+        return ancestry
+
     def find_violations(self, resource, policy, policy_bindings):
         """Find policy binding violations in the rule book.
 
@@ -406,14 +489,18 @@ class IamRuleBook(bre.BaseRuleBook):
         """
         violations = itertools.chain()
 
-        resource_ancestors = (
-            relationship.find_ancestors(resource, policy.full_name))
+        if self._rule_index is None:
+            self._build_rule_index()
+
+        # Same order as relationship.find_ancestors(), without creating the
+        # resources of the ancestors again for every policy.
+        resource_ancestors = [(resource.type, resource.id, resource)]
+        resource_ancestors.extend(
+            ancestor for ancestor in self._get_ancestry(policy.full_name)
+            if ancestor[0] != resource.type or ancestor[1] != resource.id)
 
-        for curr_resource in resource_ancestors:
-            wildcard_resource = resource_util.create_resource(
-                resource_id='*', resource_type=curr_resource.type)
-            resource_rules = self._get_resource_rules(curr_resource)
-            resource_rules.extend(self._get_resource_rules(wildcard_resource))
+        for curr_type, curr_id, curr_resource in resource_ancestors:
+            resource_rules = self._get_indexed_rules(curr_type, curr_id)
 
             # Set to None, because if the direct resource (e.g. project)
             # doesn't have a specific rule, we still should check the
@@ -0,0 +1,292 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Resources of a model shared by the scanners of a scanner run."""
+
+from builtins import object
+import collections
+import json
+import os
+import pickle
+import tempfile
+import threading
+
+from google.cloud.forseti.common.util import logger
+
+LOGGER = logger.get_logger(__name__)
+
+# Default maximum size in megabytes of the resource data kept in memory.
+DEFAULT_MEMORY_BUDGET_MB = 512
+
+# Rough size of the objects decoded from a JSON string, relative to the
+# string. Resources kept in memory cache their decoded data.
+_DECODED_SIZE_FACTOR = 4
+
+_RESOURCE_FIELDS = ('type', 'name', 'type_name', 'full_name',
+                    'parent_type_name', 'display_name', 'email', 'data',
+                    'cai_resource_name', 'cai_resource_type')
+
+
+class SnapshotResource(object):
+    """Detached copy of a model resource, decoding its data once."""
+
+    __slots__ = _RESOURCE_FIELDS + ('parent', '_json')
+
+    def __init__(self, resource, parent=None):
+        """Initialize.
+
+        Args:
+            resource (Resource): The model resource to copy.
+            parent (SnapshotResource): The copy of the parent resource.
+        """
+        for field in _RESOURCE_FIELDS:
+            setattr(self, field, getattr(resource, field))
+        self.parent = parent
+        self._json = None
+
+    @property
+    def json(self):
+        """The decoded resource data.
+
+        Returns:
+            object: The data decoded from json, None if there is no data.
+        """
+        if self._json is None and self.data is not None:
+            self._json = json.loads(self.data)
+        return self._json
+
+
+def _memory_cost(resource):
+    """Estimate the memory used by a resource kept in memory.
+
+    Args:
+        resource (object): A model Resource or a SnapshotResource.
+
+    Returns:
+        int: The size in bytes of the data and of the data decoded from it.
+    """
+    return len(resource.data or '') * (1 + _DECODED_SIZE_FACTOR)
+
+
+def decoded_data(resource):
+    """Decode the data of a resource, only once for snapshot resources.
+
+    Args:
+        resource (object): A model Resource or a SnapshotResource.
+
+    Returns:
+        object: The data decoded from json.
+    """
+    if isinstance(resource, SnapshotResource):
+        return resource.json
+    return json.loads(resource.data)
+
+
+class ModelSnapshot(object):
+    """Resources of a model, loaded once per type and shared by scanners.
+
+    The resources of a type are read in one streamed query the first time
+    any scanner asks for them, then served from memory to every scanner of
+    the run. Memory is reserved for each resource as it is read, counting
+    its data and the data decoded from it. Once a type exceeds the memory
+    budget, it is spilled to a temporary file as it is read and streamed
+    back from it instead of the database.
+    """
+
+    def __init__(self, model_manager, model_name,
+                 memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+        """Initialize.
+
+        Args:
+            model_manager (ModelManager): The model manager.
+            model_name (str): The name of the data model.
+            memory_budget_mb (float): The maximum size in megabytes of the
+                resource data kept in memory.
+        """
+        self.model_manager = model_manager
+        self.model_name = model_name
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.memory_used = 0
+        self.loads = 0
+        self._resources = {}
+        self._by_parent = {}
+        self._spilled = {}
+        self._lock = threading.Lock()
+        self._type_locks = collections.defaultdict(threading.Lock)
+
+    def resources(self, resource_type, parent_type_name=None):
+        """Iterate over the resources of a type.
+
+        Args:
+            resource_type (str): The type of the resources.
+            parent_type_name (str): If set, only the resources with this
+                parent type_name.
+
+        Yields:
+            SnapshotResource: The resources, in the model query order.
+        """
+        with self._lock:
+            type_lock = self._type_locks[resource_type]
+        with type_lock:
+            if (resource_type not in self._resources and
+                    resource_type not in self._spilled):
+                self._load(resource_type)
+
+        if resource_type in self._spilled:
+            with open(self._spilled[resource_type], 'rb') as spill_file:
+                while True:
+                    try:
+                        resource = pickle.load(spill_file)
+                    except EOFError:
+                        break
+                    if (parent_type_name is None or
+                            resource.parent_type_name == parent_type_name):
+                        yield resource
+        elif parent_type_name is None:
+            for resource in self._resources[resource_type]:
+                yield resource
+        else:
+            for resource in self._by_parent[resource_type].get(
+                    parent_type_name, []):
+                yield resource
+
+    def _reserve(self, size):
+        """Reserve memory for resources, if the budget allows it.
+
+        Args:
+            size (int): The size in bytes to reserve.
+
+        Returns:
+            bool: True if the memory was reserved.
+        """
+        with self._lock:
+            if self.memory_used + size > self.memory_budget:
+                return False
+            self.memory_used += size
+            return True
+
+    def _release(self, size):
+        """Release reserved memory.
+
+        Args:
+            size (int): The size in bytes to release.
+        """
+        with self._lock:
+            self.memory_used -= size
+
+    def _load(self, resource_type):
+        """Read the resources of a type from the model.
+
+        Args:
+            resource_type (str): The type of the resources.
+        """
+        scoped_session, data_access = self.model_manager.get(self.model_name)
+        parents = {}
+        resources = []
+        size = 0
+        spill_file = None
+        path = None
+        count = 0
+        try:
+            with scoped_session as session:
+                for resource in data_access.scanner_iter(session,
+                                                         resource_type):
+                    count += 1
+                    cost = _memory_cost(resource)
+                    parent = None
+                    if resource.parent is not None:
+                        parent = parents.get(resource.parent.type_name)
+                        if parent is None:
+                            parent = SnapshotResource(resource.parent)
+                            cost += _memory_cost(parent)
+                            if spill_file is None:
+                                parents[parent.type_name] = parent
+                    snapshot_resource = SnapshotResource(resource, parent)
+
+                    if spill_file is None and not self._reserve(cost):
+                        # Over the budget, move what was read so far to a
+                        # spill file and write the rest to it as it is read.
+                        fd, path = tempfile.mkstemp(
+                            prefix='forseti-snapshot-')
+                        spill_file = os.fdopen(fd, 'wb')
+                        for spilled_resource in resources:
+                            pickle.dump(spilled_resource, spill_file,
+                                        pickle.HIGHEST_PROTOCOL)
+                        self._release(size)
+                        resources = []
+                        parents = {}
+                        size = 0
+
+                    if spill_file is not None:
+                        pickle.dump(snapshot_resource, spill_file,
+                                    pickle.HIGHEST_PROTOCOL)
+                    else:
+                        resources.append(snapshot_resource)
+                        size += cost
+        except Exception:
+            self._release(size)
+            if spill_file is not None:
+                spill_file.close()
+                os.remove(path)
+            raise
+        self.loads += 1
+
+        if spill_file is not None:
+            spill_file.close()
+            self._spilled[resource_type] = path
+            LOGGER.info('Spilled %i %s resources to %s.', count,
+                        resource_type, path)
+            return
+
+        by_parent = collections.defaultdict(list)
+        for resource in resources:
+            by_parent[resource.parent_type_name].append(resource)
+        self._by_parent[resource_type] = dict(by_parent)
+        self._resources[resource_type] = resources
+        LOGGER.info('Loaded %i %s resources.', len(resources), resource_type)
+
+    def close(self):
+        """Drop the loaded resources and remove the spill files."""
+        for path in self._spilled.values():
+            try:
+                os.remove(path)
+            except OSError:
+                LOGGER.warning('Unable to remove %s.', path)
+        self._spilled = {}
+        self._resources = {}
+        self._by_parent = {}
+        self.memory_used = 0
+
+
+def scanner_iter(service_config, session, data_access, resource_type,
+                 parent_type_name=None):
+    """Iterate over resources, from the scanner run snapshot if there is one.
+
+    Args:
+        service_config (ServiceConfig): Forseti 2.0 service configs.
+        session (object): Database session of the model.
+        data_access (object): The model data access.
+        resource_type (str): The type of the resources.
+        parent_type_name (str): If set, only the resources with this parent
+            type_name.
+
+    Returns:
+        iterable: The resources.
+    """
+    model_snapshot = getattr(service_config, 'model_snapshot', None)
+    if isinstance(model_snapshot, ModelSnapshot):
+        return model_snapshot.resources(resource_type, parent_type_name)
+    if parent_type_name is None:
+        return data_access.scanner_iter(session, resource_type)
+    return data_access.scanner_iter(session, resource_type,
+                                    parent_type_name=parent_type_name)
@@ -13,15 +13,22 @@
 # limitations under the License.
 """GCP Resource scanner."""
 
+import concurrent.futures
 import traceback
 
 from google.cloud.forseti.common.util import logger
 from google.cloud.forseti.common.util.index_state import IndexState
+from google.cloud.forseti.scanner import model_snapshot
 from google.cloud.forseti.scanner import scanner_builder
+from google.cloud.forseti.scanner import scanner_requirements_map
+from google.cloud.forseti.scanner.scanners import base_scanner
 from google.cloud.forseti.services.scanner import dao as scanner_dao
 
 LOGGER = logger.get_logger(__name__)
 
+# Default number of scanners run at the same time.
+DEFAULT_MAX_CONCURRENT_SCANNERS = 1
+
 
 def init_scanner_index(session, inventory_index_id):
     """Initialize the 'scanner_index' table.
@@ -79,6 +86,104 @@ def mark_scanner_index_complete(
     session.flush()
 
 
+def _memory_hint(scanner):
+    """Get the relative memory use of a scanner.
+
+    Args:
+        scanner (BaseScanner): The scanner.
+
+    Returns:
+        int: The memory_hint of the scanner in the requirements map, 1 if
+            not set.
+    """
+    class_name = scanner.__class__.__name__
+    for requirements in scanner_requirements_map.REQUIREMENTS_MAP.values():
+        if requirements.get('class_name') == class_name:
+            return requirements.get('memory_hint', 1)
+    return 1
+
+
+def _run_scanner(scanner, progress_queue):
+    """Run a scanner, reporting its progress.
+
+    Args:
+        scanner (BaseScanner): The scanner to run.
+        progress_queue (Queue): The progress queue.
+
+    Returns:
+        bool: Whether the scanner ran successfully.
+    """
+    try:
+        scanner.run()
+        progress_queue.put('Running {}...'.format(
+            scanner.__class__.__name__))
+    except Exception:  # pylint: disable=broad-except
+        log_message = 'Error running scanner: {}: \'{}\''.format(
+            scanner.__class__.__name__, traceback.format_exc())
+        progress_queue.put(log_message)
+        LOGGER.exception(log_message)
+        return False
+    return True
+
+
+def _run_concurrently(session, scanners, progress_queue, max_workers,
+                      memory_budget=None):
+    """Run scanners in a thread pool.
+
+    Scanners are started heaviest first, so a slow scanner does not start
+    last and hold up the whole run, and a scanner is only started while the
+    memory hints of the running scanners fit within the memory budget. A
+    scanner heavier than the budget runs alone.
+
+    Args:
+        session (Session): SQLAlchemy session object of the scanner index.
+        scanners (list): The scanners to run.
+        progress_queue (Queue): The progress queue.
+        max_workers (int): The maximum number of scanners running at once.
+        memory_budget (int): The maximum sum of the memory hints of the
+            running scanners, unlimited if None.
+
+    Returns:
+        tuple: The names of the scanners that succeeded, and of the
+            scanners that failed.
+    """
+    pending = sorted(scanners, key=_memory_hint, reverse=True)
+    running = {}
+    succeeded = []
+    failed = []
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers) as executor:
+        while pending or running:
+            used = sum(hint for _, hint in running.values())
+            while pending and len(running) < max_workers:
+                scanner = pending[0] if not running else next(
+                    (scanner for scanner in pending
+                     if memory_budget is None or
+                     used + _memory_hint(scanner) <= memory_budget), None)
+                if scanner is None:
+                    break
+                pending.remove(scanner)
+                hint = _memory_hint(scanner)
+                LOGGER.info('Starting %s, memory hint %i.',
+                            scanner.__class__.__name__, hint)
+                future = executor.submit(_run_scanner, scanner,
+                                         progress_queue)
+                running[future] = (scanner, hint)
+                used += hint
+
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                scanner, _ = running.pop(future)
+                if future.result():
+                    succeeded.append(scanner.__class__.__name__)
+                else:
+                    failed.append(scanner.__class__.__name__)
+                with base_scanner.VIOLATION_OUTPUT_LOCK:
+                    session.commit()
+    return succeeded, failed
+
+
 def run(model_name=None,
         progress_queue=None,
         service_config=None,
@@ -99,6 +204,10 @@ def run(model_name=None,
     scanner_configs = service_config.get_scanner_config()
     with service_config.scoped_session() as session:
         service_config.violation_access = scanner_dao.ViolationAccess(session)
+        service_config.model_snapshot = model_snapshot.ModelSnapshot(
+            service_config.model_manager, model_name,
+            scanner_configs.get('model_snapshot_memory_mb',
+                                model_snapshot.DEFAULT_MEMORY_BUDGET_MB))
         model_description = (
             service_config.model_manager.get_description(model_name))
         inventory_index_id = (
@@ -114,21 +223,23 @@ def run(model_name=None,
         progress_queue.put('Scanner Index ID: {} is created'.
                            format(scanner_index_id))
 
-        for scanner in runnable_scanners:
-            try:
-                scanner.run()
-                progress_queue.put('Running {}...'.format(
-                    scanner.__class__.__name__))
-            except Exception:  # pylint: disable=broad-except
-                log_message = 'Error running scanner: {}: \'{}\''.format(
-                    scanner.__class__.__name__, traceback.format_exc())
-                progress_queue.put(log_message)
-                LOGGER.exception(log_message)
-                failed.append(scanner.__class__.__name__)
+        max_workers = scanner_configs.get('max_concurrent_scanners',
+                                          DEFAULT_MAX_CONCURRENT_SCANNERS)
+        try:
+            if max_workers > 1 and len(runnable_scanners) > 1:
+                succeeded, failed = _run_concurrently(
+                    session, runnable_scanners, progress_queue, max_workers,
+                    scanner_configs.get('scanner_memory_budget'))
             else:
-                succeeded.append(scanner.__class__.__name__)
-            session.commit()
-        # pylint: enable=bare-except
+                for scanner in runnable_scanners:
+                    if _run_scanner(scanner, progress_queue):
+                        succeeded.append(scanner.__class__.__name__)
+                    else:
+                        failed.append(scanner.__class__.__name__)
+                    session.commit()
+        finally:
+            service_config.model_snapshot.close()
+            service_config.model_snapshot = None
         log_message = 'Scan completed!'
         mark_scanner_index_complete(
             session, scanner_index_id, succeeded, failed)
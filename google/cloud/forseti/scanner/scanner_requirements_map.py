@@ -17,6 +17,8 @@
 # TODO: Standardize the module and class names so that we can use reflection
 # instead of maintaining them explicitly.
 # Use the naming pattern foo_module.py, class FooModule
+# The optional memory_hint is the memory use of a scanner relative to the
+# default of 1, used to schedule scanners running concurrently.
 REQUIREMENTS_MAP = {
     'audit_logging':
         {'module_name': 'audit_logging_scanner',
@@ -37,7 +39,8 @@ REQUIREMENTS_MAP = {
     'config_validator':
         {'module_name': 'config_validator_scanner',
          'class_name': 'ConfigValidatorScanner',
-         'rules_filename': ''},
+         'rules_filename': '',
+         'memory_hint': 4},
     'cloudsql_acl':
         {'module_name': 'cloudsql_rules_scanner',
          'class_name': 'CloudSqlAclScanner',
@@ -49,7 +52,8 @@ REQUIREMENTS_MAP = {
     'external_project_access':
         {'module_name': 'external_project_access_scanner',
          'class_name': 'ExternalProjectAccessScanner',
-         'rules_filename': 'external_project_access_rules.yaml'},
+         'rules_filename': 'external_project_access_rules.yaml',
+         'memory_hint': 2},
     'firewall_rule':
         {'module_name': 'firewall_rules_scanner',
          'class_name': 'FirewallPolicyScanner',
@@ -69,7 +73,8 @@ REQUIREMENTS_MAP = {
     'iam_policy':
         {'module_name': 'iam_rules_scanner',
          'class_name': 'IamPolicyScanner',
-         'rules_filename': 'iam_rules.yaml'},
+         'rules_filename': 'iam_rules.yaml',
+         'memory_hint': 4},
     'iap':
         {'module_name': 'iap_scanner',
          'class_name': 'IapScanner',
@@ -18,6 +18,7 @@ from builtins import object
 import abc
 import os
 import shutil
+import threading
 
 from future.utils import with_metaclass
 from google.cloud.forseti.common.gcp_api import storage
@@ -29,6 +30,10 @@ from google.cloud.forseti.services.scanner import dao as scanner_dao
 
 LOGGER = logger.get_logger(__name__)
 
+# Serializes the use of the scanner session shared by the scanners, which
+# may run concurrently.
+VIOLATION_OUTPUT_LOCK = threading.Lock()
+
 
 class BaseScanner(with_metaclass(abc.ABCMeta, object)):
     """This is a base class skeleton for scanners."""
@@ -112,7 +117,8 @@ class BaseScanner(with_metaclass(abc.ABCMeta, object)):
             model_description.get('source_info').get('inventory_index_id'))
 
         violation_access = self.service_config.violation_access
-        scanner_index_id = scanner_dao.get_latest_scanner_index_id(
-            violation_access.session, inventory_index_id,
-            index_state=IndexState.RUNNING)
-        violation_access.create(violations, scanner_index_id)
+        with VIOLATION_OUTPUT_LOCK:
+            scanner_index_id = scanner_dao.get_latest_scanner_index_id(
+                violation_access.session, inventory_index_id,
+                index_state=IndexState.RUNNING)
+            violation_access.create(violations, scanner_index_id)
@@ -14,7 +14,6 @@
 
 """Scanner for the IAM rules engine."""
 
-import json
 
 from google.cloud.forseti.common.gcp_type import iam_policy
 from google.cloud.forseti.common.gcp_type.billing_account import BillingAccount
@@ -25,6 +24,7 @@ from google.cloud.forseti.common.gcp_type.organization import Organization
 from google.cloud.forseti.common.gcp_type.project import Project
 from google.cloud.forseti.common.gcp_type.resource import ResourceType
 from google.cloud.forseti.common.util import logger
+from google.cloud.forseti.scanner import model_snapshot
 from google.cloud.forseti.scanner.audit import iam_rules_engine
 from google.cloud.forseti.scanner.scanners import base_scanner
 
@@ -209,13 +209,15 @@ class IamPolicyScanner(base_scanner.BaseScanner):
             policy_data = []
             resource_counts = {iam_type: 0
                                for iam_type in IAM_TYPE_RESOURCE_MAP}
-            for policy in data_access.scanner_iter(session, 'iam_policy'):
+            for policy in model_snapshot.scanner_iter(
+                    self.service_config, session, data_access, 'iam_policy'):
                 if policy.parent.type not in IAM_TYPE_RESOURCE_MAP:
                     continue
 
                 policy_bindings = [_f for _f in [
                     iam_policy.IamPolicyBinding.create_from(b)
-                    for b in json.loads(policy.data).get('bindings', [])] if _f]
+                    for b in model_snapshot.decoded_data(policy).get(
+                        'bindings', [])] if _f]
 
                 resource_counts[policy.parent.type] += 1
                 resource_class = IAM_TYPE_RESOURCE_MAP[policy.parent.type]
@@ -32,6 +32,7 @@ from google.cloud.forseti.common.gcp_type import project as project_type
 from google.cloud.forseti.common.gcp_type import network as network_type
 from google.cloud.forseti.common.gcp_type.resource import ResourceType
 from google.cloud.forseti.common.util import logger
+from google.cloud.forseti.scanner import model_snapshot
 from google.cloud.forseti.scanner.audit import iap_rules_engine
 from google.cloud.forseti.scanner.scanners import base_scanner
 
@@ -491,6 +492,22 @@ class IapScanner(base_scanner.BaseScanner):
         all_violations = self._flatten_violations(all_violations)
         self._output_results_to_db(all_violations)
 
+    def _scanner_iter(self, session, resource_type, parent_type_name=None):
+        """Iterate over resources, shared with the other scanners of the run.
+
+        Args:
+            session (object): Database session of the model.
+            resource_type (str): The type of the resources.
+            parent_type_name (str): If set, only the resources with this
+                parent type_name.
+
+        Returns:
+            iterable: The resources.
+        """
+        return model_snapshot.scanner_iter(
+            self.service_config, session, self.data_access, resource_type,
+            parent_type_name)
+
     def _get_backend_services(self, parent_type_name):
         """Retrieves backend services.
 
@@ -502,7 +519,7 @@ class IapScanner(base_scanner.BaseScanner):
         """
         backend_services = []
         with self.scoped_session as session:
-            for backend_service in self.data_access.scanner_iter(
+            for backend_service in self._scanner_iter(
                     session, 'backendservice',
                     parent_type_name=parent_type_name):
                 backend_services.append(
@@ -523,7 +540,7 @@ class IapScanner(base_scanner.BaseScanner):
         """
         firewall_rules = []
         with self.scoped_session as session:
-            for firewall_rule in self.data_access.scanner_iter(
+            for firewall_rule in self._scanner_iter(
                     session, 'firewall', parent_type_name=parent_type_name):
                 firewall_rules.append(
                     firewall_rule_type.FirewallRule.from_json(
@@ -542,7 +559,7 @@ class IapScanner(base_scanner.BaseScanner):
         """
         instances = []
         with self.scoped_session as session:
-            for instance in self.data_access.scanner_iter(
+            for instance in self._scanner_iter(
                     session, 'instance', parent_type_name=parent_type_name):
                 project = project_type.Project(
                     project_id=instance.parent.name,
@@ -565,7 +582,7 @@ class IapScanner(base_scanner.BaseScanner):
         """
         instance_groups = []
         with self.scoped_session as session:
-            for instance_group in self.data_access.scanner_iter(
+            for instance_group in self._scanner_iter(
                     session, 'instancegroup',
                     parent_type_name=parent_type_name):
                 instance_groups.append(
@@ -585,7 +602,7 @@ class IapScanner(base_scanner.BaseScanner):
         """
         instance_group_managers = []
         with self.scoped_session as session:
-            for instance_group_manager in self.data_access.scanner_iter(
+            for instance_group_manager in self._scanner_iter(
                     session, 'instancegroupmanager',
                     parent_type_name=parent_type_name):
                 instance_group_managers.append(
@@ -605,7 +622,7 @@ class IapScanner(base_scanner.BaseScanner):
         """
         instance_templates = []
         with self.scoped_session as session:
-            for instance_template in self.data_access.scanner_iter(
+            for instance_template in self._scanner_iter(
                     session, 'instancetemplate',
                     parent_type_name=parent_type_name):
                 instance_templates.append(
@@ -624,7 +641,7 @@ class IapScanner(base_scanner.BaseScanner):
         """
         projects = []
         with self.scoped_session as session:
-            for project in self.data_access.scanner_iter(session, 'project'):
+            for project in self._scanner_iter(session, 'project'):
                 projects.append(project)
 
         for parent in projects:
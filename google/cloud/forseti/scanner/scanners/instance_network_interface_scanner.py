@@ -18,6 +18,7 @@
 from google.cloud.forseti.common.gcp_type import instance
 from google.cloud.forseti.common.gcp_type import project
 from google.cloud.forseti.common.util import logger
+from google.cloud.forseti.scanner import model_snapshot
 from google.cloud.forseti.common.gcp_type.resource import ResourceType
 from google.cloud.forseti.scanner.scanners import base_scanner
 from google.cloud.forseti.scanner.audit import instance_network_interface_rules_engine
@@ -123,8 +124,8 @@ class InstanceNetworkInterfaceScanner(base_scanner.BaseScanner):
         with scoped_session as session:
             network_interfaces = []
 
-            for instance_from_data_model in data_access.scanner_iter(
-                    session, 'instance'):
+            for instance_from_data_model in model_snapshot.scanner_iter(
+                    self.service_config, session, data_access, 'instance'):
 
                 proj = project.Project(
                     project_id=instance_from_data_model.parent.name,
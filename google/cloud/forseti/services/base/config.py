@@ -21,6 +21,7 @@ from __future__ import print_function
 from builtins import str
 from builtins import object
 import abc
+import functools
 import re
 from multiprocessing.pool import ThreadPool
 import threading
@@ -33,6 +34,11 @@ from google.cloud.forseti.services import db
 from google.cloud.forseti.services.client import ClientComposition
 from google.cloud.forseti.services.dao import create_engine
 from google.cloud.forseti.services.dao import ModelManager
+from google.cloud.forseti.services.explain.result_cache import (
+    EXPLAIN_CACHE_SIZE)
+from google.cloud.forseti.services.explain.result_cache import ResultCache
+from google.cloud.forseti.services.inventory import cai_temporary_storage
+from google.cloud.forseti.services.inventory.storage import BufferedStorage
 from google.cloud.forseti.services.inventory.storage import Storage
 
 LOGGER = logger.get_logger(__name__)
@@ -196,7 +202,9 @@ class InventoryConfig(AbstractInventoryConfig):
                  retention_days,
                  cai_configs,
                  composite_root_resources=None,
-                 excluded_resources=None):
+                 excluded_resources=None,
+                 bulk_write_configs=None,
+                 dedupe_configs=None):
         """Initialize.
 
         Args:
@@ -208,6 +216,10 @@ class InventoryConfig(AbstractInventoryConfig):
             composite_root_resources (list): The list of resources to use crawl
                 using a composite root.
             excluded_resources (list): The list of resources to exclude.
+            bulk_write_configs (dict): Settings for the buffered inventory
+                storage writer.
+            dedupe_configs (dict): Settings for duplicate resource detection
+                during inventory writes.
 
         Raises:
             ValueError: Raised if neither or both root_resource_id and
@@ -237,6 +249,8 @@ class InventoryConfig(AbstractInventoryConfig):
         self.composite_root_resources = composite_root_resources
         self.excluded_resources = self._filter_valid_resources(
             excluded_resources)
+        self.bulk_write_configs = bulk_write_configs or {}
+        self.dedupe_configs = dedupe_configs or {}
 
     def use_composite_root(self):
         """Checks if inventory is configured to use a composite root resource.
@@ -339,6 +353,61 @@ class InventoryConfig(AbstractInventoryConfig):
         """
         return self.cai_configs.get('api_timeout', 3600)
 
+    def get_cai_ingestion_workers(self):
+        """Returns the number of processes used to parse the CAI dumps.
+
+        Returns:
+            int: Number of parser processes, defaults to 1, which parses the
+                dumps in the thread writing to the CAI temporary store.
+        """
+        return self.cai_configs.get('ingestion_workers', 1)
+
+    def get_cai_data_format(self):
+        """Returns the format assets are stored in the CAI temporary store.
+
+        Returns:
+            str: The data format, json or pickle, defaults to json.
+
+        Raises:
+            ValueError: Raised if the configured data format is not supported.
+        """
+        data_format = self.cai_configs.get(
+            'data_format', cai_temporary_storage.JSON_DATA_FORMAT)
+        if data_format not in cai_temporary_storage.DATA_FORMATS:
+            err = ValueError(
+                'Unsupported CAI data_format {} in the server inventory '
+                'configuration, must be one of {}.'.format(
+                    data_format,
+                    ', '.join(sorted(cai_temporary_storage.DATA_FORMATS))))
+            LOGGER.error(err)
+            raise err
+        return data_format
+
+    def get_cai_memory_store_cap(self):
+        """Returns the memory cap for keeping the CAI data in memory.
+
+        Returns:
+            int: The cap in bytes, 0 if the CAI data is always stored in a
+                sqlite temporary file, the default.
+        """
+        return int(self.cai_configs.get('memory_store_max_mb', 0)) * 1024 * 1024
+
+    def get_bulk_write_configs(self):
+        """Returns the settings for the buffered inventory storage writer.
+
+        Returns:
+            dict: Bulk write settings, empty if not configured.
+        """
+        return self.bulk_write_configs
+
+    def get_dedupe_configs(self):
+        """Returns the settings for duplicate resource detection.
+
+        Returns:
+            dict: Dedupe settings, empty if not configured.
+        """
+        return self.dedupe_configs
+
     def get_service_config(self):
         """Return the attached service configuration.
 
@@ -381,6 +450,7 @@ class ServiceConfig(AbstractServiceConfig):
                                     pool_recycle=3600,
                                     pool_pre_ping=True)
         self.model_manager = ModelManager(self.engine)
+        self.explain_cache = ResultCache()
         self.sessionmaker = db.create_scoped_sessionmaker(self.engine)
         self.endpoint = endpoint
 
@@ -461,7 +531,11 @@ class ServiceConfig(AbstractServiceConfig):
                             'composite_root_resources')
                     ),
                     excluded_resources=forseti_inventory_config.get(
-                        'excluded_resources', [])
+                        'excluded_resources', []),
+                    bulk_write_configs=forseti_inventory_config.get(
+                        'bulk_write', {}),
+                    dedupe_configs=forseti_inventory_config.get(
+                        'dedupe', {})
                 )
             except ValueError as e:
                 return False, str(e)
@@ -488,6 +562,8 @@ class ServiceConfig(AbstractServiceConfig):
             self.notifier_config = forseti_notifier_config
 
             self.global_config = forseti_global_config
+            self.explain_cache.maxsize = (forseti_global_config or {}).get(
+                'explain_cache_size', EXPLAIN_CACHE_SIZE)
         return True, err_msg
 
     def get_forseti_config(self):
@@ -575,8 +651,19 @@ class ServiceConfig(AbstractServiceConfig):
         """Returns the storage class used to access the inventory.
 
         Returns:
-            class: Type of a storage implementation.
+            object: Storage implementation class, with the configured
+                storage arguments bound.
         """
-
-        return Storage
+        if not self.inventory_config:
+            return Storage
+
+        kwargs = {'dedupe_configs': self.inventory_config.get_dedupe_configs()}
+        bulk_write_configs = self.inventory_config.get_bulk_write_configs()
+        if bulk_write_configs.get('enabled'):
+            for key in ('max_buffered_rows', 'flush_interval'):
+                if key in bulk_write_configs:
+                    kwargs[key] = bulk_write_configs[key]
+            return functools.partial(BufferedStorage, **kwargs)
+
+        return functools.partial(Storage, **kwargs)
 # pylint: enable=too-many-instance-attributes
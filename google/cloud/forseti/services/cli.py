@@ -256,6 +256,18 @@ def define_server_parser(parent):
         help='Run the Forseti process, end-to-end.'
     )
 
+    explain_cache_parser = action_subparser.add_parser(
+        'explain_cache',
+        help='Explain query result cache.')
+
+    explain_cache_subparser = explain_cache_parser.add_subparsers(
+        title='subaction',
+        dest='subaction')
+
+    _ = explain_cache_subparser.add_parser(
+        'get',
+        help='Get the hit and miss counters of the cache.')
+
 
 def define_model_parser(parent):
     """Define the model service parser.
@@ -295,6 +307,14 @@ def define_model_parser(parent):
         'model',
         help='Model to delete, either handle or name')
 
+    freeze_model_parser = action_subparser.add_parser(
+        'freeze',
+        help='Write a model to a read-only snapshot file, used by Explain '
+             'instead of the database')
+    freeze_model_parser.add_argument(
+        'model',
+        help='Model to freeze, either handle or name')
+
     create_model_parser = action_subparser.add_parser(
         'create',
         help='Create a model')
@@ -306,6 +326,12 @@ def define_model_parser(parent):
         default='',
         help='Inventory id to import from'
     )
+    create_model_parser.add_argument(
+        '--base_model',
+        default='',
+        help='Model to update incrementally, instead of importing the '
+             'whole inventory'
+    )
     create_model_parser.add_argument(
         '--background',
         '-b',
@@ -490,6 +516,16 @@ def define_explainer_parser(parent):
         nargs='*',
         default=[],
         help='Query for permissions')
+    explain_denied_parser.add_argument(
+        '--prune_roles',
+        action='store_true',
+        help='Leave out the roles granting more permissions than another '
+             'role covering the permissions')
+    explain_denied_parser.add_argument(
+        '--top_k',
+        type=int,
+        default=0,
+        help='Maximum number of strategies, best first')
 
     query_access_by_member = action_subparser.add_parser(
         'access_by_member',
@@ -528,6 +564,15 @@ def define_explainer_parser(parent):
         '--expand_resources',
         action='store_true',
         help='Expand resources to their children')
+    query_access_by_authz.add_argument(
+        '--page_size',
+        type=int,
+        default=0,
+        help='Maximum number of results, all by default')
+    query_access_by_authz.add_argument(
+        '--page_token',
+        default='',
+        help='Continue after the result with this next_page_token')
 
     query_access_by_resource = action_subparser.add_parser(
         'access_by_resource',
@@ -763,6 +808,10 @@ def run_server(client, config, output, _):
         message = client.server_run()
         output.write(message)
 
+    def do_get_explain_cache_statistics():
+        """Get the hit and miss counters of the Explain result cache."""
+        output.write(client.get_explain_cache_statistics())
+
     actions = {
         'log_level': {
             'get': do_get_log_level,
@@ -772,7 +821,10 @@ def run_server(client, config, output, _):
             'get': do_get_configuration,
             'reload': do_reload_configuration
         },
-        'run': do_server_run
+        'run': do_server_run,
+        'explain_cache': {
+            'get': do_get_explain_cache_statistics
+        }
     }
 
     try:
@@ -834,12 +886,19 @@ def run_model(client, config, output, config_env):
         result = client.delete_model(model.handle)
         output.write(result)
 
+    def do_freeze_model():
+        """Freeze a model."""
+        model = client.get_model(config.model)
+        result = client.freeze_model(model.handle)
+        output.write(result)
+
     def do_create_model():
         """Create a model."""
         result = client.new_model('inventory',
                                   config.name,
                                   int(config.inventory_index_id),
-                                  config.background)
+                                  config.background,
+                                  config.base_model)
         output.write(result)
 
     def do_use_model():
@@ -861,6 +920,7 @@ def run_model(client, config, output, config_env):
         'list': do_list_models,
         'get': do_get_model,
         'delete': do_delete_model,
+        'freeze': do_freeze_model,
         'use': do_use_model}
 
     actions[config.action]()
@@ -989,7 +1049,9 @@ def run_explainer(client, config, output, _):
                 client.explain_denied(config.member,
                                       config.resources,
                                       config.roles,
-                                      config.permissions)):
+                                      config.permissions,
+                                      config.prune_roles,
+                                      config.top_k)):
             output.write(binding)
 
     def do_query_access_by_member():
@@ -1020,7 +1082,9 @@ def run_explainer(client, config, output, _):
                 client.query_access_by_permissions(config.role,
                                                    config.permission,
                                                    config.expand_groups,
-                                                   config.expand_resources)):
+                                                   config.expand_resources,
+                                                   config.page_token,
+                                                   config.page_size)):
             output.write(access)
 
     actions = {
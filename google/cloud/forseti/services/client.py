@@ -216,6 +216,15 @@ class ServerConfigClient(ForsetiClient):
         request = server_pb2.ServerRunRequest()
         return self.stub.Run(request)
 
+    def get_explain_cache_statistics(self):
+        """Get the hit and miss counters of the Explain result cache.
+
+        Returns:
+            proto: the returned proto message.
+        """
+        request = server_pb2.GetExplainCacheStatisticsRequest()
+        return self.stub.GetExplainCacheStatistics(request)
+
 
 class NotifierClient(ForsetiClient):
     """Notifier service allows the client to send violation notifications."""
@@ -286,7 +295,8 @@ class ModelClient(ForsetiClient):
         echo = self.stub.Ping(model_pb2.PingRequest(data=data)).data
         return echo == data
 
-    def new_model(self, source, name, inventory_index_id=0, background=True):
+    def new_model(self, source, name, inventory_index_id=0, background=True,
+                  base_model=''):
         """Creates a new model, reply contains the handle.
 
         Args:
@@ -296,6 +306,7 @@ class ModelClient(ForsetiClient):
             inventory_index_id (int64): the index id of the inventory to
                 import from.
             background (bool): whether to run in background.
+            base_model (str): handle of a model to update incrementally.
 
         Returns:
             proto: the returned proto message of creating model
@@ -306,7 +317,8 @@ class ModelClient(ForsetiClient):
                 type=source,
                 name=name,
                 id=inventory_index_id,
-                background=background))
+                background=background,
+                base_model=base_model))
 
     def list_models(self):
         """List existing models in the service.
@@ -347,6 +359,21 @@ class ModelClient(ForsetiClient):
                 handle=model_name),
             metadata=self.metadata())
 
+    def freeze_model(self, model_name):
+        """Freeze a model into a read-only snapshot file used by Explain.
+
+        Args:
+            model_name (str): the handle of the data model to freeze
+
+        Returns:
+            proto: the returned proto message of freezing model
+        """
+
+        return self.stub.FreezeModel(
+            model_pb2.FreezeModelRequest(
+                handle=model_name),
+            metadata=self.metadata())
+
 
 class InventoryClient(ForsetiClient):
     """Inventory service allows the client to create GCP inventory.
@@ -562,9 +589,29 @@ class ExplainClient(ForsetiClient):
                 identity=member_name),
             metadata=self.metadata())
 
+    @require_model
+    def batch_check_iam_policy(self, checks):
+        """Check many accesses via IAM policy in one call.
+
+        Args:
+            checks (list): (full_resource_name, permission_name, member_name)
+                tuples to check
+
+        Returns:
+            proto: the returned proto message of batch_check_iam_policy
+        """
+
+        requests = [explain_pb2.CheckIamPolicyRequest(resource=resource,
+                                                      permission=permission,
+                                                      identity=member)
+                    for resource, permission, member in checks]
+        return self.stub.BatchCheckIamPolicy(
+            explain_pb2.BatchCheckIamPolicyRequest(checks=requests),
+            metadata=self.metadata())
+
     @require_model
     def explain_denied(self, member_name, resource_names, roles=None,
-                       permission_names=None):
+                       permission_names=None, prune_roles=False, top_k=0):
         """List possibilities to grant access which is currently denied.
 
         Args:
@@ -574,6 +621,9 @@ class ExplainClient(ForsetiClient):
                 permission_names should be not none
             permission_names (list): the permissions to explain denied,
                 one of roles or permission_names should be not none
+            prune_roles (bool): whether to drop the roles covering the
+                permissions which grant more than another covering role
+            top_k (int): the maximum number of strategies, all if 0
 
         Returns:
             object: generator of proto message of bindingstrategies.
@@ -590,7 +640,9 @@ class ExplainClient(ForsetiClient):
             member=member_name,
             resources=resource_names,
             roles=roles,
-            permissions=permission_names)
+            permissions=permission_names,
+            prune_roles=prune_roles,
+            top_k=top_k)
         return self.stub.ExplainDenied(request, metadata=self.metadata())
 
     @require_model
@@ -672,7 +724,9 @@ class ExplainClient(ForsetiClient):
                                     role_name,
                                     permission_name,
                                     expand_groups=False,
-                                    expand_resources=False):
+                                    expand_resources=False,
+                                    page_token='',
+                                    page_size=0):
         """List (resource, member) tuples satisfying the authorization
 
         Args:
@@ -680,6 +734,9 @@ class ExplainClient(ForsetiClient):
             permission_name (str): Permission name to query for.
             expand_groups (bool): Whether or not to expand groups.
             expand_resources (bool): Whether or not to expand resources.
+            page_token (str): The next_page_token of the last access tuple
+                received, to continue after it.
+            page_size (int): Maximum number of access tuples, 0 for all.
 
         Returns:
             object: Generator yielding access tuples.
@@ -689,7 +746,9 @@ class ExplainClient(ForsetiClient):
             role_name=role_name,
             permission_name=permission_name,
             expand_groups=expand_groups,
-            expand_resources=expand_resources)
+            expand_resources=expand_resources,
+            page_token=page_token,
+            page_size=page_size)
         return self.stub.GetAccessByPermissions(
             request,
             metadata=self.metadata())
@@ -757,7 +816,8 @@ class ClientComposition(object):
             if not all([c.is_available() for c in self.clients]):
                 raise Exception('gRPC connected but services not registered')
 
-    def new_model(self, source, name, inventory_index_id=0, background=False):
+    def new_model(self, source, name, inventory_index_id=0, background=False,
+                  base_model=''):
         """Create a new model from the specified source.
 
         Args:
@@ -767,13 +827,14 @@ class ClientComposition(object):
             inventory_index_id (int64): the index id of the inventory to
                 import from.
             background (bool): whether to run in background.
+            base_model (str): handle of a model to update incrementally.
 
         Returns:
             proto: the returned proto message of creating model
         """
 
         return self.model.new_model(source, name, inventory_index_id,
-                                    background)
+                                    background, base_model)
 
     def list_models(self):
         """List existing models.
@@ -19,13 +19,17 @@
 
 from builtins import next
 from builtins import object
+from array import array
 import binascii
+import bisect
 import collections
+import heapq
 import hmac
 import json
 import os
 import struct
 from threading import Lock
+import time
 
 from sqlalchemy import Column
 from sqlalchemy import event
@@ -34,6 +38,7 @@ from sqlalchemy import Boolean
 from sqlalchemy import String
 from sqlalchemy import Sequence
 from sqlalchemy import ForeignKey
+from sqlalchemy import Index
 from sqlalchemy import Text
 from sqlalchemy import create_engine as sqlalchemy_create_engine
 from sqlalchemy import Table
@@ -46,7 +51,6 @@ from sqlalchemy.orm import joinedload
 from sqlalchemy.orm import reconstructor
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.sql import select
 from sqlalchemy.sql import union
 from sqlalchemy.ext.declarative import declarative_base
@@ -64,6 +68,13 @@ LOGGER = logger.get_logger(__name__)
 POOL_RECYCLE_SECONDS = 300
 PER_YIELD = 4096
 
+# Methods to denormalize the group-in-group relation.
+GROUP_CLOSURE_SQL = 'sql'
+GROUP_CLOSURE_MEMORY = 'memory'
+
+# Number of resource ancestry rows inserted per statement.
+ANCESTRY_BATCH_SIZE = 5000
+
 
 def page_query(query, block_size=PER_YIELD):
     """Page query by block.
@@ -88,6 +99,439 @@ def page_query(query, block_size=PER_YIELD):
                               (block_number + 1) * block_size).all()
 
 
+def _bit_numbers(bitmap):
+    """Get the numbers of the bits set in a bitmap.
+
+    Only the set bits are visited, so sparse bitmaps of a large width are
+    cheap to go over.
+
+    Args:
+        bitmap (int): The bitmap.
+
+    Returns:
+        list: The numbers of the bits set, in increasing order.
+    """
+    numbers = []
+    while bitmap:
+        bit = bitmap & -bitmap
+        numbers.append(bit.bit_length() - 1)
+        bitmap ^= bit
+    return numbers
+
+
+# pylint: disable=too-many-locals,too-many-branches
+def group_closure(edges, groups=None):
+    """Compute the transitive closure of a group membership graph.
+
+    The strongly connected components of the graph are found with Tarjan's
+    algorithm, which completes every component after all components reachable
+    from it, so the members reachable from a component are known from its
+    direct members when it completes. The reachable members are kept as a
+    bitset over the group numbers, shared by all groups of a component.
+
+    Args:
+        edges (iterable): The (parent, member) group memberships.
+        groups (iterable): Only return the closure of these groups, or of all
+            groups if None.
+
+    Yields:
+        tuple: (parent, member) for every member reachable from parent.
+    """
+    numbers = {}
+    names = []
+    successors = []
+    for parent, member in edges:
+        for name in (parent, member):
+            if name not in numbers:
+                numbers[name] = len(names)
+                names.append(name)
+                successors.append([])
+        successors[numbers[parent]].append(numbers[member])
+
+    order = [-1] * len(names)
+    low = [0] * len(names)
+    component = [-1] * len(names)
+    on_stack = [False] * len(names)
+    stack = []
+    reach = []
+    counter = 0
+    for root in range(len(names)):
+        if order[root] >= 0:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, iter(successors[root]))]
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if order[child] < 0:
+                    order[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = True
+                    work.append((child, iter(successors[child])))
+                    break
+                if on_stack[child]:
+                    low[node] = min(low[node], order[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] != order[node]:
+                    continue
+
+                number = len(reach)
+                members = []
+                while not members or members[-1] != node:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component[member] = number
+                    members.append(member)
+
+                bits = 0
+                cyclic = len(members) > 1
+                for member in members:
+                    for child in successors[member]:
+                        if component[child] == number:
+                            cyclic = True
+                        else:
+                            bits |= (1 << child) | reach[component[child]]
+                if cyclic:
+                    # Groups in a cycle are members of themselves.
+                    for member in members:
+                        bits |= 1 << member
+                reach.append(bits)
+
+    if groups is None:
+        parents = [number for number, children in enumerate(successors)
+                   if children]
+    else:
+        parents = [numbers[group] for group in groups if group in numbers]
+    for parent in parents:
+        for member in _bit_numbers(reach[component[parent]]):
+            yield names[parent], names[member]
+# pylint: enable=too-many-locals,too-many-branches
+
+
+def resource_closure(parents):
+    """Compute the ancestors of every resource of a hierarchy.
+
+    Each resource is walked up to the first resource with known ancestors,
+    so every parent link is followed once.
+
+    Args:
+        parents (dict): The parent type_name of each resource type_name, None
+            for the roots. Parents missing from the dict are ignored.
+
+    Yields:
+        tuple: (ancestor, descendant, depth) for every resource and each of
+            its ancestors, including the resource itself at depth 0.
+    """
+    chains = {}
+    for name in parents:
+        path = []
+        node = name
+        while node in parents and node not in chains:
+            if node in path:
+                LOGGER.warning('Resource hierarchy cycle at %s.', node)
+                break
+            path.append(node)
+            node = parents[node]
+        chain = chains.get(node, ())
+        for node in reversed(path):
+            chain = (node,) + chain
+            chains[node] = chain
+
+    for name, chain in chains.items():
+        for depth, ancestor in enumerate(chain):
+            yield ancestor, name, depth
+
+
+def _csr(size, edges):
+    """Build compressed sparse row adjacency arrays.
+
+    Args:
+        size (int): The number of nodes.
+        edges (list): The (source, target) node number pairs.
+
+    Returns:
+        tuple: (offsets, targets), the targets of node n are
+            targets[offsets[n]:offsets[n + 1]].
+    """
+    counts = [0] * (size + 1)
+    for source, _ in edges:
+        counts[source + 1] += 1
+    for node in range(size):
+        counts[node + 1] += counts[node]
+    offsets = array('l', counts)
+    targets = array('l', [0] * len(edges))
+    for source, target in edges:
+        targets[counts[source]] = target
+        counts[source] += 1
+    return offsets, targets
+
+
+class MembershipIndex(object):
+    """Group membership graph of a model, indexed by member number.
+
+    Members are numbered once and the membership edges are kept as compressed
+    sparse row arrays in both directions, so expanding members is a breadth
+    first search over integer arrays instead of lazy loading the parents or
+    children of every member from the database.
+    """
+
+    def __init__(self, members, memberships, group_types):
+        """Initialize.
+
+        Args:
+            members (iterable): The (name, type) of every member.
+            memberships (iterable): The (group_name, members_name) rows.
+            group_types (set): Member types whose members are expanded.
+        """
+        self.names = []
+        self.numbers = {}
+        self.is_group = bytearray()
+        for name, member_type in members:
+            self.numbers[name] = len(self.names)
+            self.names.append(name)
+            self.is_group.append(member_type in group_types)
+
+        edges = [(self.numbers[group], self.numbers[member])
+                 for group, member in memberships
+                 if group in self.numbers and member in self.numbers]
+        size = len(self.names)
+        self.child_offsets, self.children = _csr(size, edges)
+        self.parent_offsets, self.parents = _csr(
+            size, [(member, group) for group, member in edges])
+
+    def reverse_expand(self, member_names, graph=None):
+        """Expand members to all the groups containing them.
+
+        Args:
+            member_names (iterable): Names of the members to expand.
+            graph (dict): If set, filled with the names of the direct groups
+                of every member walked.
+
+        Returns:
+            list: Names of the members found and all their groups.
+        """
+        offsets = self.parent_offsets
+        parents = self.parents
+        seen = bytearray(len(self.names))
+        frontier = []
+        for name in member_names:
+            number = self.numbers.get(name)
+            if number is not None and not seen[number]:
+                seen[number] = 1
+                frontier.append(number)
+                if graph is not None:
+                    graph.setdefault(name, set())
+        found = list(frontier)
+        while frontier:
+            next_frontier = []
+            for member in frontier:
+                for group in parents[offsets[member]:offsets[member + 1]]:
+                    if graph is not None:
+                        graph.setdefault(self.names[member], set()).add(
+                            self.names[group])
+                    if not seen[group]:
+                        seen[group] = 1
+                        next_frontier.append(group)
+            found.extend(next_frontier)
+            frontier = next_frontier
+        return [self.names[member] for member in found]
+
+    def expand(self, member_names):
+        """Expand groups to all their transitive members.
+
+        Args:
+            member_names (iterable): Names of the members to expand.
+
+        Returns:
+            list: Names of the members and, for groups, all their members.
+        """
+        offsets = self.child_offsets
+        children = self.children
+        is_group = self.is_group
+        seen = bytearray(len(self.names))
+        frontier = []
+        for name in member_names:
+            number = self.numbers.get(name)
+            if number is not None and not seen[number]:
+                seen[number] = 1
+                frontier.append(number)
+        found = list(frontier)
+        frontier = [member for member in frontier if is_group[member]]
+        while frontier:
+            next_frontier = []
+            for group in frontier:
+                for member in children[offsets[group]:offsets[group + 1]]:
+                    if not seen[member]:
+                        seen[member] = 1
+                        found.append(member)
+                        if is_group[member]:
+                            next_frontier.append(member)
+            frontier = next_frontier
+        return [self.names[member] for member in found]
+
+
+class RoleIndex(object):
+    """Roles and permissions of a model, indexed by interned number.
+
+    Roles and permissions are numbered once, every role keeps an integer
+    bitmap of its permission numbers and every permission a bitmap of its
+    role numbers, so finding the roles covering a set of permissions is a
+    few bitwise ands. The role names are also kept sorted to find the
+    roles matching a name prefix with a binary search.
+    """
+
+    def __init__(self, role_names, role_permission_names):
+        """Initialize.
+
+        Args:
+            role_names (iterable): The name of every role.
+            role_permission_names (iterable): The (role_name,
+                permission_name) rows.
+        """
+        self.role_names = []
+        self.role_numbers = {}
+        self.role_bits = []
+        self.permission_names = []
+        self.permission_numbers = {}
+        self.permission_bits = []
+        for role_name in role_names:
+            self._role_number(role_name)
+        for role_name, permission_name in role_permission_names:
+            self._add_permission(self._role_number(role_name),
+                                 permission_name)
+        self.sorted_role_names = sorted(self.role_names)
+
+    def _role_number(self, role_name):
+        """Get the number of a role, numbering it if new.
+
+        Args:
+            role_name (str): The role name.
+
+        Returns:
+            int: The role number.
+        """
+        number = self.role_numbers.get(role_name)
+        if number is None:
+            number = len(self.role_names)
+            self.role_numbers[role_name] = number
+            self.role_names.append(role_name)
+            self.role_bits.append(0)
+        return number
+
+    def _add_permission(self, role_number, permission_name):
+        """Grant a permission to a role.
+
+        Args:
+            role_number (int): The role number.
+            permission_name (str): The permission name.
+        """
+        number = self.permission_numbers.get(permission_name)
+        if number is None:
+            number = len(self.permission_names)
+            self.permission_numbers[permission_name] = number
+            self.permission_names.append(permission_name)
+            self.permission_bits.append(0)
+        self.role_bits[role_number] |= 1 << number
+        self.permission_bits[number] |= 1 << role_number
+
+    def add_role(self, role_name, permission_names):
+        """Add a role, or grant more permissions to an existing role.
+
+        Args:
+            role_name (str): The role name.
+            permission_names (iterable): The permissions of the role.
+        """
+        if role_name not in self.role_numbers:
+            bisect.insort(self.sorted_role_names, role_name)
+        role_number = self._role_number(role_name)
+        for permission_name in permission_names:
+            self._add_permission(role_number, permission_name)
+
+    def roles_by_prefix(self, prefix):
+        """Get the roles with a name prefix.
+
+        Args:
+            prefix (str): The role name prefix.
+
+        Returns:
+            list: The role names starting with the prefix, sorted.
+        """
+        names = self.sorted_role_names
+        start = bisect.bisect_left(names, prefix)
+        end = start
+        while end < len(names) and names[end].startswith(prefix):
+            end += 1
+        return names[start:end]
+
+    def permissions(self, role_name):
+        """Get the permissions of a role.
+
+        Args:
+            role_name (str): The role name.
+
+        Returns:
+            frozenset: The permission names of the role, empty if unknown.
+        """
+        number = self.role_numbers.get(role_name)
+        if number is None:
+            return frozenset()
+        return frozenset(self.permission_names[permission]
+                         for permission in _bit_numbers(
+                             self.role_bits[number]))
+
+    def roles_covering(self, permission_names):
+        """Get the roles granting all of the permissions.
+
+        Args:
+            permission_names (iterable): The permission names, all the roles
+                granting any permission if empty.
+
+        Returns:
+            list: The names of the covering roles.
+        """
+        permission_names = set(permission_names)
+        if not permission_names:
+            return [name for name, bits in zip(self.role_names,
+                                               self.role_bits) if bits]
+        roles = -1
+        for permission_name in permission_names:
+            number = self.permission_numbers.get(permission_name)
+            if number is None:
+                return []
+            roles &= self.permission_bits[number]
+        return [self.role_names[number] for number in _bit_numbers(roles)]
+
+
+def prune_roles(role_permissions, role_names):
+    """Drop the roles granting more permissions than another role.
+
+    A role is dropped if the permissions of another of the roles are a
+    strict subset of its permissions.
+
+    Args:
+        role_permissions (dict): The permission names of every role.
+        role_names (iterable): The roles to prune.
+
+    Returns:
+        list: The roles kept, with the fewest permissions first.
+    """
+    kept = []
+    for role in sorted(role_names,
+                       key=lambda name: (len(role_permissions[name]), name)):
+        permissions = role_permissions[role]
+        if not any(role_permissions[other] < permissions for other in kept):
+            kept.append(role)
+    return kept
+
+
 def generate_model_handle():
     """Generate random model handle.
 
@@ -253,6 +697,7 @@ def define_model(model_name, dbengine, model_seed):
     permissions_tablename = '{}_permissions'.format(model_name)
     members_tablename = '{}_members'.format(model_name)
     resources_tablename = '{}_resources'.format(model_name)
+    resource_ancestors_tablename = '{}_resource_ancestors'.format(model_name)
 
     role_permissions = Table('{}_role_permissions'.format(model_name),
                              base.metadata,
@@ -368,6 +813,37 @@ def define_model(model_name, dbengine, model_seed):
     Resource.children = relationship(
         'Resource', order_by=Resource.full_name, back_populates='parent')
 
+    class ResourceAncestor(base):
+        """Row for a resource and one of its ancestors, or itself."""
+
+        __tablename__ = resource_ancestors_tablename
+        __table_args__ = (
+            Index('{}_ancestor'.format(resource_ancestors_tablename),
+                  'ancestor'),
+            Index('{}_descendant'.format(resource_ancestors_tablename),
+                  'descendant', 'depth'),
+        )
+
+        id = Column(Integer,
+                    Sequence('{}_id_seq'.format(resource_ancestors_tablename)),
+                    primary_key=True)
+        ancestor = Column(get_string_by_dialect(dbengine.dialect.name, 700),
+                          nullable=False)
+        descendant = Column(get_string_by_dialect(dbengine.dialect.name, 700),
+                            nullable=False)
+        depth = Column(Integer, nullable=False)
+
+        def __repr__(self):
+            """String representation.
+
+            Returns:
+                str: ResourceAncestor represented as
+                    (ancestor='{}', descendant='{}', depth='{}')
+            """
+            return ('<ResourceAncestor(ancestor={}, descendant={}, '
+                    'depth={})>'.format(self.ancestor, self.descendant,
+                                        self.depth))
+
     class Binding(base):
         """Row for a binding between resource, roles and members."""
 
@@ -502,6 +978,7 @@ def define_model(model_name, dbengine, model_seed):
         TBL_PERMISSION = Permission
         TBL_ROLE = Role
         TBL_RESOURCE = Resource
+        TBL_RESOURCE_ANCESTOR = ResourceAncestor
         TBL_MEMBERSHIP = group_members
 
         # Set of member binding types that expand like groups.
@@ -513,6 +990,131 @@ def define_model(model_name, dbengine, model_seed):
         # Members that represent all users
         ALL_USER_MEMBERS = ['allusers', 'allauthenticatedusers']
 
+        # Number of policy, role and membership updates made to the model by
+        # this process, used to invalidate cached query results.
+        update_counter = 0
+
+        # Whether the model was frozen into an Explain snapshot file. Explain
+        # answers from the file, so a frozen model must not be changed.
+        frozen = False
+
+        # Whether the resource ancestry table was checked to be populated.
+        resource_ancestry_ready = False
+
+        # (update_counter, MembershipIndex) of the model, once loaded.
+        membership_index = None
+
+        # (update_counter, RoleIndex) of the model, once loaded.
+        role_index = None
+
+        @classmethod
+        def increment_update_counter(cls):
+            """Increments the counter of model updates."""
+            cls.update_counter += 1
+
+        @classmethod
+        def check_not_frozen(cls):
+            """Refuse changes to a frozen model.
+
+            Raises:
+                ValueError: The model is frozen.
+            """
+            if cls.frozen:
+                error_message = ('Model {} is frozen and cannot be '
+                                 'changed.'.format(model_name))
+                LOGGER.error(error_message)
+                raise ValueError(error_message)
+
+        @classmethod
+        def get_membership_index(cls, session):
+            """Get the group membership index, loading it if out of date.
+
+            Args:
+                session (object): Database session to use.
+
+            Returns:
+                MembershipIndex: The membership graph of the model.
+            """
+            cached = cls.membership_index
+            if cached is not None and cached[0] == cls.update_counter:
+                return cached[1]
+
+            update_counter = cls.update_counter
+            start = time.time()
+            index = MembershipIndex(
+                session.query(Member.name, Member.type).yield_per(PER_YIELD),
+                session.query(group_members.c.group_name,
+                              group_members.c.members_name
+                             ).yield_per(PER_YIELD),
+                cls.GROUP_TYPES)
+            LOGGER.info('Loaded membership index of %i members and %i '
+                        'memberships in %.2f seconds.', len(index.names),
+                        len(index.children), time.time() - start)
+            cls.membership_index = (update_counter, index)
+            return index
+
+        @classmethod
+        def get_role_index(cls, session):
+            """Get the role index, loading it if out of date.
+
+            Args:
+                session (object): Database session to use.
+
+            Returns:
+                RoleIndex: The roles and permissions of the model.
+            """
+            cached = cls.role_index
+            if cached is not None and cached[0] == cls.update_counter:
+                return cached[1]
+
+            update_counter = cls.update_counter
+            start = time.time()
+            index = RoleIndex(
+                (name for name, in session.query(Role.name)),
+                session.query(role_permissions.c.roles_name,
+                              role_permissions.c.permissions_name
+                             ).yield_per(PER_YIELD))
+            LOGGER.info('Loaded role index of %i roles and %i permissions '
+                        'in %.2f seconds.', len(index.role_names),
+                        len(index.permission_names), time.time() - start)
+            cls.role_index = (update_counter, index)
+            return index
+
+        @classmethod
+        def _get_by_name(cls, session, table, names):
+            """Load roles or permissions by name.
+
+            Args:
+                session (object): Database session to use.
+                table (object): Role or Permission.
+                names (list): Names of the rows to load.
+
+            Returns:
+                dict: The rows, by name.
+            """
+            rows = {}
+            for i in range(0, len(names), PER_YIELD):
+                rows.update((row.name, row) for row in session.query(
+                    table).filter(table.name.in_(names[i:i + PER_YIELD])))
+            return rows
+
+        @classmethod
+        def _get_members(cls, session, member_names):
+            """Load members by name.
+
+            Args:
+                session (object): Database session to use.
+                member_names (list): Names of the members to load.
+
+            Returns:
+                list: The Members.
+            """
+            members = []
+            for i in range(0, len(member_names), PER_YIELD):
+                members.extend(session.query(Member).filter(
+                    Member.name.in_(member_names[i:i + PER_YIELD])))
+            return members
+
         @classmethod
         def delete_all(cls, engine):
             """Delete all data from the model.
@@ -533,10 +1135,12 @@ def define_model(model_name, dbengine, model_seed):
 
             Role.__table__.drop(engine)
             Member.__table__.drop(engine)
+            ResourceAncestor.__table__.drop(engine)
             Resource.__table__.drop(engine)
 
         @classmethod
-        def denorm_group_in_group(cls, session):
+        def denorm_group_in_group(cls, session, groups=None,
+                                  method=GROUP_CLOSURE_MEMORY):
             """Denormalize group-in-group relation.
 
             This method will fill the GroupInGroup table with
@@ -546,6 +1150,13 @@ def define_model(model_name, dbengine, model_seed):
 
             Args:
                 session (object): Database session to use.
+                groups (iterable): If set, only the rows of these parent
+                    groups are re-denormalized, the rows of all other groups
+                    must be up to date.
+                method (str): GROUP_CLOSURE_MEMORY to compute the relation in
+                    memory, or GROUP_CLOSURE_SQL to compute it with repeated
+                    SQL joins. The rows of selected groups are always
+                    computed in memory.
 
             Returns:
                 int: Number of iterations.
@@ -553,7 +1164,28 @@ def define_model(model_name, dbengine, model_seed):
             Raises:
                 Exception: dernomalize fail
             """
+            start = time.time()
+            if groups is not None or method == GROUP_CLOSURE_MEMORY:
+                method = GROUP_CLOSURE_MEMORY
+                iterations = cls._denorm_in_memory(session, groups)
+            else:
+                iterations = cls._denorm_with_sql(session)
+            LOGGER.info('Denormalized group-in-group relation with %s method '
+                        'in %i iterations, %.2f seconds.', method, iterations,
+                        time.time() - start)
+            cls.increment_update_counter()
+            return iterations
+
+        @classmethod
+        def _denorm_with_sql(cls, session):
+            """Denormalize group-in-group relation with repeated SQL joins.
 
+            Args:
+                session (object): Database session to use.
+
+            Returns:
+                int: Number of iterations.
+            """
             tbl1 = aliased(GroupInGroup.__table__, name='alias1')
             tbl2 = aliased(GroupInGroup.__table__, name='alias2')
             tbl3 = aliased(GroupInGroup.__table__, name='alias3')
@@ -634,11 +1266,114 @@ def define_model(model_name, dbengine, model_seed):
                 session.commit()
             return iterations
 
+        @classmethod
+        def _denorm_in_memory(cls, session, groups=None):
+            """Denormalize group-in-group relation in memory.
+
+            The group memberships are read once, their transitive closure is
+            computed by group_closure and bulk inserted.
+
+            Args:
+                session (object): Database session to use.
+                groups (iterable): If set, only re-denormalize these groups.
+
+            Returns:
+                int: Number of iterations, always 1.
+            """
+            qry = (session.query(group_members)
+                   .filter(group_members.c.group_name.startswith('group/'))
+                   .filter(group_members.c.members_name.startswith('group/')))
+            edges = list(qry.yield_per(PER_YIELD))
+
+            tbl = GroupInGroup.__table__
+            try:
+                if groups is None:
+                    session.execute(tbl.delete())
+                else:
+                    groups = sorted(set(groups))
+                    for i in range(0, len(groups), PER_YIELD):
+                        session.execute(tbl.delete().where(
+                            tbl.c.parent.in_(groups[i:i + PER_YIELD])))
+
+                rows = []
+                for parent, member in group_closure(edges, groups):
+                    rows.append({'parent': parent, 'member': member})
+                    if len(rows) >= PER_YIELD:
+                        session.execute(tbl.insert(), rows)
+                        rows = []
+                if rows:
+                    session.execute(tbl.insert(), rows)
+            except Exception as e:
+                LOGGER.exception(e)
+                session.rollback()
+                raise
+            finally:
+                session.commit()
+            return 1
+
+        @classmethod
+        def denorm_resource_ancestry(cls, session):
+            """Denormalize the resource hierarchy.
+
+            This method fills the ResourceAncestor table with a row for every
+            resource and each of its ancestors, with the number of levels
+            between them. Whenever resources are imported outside of
+            add_resource, this method should be called to re-denormalize.
+
+            Args:
+                session (object): Database session to use.
+
+            Returns:
+                int: Number of ancestry rows.
+            """
+            start = time.time()
+            parents = dict(
+                session.query(Resource.type_name, Resource.parent_type_name)
+                .yield_per(PER_YIELD))
+            table = ResourceAncestor.__table__
+            session.execute(table.delete())
+
+            rows = []
+            count = 0
+            for ancestor, descendant, depth in resource_closure(parents):
+                rows.append({'ancestor': ancestor,
+                             'descendant': descendant,
+                             'depth': depth})
+                if len(rows) >= ANCESTRY_BATCH_SIZE:
+                    session.execute(table.insert(), rows)
+                    count += len(rows)
+                    rows = []
+            if rows:
+                session.execute(table.insert(), rows)
+                count += len(rows)
+            session.commit()
+            cls.resource_ancestry_ready = True
+            LOGGER.info('Denormalized the hierarchy of %i resources into %i '
+                        'ancestry rows in %.2f seconds.', len(parents), count,
+                        time.time() - start)
+            return count
+
+        @classmethod
+        def _ensure_resource_ancestry(cls, session):
+            """Populate the resource ancestry of models imported without it.
+
+            Args:
+                session (object): Database session to use.
+            """
+            if cls.resource_ancestry_ready:
+                return
+            if (session.query(ResourceAncestor.id).first() is None and
+                    session.query(Resource.type_name).first() is not None):
+                cls.denorm_resource_ancestry(session)
+            cls.resource_ancestry_ready = True
+
         @classmethod
         def expand_special_members(cls, session):
             """Create dynamic groups for project(Editor|Owner|Viewer).
 
-            Should be called after IAM bindings are added to the model.
+            Should be called after IAM bindings are added to the model. The
+            project bindings of all the special members are read at once and
+            their memberships are inserted in bulk.
 
             Args:
                 session (object): Database session to use.
@@ -647,33 +1382,72 @@ def define_model(model_name, dbengine, model_seed):
                 'projecteditor': 'roles/editor',
                 'projectowner': 'roles/owner',
                 'projectviewer': 'roles/viewer'}
-            for parent_member in cls.list_group_members(
-                    session, '', member_types=list(member_type_map.keys())):
-                member_type, project_id = parent_member.split('/')
-                role = member_type_map[member_type]
-                try:
-                    iam_policy = cls.get_iam_policy(
-                        session,
-                        'project/{}'.format(project_id),
-                        roles=[role])
-                    LOGGER.info('iam_policy: %s', iam_policy)
-                except NoResultFound:
+            special_members = cls.list_group_members(
+                session, '', member_types=list(member_type_map.keys()))
+            if not special_members:
+                return
+
+            projects = sorted(set(
+                'project/{}'.format(name.split('/', 1)[1])
+                for name in special_members))
+            existing_projects = set()
+            project_bindings = collections.defaultdict(list)
+            for i in range(0, len(projects), PER_YIELD):
+                chunk = projects[i:i + PER_YIELD]
+                existing_projects.update(
+                    type_name for type_name, in session.query(
+                        Resource.type_name).filter(
+                            Resource.type_name.in_(chunk)))
+                qry = (session.query(Binding.resource_type_name,
+                                     Binding.role_name,
+                                     binding_members.c.members_name)
+                       .join(binding_members)
+                       .filter(Binding.role_name.in_(
+                           list(member_type_map.values())))
+                       .filter(Binding.resource_type_name.in_(chunk)))
+                for project, role, member_name in qry:
+                    project_bindings[(project, role)].append(member_name)
+
+            # Binding members may have been written by the importer since the
+            # membership index was loaded.
+            cls.increment_update_counter()
+            membership_index = cls.get_membership_index(session)
+            expanded_cache = {}
+            membership_rows = []
+            group_in_group_rows = []
+            for parent_member in special_members:
+                member_type, project_id = parent_member.split('/', 1)
+                project = 'project/{}'.format(project_id)
+                if project not in existing_projects:
                     LOGGER.warning('Found a non-existent project, or project '
                                    'outside of the organization, in an IAM '
                                    'binding: %s', parent_member)
                     continue
-                members = iam_policy.get('bindings', {}).get(role, [])
-                expanded_members = cls.expand_members(session, members)
-                for member in expanded_members:
-                    stmt = cls.TBL_MEMBERSHIP.insert(
-                        {'group_name': parent_member,
-                         'members_name': member.name})
-                    session.execute(stmt)
-                    if member.type == 'group' and member.name in members:
-                        session.add(cls.TBL_GROUP_IN_GROUP(
-                            parent=parent_member,
-                            member=member.name))
+                members = project_bindings[(project,
+                                            member_type_map[member_type])]
+                expanded_members = set()
+                for member_name in members:
+                    if member_name not in expanded_cache:
+                        expanded_cache[member_name] = membership_index.expand(
+                            [member_name])
+                    expanded_members.update(expanded_cache[member_name])
+                for member_name in sorted(expanded_members):
+                    membership_rows.append({'group_name': parent_member,
+                                            'members_name': member_name})
+                    if (member_name.startswith('group/') and
+                            member_name in members):
+                        group_in_group_rows.append({'parent': parent_member,
+                                                    'member': member_name})
+
+            for rows, table in [(membership_rows, cls.TBL_MEMBERSHIP),
+                                (group_in_group_rows,
+                                 cls.TBL_GROUP_IN_GROUP.__table__)]:
+                for i in range(0, len(rows), PER_YIELD):
+                    session.execute(table.insert(), rows[i:i + PER_YIELD])
             session.commit()
+            cls.increment_update_counter()
+            LOGGER.info('Expanded %i special members to %i memberships.',
+                        len(special_members), len(membership_rows))
 
         @classmethod
         def explain_granted(cls, session, member_name, resource_type_name,
@@ -716,10 +1490,8 @@ def define_model(model_name, dbengine, model_seed):
                 qry = session.query(Binding, Member).join(
                     binding_members).join(Member)
             else:
-                roles = [r.name for r in
-                         cls.get_roles_by_permission_names(
-                             session,
-                             [permission])]
+                roles = cls.get_role_index(session).roles_covering(
+                    [permission])
                 qry = session.query(Binding, Member)
                 qry = qry.join(binding_members).join(Member)
                 qry = qry.join(Role).join(role_permissions).join(Permission)
@@ -797,7 +1569,8 @@ def define_model(model_name, dbengine, model_seed):
 
         @classmethod
         def explain_denied(cls, session, member_name, resource_type_names,
-                           permission_names, role_names):
+                           permission_names, role_names, prune=False,
+                           top_k=0):
             """Explain why an access is denied
 
             Provide information how to grant access to a member if such
@@ -814,25 +1587,34 @@ def define_model(model_name, dbengine, model_seed):
                 resource_type_names (list): list of type_names of resources
                 permission_names (list): list of permissions
                 role_names (list): list of roles
+                prune (bool): whether to drop the roles covering the
+                    permissions which grant a superset of the permissions of
+                    another covering role
+                top_k (int): maximum number of strategies, all if 0
 
             Returns:
                 list: list of tuples,
-                    (overgranting,[(role_name,member_name,resource_name)])
+                    (overgranting,[(role_name,member_name,resource_name)]),
+                    ranked by overgranting then by the number of permissions
+                    granted beyond the requested ones
 
             Raises:
                 Exception: No roles covering requested permission set,
                     Not possible
             """
 
+            role_index = cls.get_role_index(session)
+            permission_set = set(permission_names)
             if not role_names:
-                role_names = [r.name for r in
-                              cls.get_roles_by_permission_names(
-                                  session,
-                                  permission_names)]
+                role_names = role_index.roles_covering(permission_set)
                 if not role_names:
                     error_message = 'No roles covering requested permission set'
                     LOGGER.error(error_message)
                     raise Exception(error_message)
+                if prune:
+                    role_names = prune_roles(
+                        {role: role_index.permissions(role)
+                         for role in role_names}, role_names)
 
             resource_hierarchy = (
                 cls.resource_ancestors(session,
@@ -891,28 +1673,40 @@ def define_model(model_name, dbengine, model_seed):
                 .filter(Role.name == Binding.role_name)
                 .all())
 
-            strategies = []
-            for resource in bind_res_candidates:
-                for role_name in role_names:
-                    overgranting = (len(bind_res_candidates) -
-                                    bind_res_candidates.index(resource) -
-                                    1)
-                    strategies.append(
-                        (overgranting, [
-                            (role, member_name, resource)
-                            for role in [role_name]]))
-            if bindings:
-                for binding, member in bindings:
-                    overgranting = (len(bind_res_candidates) - 1 -
-                                    bind_res_candidates.index(
-                                        binding.resource_type_name))
-                    strategies.append(
-                        (overgranting, [
-                            (binding.role_name,
-                             member.name,
-                             binding.resource_type_name)]))
-
-            return strategies
+            overgranting = {resource: len(bind_res_candidates) - 1 - i
+                            for i, resource in enumerate(bind_res_candidates)}
+
+            def rank(role_name, name, resource, existing):
+                """Rank a strategy, lower is better.
+
+                Args:
+                    role_name (str): role of the binding
+                    name (str): member to add to the binding
+                    resource (str): resource of the binding
+                    existing (bool): whether the binding exists, the member
+                        would be added to a group of the binding
+
+                Returns:
+                    tuple: rank, and the strategy
+                """
+                extra = len(role_index.permissions(role_name) -
+                            permission_set)
+                return ((overgranting[resource], extra, existing, role_name,
+                         name, resource),
+                        (overgranting[resource],
+                         [(role_name, name, resource)]))
+
+            ranked = [rank(role_name, member_name, resource, False)
+                      for resource in bind_res_candidates
+                      for role_name in role_names]
+            ranked.extend(rank(binding.role_name, member.name,
+                               binding.resource_type_name, True)
+                          for binding, member in bindings)
+            if top_k:
+                ranked = heapq.nsmallest(top_k, ranked)
+            else:
+                ranked.sort()
+            return [strategy for _, strategy in ranked]
 
         @classmethod
         def query_access_by_member(cls, session, member_name, permission_names,
@@ -946,14 +1740,14 @@ def define_model(model_name, dbengine, model_seed):
             else:
                 member_names = [member_name]
 
-            roles = cls.get_roles_by_permission_names(
-                session, permission_names)
+            roles = cls.get_role_index(session).roles_covering(
+                permission_names)
 
             qry = (
                 session.query(Binding)
                 .join(binding_members)
                 .join(Member)
-                .filter(Binding.role_name.in_([r.name for r in roles]))
+                .filter(Binding.role_name.in_(roles))
                 .filter(Member.name.in_(member_names))
             )
 
@@ -980,7 +1774,9 @@ def define_model(model_name, dbengine, model_seed):
                                        role_name=None,
                                        permission_name=None,
                                        expand_groups=False,
-                                       expand_resources=False):
+                                       expand_resources=False,
+                                       start_after=None,
+                                       page_size=PER_YIELD):
             """Query access via the specified permission
 
             Return all the (Principal, Resource) combinations allowing
@@ -989,12 +1785,19 @@ def define_model(model_name, dbengine, model_seed):
             expanded, so the results will only contains direct bindings
             filtered by permission. But the relations can be expanded
 
+            The access tuples are ordered by resource and role, and read in
+            pages of rows so the query can be resumed after any tuple. Group
+            expansions are shared by all the tuples the groups appear in.
+
             Args:
                 session (object): Database session.
                 role_name (str): Role name to query for
                 permission_name (str): Permission name to query for.
                 expand_groups (bool): Whether or not to expand groups.
                 expand_resources (bool): Whether or not to expand resources.
+                start_after (tuple): If set, the (resource_type_name,
+                    role_name) of the last access tuple already returned.
+                page_size (int): Number of rows read per query.
 
             Yields:
                 obejct: A generator of access tuples.
@@ -1006,64 +1809,96 @@ def define_model(model_name, dbengine, model_seed):
             if role_name:
                 role_names = [role_name]
             elif permission_name:
-                role_names = [p.name for p in
-                              cls.get_roles_by_permission_names(
-                                  session,
-                                  [permission_name])]
+                role_names = cls.get_role_index(session).roles_covering(
+                    [permission_name])
             else:
                 error_message = 'Either role or permission must be set'
                 LOGGER.error(error_message)
                 raise ValueError(error_message)
 
             if expand_resources:
-                expanded_resources = aliased(Resource)
+                cls._ensure_resource_ancestry(session)
+                resource_type_name = ResourceAncestor.descendant
                 qry = (
-                    session.query(expanded_resources, Binding, Member)
+                    session.query(ResourceAncestor.descendant,
+                                  Binding.role_name,
+                                  binding_members.c.members_name)
                     .filter(binding_members.c.bindings_id == Binding.id)
-                    .filter(binding_members.c.members_name == Member.name)
-                    .filter(expanded_resources.full_name.startswith(
-                        Resource.full_name))
-                    .filter((Resource.type_name ==
-                             Binding.resource_type_name))
-                    .filter(Binding.role_name.in_(role_names))
-                    .order_by(expanded_resources.name.asc(),
-                              Binding.role_name.asc())
+                    .filter(ResourceAncestor.ancestor ==
+                            Binding.resource_type_name)
                 )
             else:
+                resource_type_name = Binding.resource_type_name
                 qry = (
-                    session.query(Resource, Binding, Member)
+                    session.query(Binding.resource_type_name,
+                                  Binding.role_name,
+                                  binding_members.c.members_name)
                     .filter(binding_members.c.bindings_id == Binding.id)
-                    .filter(binding_members.c.members_name == Member.name)
-                    .filter((Resource.type_name ==
-                             Binding.resource_type_name))
-                    .filter(Binding.role_name.in_(role_names))
-                    .order_by(Resource.name.asc(), Binding.role_name.asc())
                 )
+            qry = (
+                qry.filter(Binding.role_name.in_(role_names))
+                .distinct()
+                .order_by(resource_type_name.asc(),
+                          Binding.role_name.asc(),
+                          binding_members.c.members_name.asc())
+            )
 
-            if expand_groups:
-                to_expand = set([m.name for _, _, m in
-                                 qry.yield_per(PER_YIELD)])
-                expansion = cls.expand_members_map(session, to_expand,
-                                                   show_group_members=False,
-                                                   member_contain_self=True)
+            def after(resource, role, member=None):
+                """Filter the rows ordered after a position.
 
-            qry = qry.distinct()
+                Args:
+                    resource (str): The resource type name.
+                    role (str): The role name.
+                    member (str): The member name, or None to skip all the
+                        members of the (resource, role) tuple.
+
+                Returns:
+                    object: The filter expression.
+                """
+                clauses = [resource_type_name > resource,
+                           and_(resource_type_name == resource,
+                                Binding.role_name > role)]
+                if member is not None:
+                    clauses.append(and_(
+                        resource_type_name == resource,
+                        Binding.role_name == role,
+                        binding_members.c.members_name > member))
+                return or_(*clauses)
+
+            expansion = {}
+            page_qry = qry
+            if start_after:
+                page_qry = qry.filter(after(*start_after))
 
             cur_resource = None
             cur_role = None
             cur_members = set()
-            for resource, binding, member in qry.yield_per(PER_YIELD):
-                if cur_resource != resource.type_name:
-                    if cur_resource is not None:
-                        yield cur_role, cur_resource, cur_members
-                    cur_resource = resource.type_name
-                    cur_role = binding.role_name
-                    cur_members = set()
+            while True:
+                rows = page_qry.limit(page_size).all()
                 if expand_groups:
-                    for member_name in expansion[member.name]:
-                        cur_members.add(member_name)
-                else:
-                    cur_members.add(member.name)
+                    to_expand = set(member for _, _, member in rows
+                                    if member not in expansion)
+                    if to_expand:
+                        expansion.update(cls.expand_members_map(
+                            session, to_expand, show_group_members=False,
+                            member_contain_self=True))
+
+                for resource, role, member in rows:
+                    if (resource, role) != (cur_resource, cur_role):
+                        if cur_resource is not None:
+                            yield cur_role, cur_resource, cur_members
+                        cur_resource = resource
+                        cur_role = role
+                        cur_members = set()
+                    if expand_groups:
+                        cur_members.update(expansion[member])
+                    else:
+                        cur_members.add(member)
+
+                if len(rows) < page_size:
+                    break
+                page_qry = qry.filter(after(*rows[-1]))
+
             if cur_resource is not None:
                 yield cur_role, cur_resource, cur_members
 
@@ -1089,13 +1924,13 @@ def define_model(model_name, dbengine, model_seed):
                 dict: role_member_mapping, <"role_name", "member_names">
             """
 
-            roles = cls.get_roles_by_permission_names(
-                session, permission_names)
+            roles = cls.get_role_index(session).roles_covering(
+                permission_names)
             resources = cls.find_resource_path(session, resource_type_name)
 
             res = (session.query(Binding, Member)
                    .filter(
-                       Binding.role_name.in_([r.name for r in roles]),
+                       Binding.role_name.in_(roles),
                        Binding.resource_type_name.in_(
                            [r.type_name for r in resources]))
                    .join(binding_members).join(Member))
@@ -1135,15 +1970,24 @@ def define_model(model_name, dbengine, model_seed):
                 error_message = 'No roles or role prefixes specified'
                 LOGGER.error(error_message)
                 raise Exception(error_message)
-            qry = session.query(Role, Permission).join(
-                role_permissions).join(Permission)
+            role_index = cls.get_role_index(session)
+            selected = set(role_index.role_numbers)
             if role_names:
-                qry = qry.filter(Role.name.in_(role_names))
+                selected.intersection_update(role_names)
             if role_prefixes:
-                qry = qry.filter(
-                    or_(*[Role.name.startswith(prefix)
-                          for prefix in role_prefixes]))
-            return qry.all()
+                selected.intersection_update(
+                    name for prefix in role_prefixes
+                    for name in role_index.roles_by_prefix(prefix))
+
+            permissions = {name: role_index.permissions(name)
+                           for name in selected}
+            roles = cls._get_by_name(session, Role, sorted(selected))
+            permission_rows = cls._get_by_name(
+                session, Permission, sorted(set().union(
+                    *permissions.values())))
+            return [(roles[role_name], permission_rows[permission_name])
+                    for role_name in sorted(selected)
+                    for permission_name in sorted(permissions[role_name])]
 
         @classmethod
         def set_iam_policy(cls,
@@ -1169,11 +2013,13 @@ def define_model(model_name, dbengine, model_seed):
 
             Raises:
                 Exception: Etag doesn't match
+                ValueError: The model is frozen
             """
 
             LOGGER.info('Setting IAM policy, resource_type_name = %s, policy'
                         ' = %s, session = %s',
                         resource_type_name, policy, session)
+            cls.check_not_frozen()
             old_policy = cls.get_iam_policy(session, resource_type_name)
             if policy['etag'] != old_policy['etag']:
                 error_message = 'Etags distinct, stored={}, provided={}'.format(
@@ -1277,6 +2123,7 @@ def define_model(model_name, dbengine, model_seed):
                 Resource.type_name == resource_type_name).one()
             resource.increment_update_counter()
             session.commit()
+            cls.increment_update_counter()
 
         @classmethod
         def get_iam_policy(cls, session, resource_type_name, roles=None):
@@ -1324,10 +2171,8 @@ def define_model(model_name, dbengine, model_seed):
                 Exception: member or resource not found
             """
 
-            member_names = [m.name for m in
-                            cls.reverse_expand_members(
-                                session,
-                                [member_name])]
+            member_names = cls.get_membership_index(session).reverse_expand(
+                [member_name] + cls.ALL_USER_MEMBERS)
             resource_type_names = [r.type_name for r in cls.find_resource_path(
                 session,
                 resource_type_name)]
@@ -1349,6 +2194,95 @@ def define_model(model_name, dbengine, model_seed):
                     .join(binding_members).join(Member)
                     .filter(Member.name.in_(member_names)).first() is not None)
 
+        @classmethod
+        def batch_check_iam_policy(cls, session, checks):
+            """Check many accesses according to the resource IAM policies.
+
+            Each distinct member and resource is expanded once, then the
+            bindings granting the checked permissions on all the resources
+            involved are read with a few set based queries.
+
+            Args:
+                session (object): db session
+                checks (list): (resource_type_name, permission_name,
+                    member_name) tuples to check
+
+            Returns:
+                list: whether each access is allowed, in the order of checks
+
+            Raises:
+                Exception: member or resource not found
+            """
+
+            checks = [tuple(check) for check in checks]
+            if not checks:
+                return []
+
+            membership_index = cls.get_membership_index(session)
+            member_groups = {}
+            for _, _, member_name in checks:
+                if member_name in member_groups:
+                    continue
+                member_groups[member_name] = set(
+                    membership_index.reverse_expand(
+                        [member_name] + cls.ALL_USER_MEMBERS))
+                if not member_groups[member_name]:
+                    error_message = 'Member not found: {}'.format(member_name)
+                    LOGGER.error(error_message)
+                    raise Exception(error_message)
+
+            cls._ensure_resource_ancestry(session)
+            resource_names = sorted(set(check[0] for check in checks))
+            resource_paths = collections.defaultdict(set)
+            for i in range(0, len(resource_names), PER_YIELD):
+                qry = (session.query(ResourceAncestor.descendant,
+                                     ResourceAncestor.ancestor)
+                       .filter(ResourceAncestor.descendant.in_(
+                           resource_names[i:i + PER_YIELD])))
+                for descendant, ancestor in qry:
+                    resource_paths[descendant].add(ancestor)
+            for resource_type_name in resource_names:
+                if resource_type_name not in resource_paths:
+                    error_message = 'Resource not found: {}'.format(
+                        resource_type_name)
+                    LOGGER.error(error_message)
+                    raise Exception(error_message)
+
+            permission_roles = collections.defaultdict(set)
+            qry = (session.query(role_permissions.c.permissions_name,
+                                 role_permissions.c.roles_name)
+                   .filter(role_permissions.c.permissions_name.in_(
+                       set(check[1] for check in checks))))
+            for permission_name, role_name in qry:
+                permission_roles[permission_name].add(role_name)
+
+            # Members granted each (resource, role) binding of interest.
+            granted = collections.defaultdict(set)
+            role_names = set().union(*permission_roles.values())
+            if role_names:
+                ancestors = sorted(set().union(*resource_paths.values()))
+                for i in range(0, len(ancestors), PER_YIELD):
+                    qry = (session.query(Binding.resource_type_name,
+                                         Binding.role_name,
+                                         binding_members.c.members_name)
+                           .join(binding_members)
+                           .filter(Binding.role_name.in_(role_names))
+                           .filter(Binding.resource_type_name.in_(
+                               ancestors[i:i + PER_YIELD])))
+                    for resource_type_name, role_name, member_name in qry:
+                        granted[(resource_type_name, role_name)].add(
+                            member_name)
+
+            results = []
+            for resource_type_name, permission_name, member_name in checks:
+                members = member_groups[member_name]
+                roles = permission_roles.get(permission_name, ())
+                results.append(any(
+                    not members.isdisjoint(granted.get((ancestor, role), ()))
+                    for ancestor in resource_paths[resource_type_name]
+                    for role in roles))
+            return results
+
         @classmethod
         def list_roles_by_prefix(cls, session, role_prefix):
             """Provides a list of roles matched via name prefix.
@@ -1361,8 +2295,7 @@ def define_model(model_name, dbengine, model_seed):
                 list: list of role_names that match the query
             """
 
-            return [r.name for r in session.query(Role).filter(
-                Role.name.startswith(role_prefix)).all()]
+            return cls.get_role_index(session).roles_by_prefix(role_prefix)
 
         @classmethod
         def add_role_by_name(cls, session, role_name, permission_names):
@@ -1372,12 +2305,20 @@ def define_model(model_name, dbengine, model_seed):
                 session (object): db session
                 role_name (str): name of the role to add
                 permission_names (list): list of permissions in the role
+
+            Raises:
+                ValueError: The model is frozen
             """
 
             LOGGER.info('Creating a new role, role_name = %s, permission_names'
                         ' = %s, session = %s',
                         role_name, permission_names, session)
+            cls.check_not_frozen()
+            role_index = cls.role_index
+            if role_index is not None and role_index[0] != cls.update_counter:
+                role_index = None
             permission_names = set(permission_names)
+            role_permission_names = list(permission_names)
             existing_permissions = session.query(Permission).filter(
                 Permission.name.in_(permission_names)).all()
             for existing_permission in existing_permissions:
@@ -1393,6 +2334,11 @@ def define_model(model_name, dbengine, model_seed):
             cls.add_role(session, role_name,
                          existing_permissions + new_permissions)
             session.commit()
+            cls.increment_update_counter()
+            if role_index is not None:
+                # Keep the up to date index current instead of reloading it.
+                role_index[1].add_role(role_name, role_permission_names)
+                cls.role_index = (cls.update_counter, role_index[1])
 
         @classmethod
         def add_group_member(cls,
@@ -1408,17 +2354,22 @@ def define_model(model_name, dbengine, model_seed):
                 parent_type_names (list): type_names of the parents
                 denorm (bool): whether to denorm the groupingroup table after
                     addition
+
+            Raises:
+                ValueError: The model is frozen
             """
 
             LOGGER.info('Adding a member, member_type_name = %s,'
                         ' parent_type_names = %s, denorm = %s, session = %s',
                         member_type_name, parent_type_names, denorm, session)
+            cls.check_not_frozen()
 
             cls.add_member(session,
                            member_type_name,
                            parent_type_names,
                            denorm)
             session.commit()
+            cls.increment_update_counter()
 
         @classmethod
         def list_group_members(cls,
@@ -1595,6 +2546,15 @@ def define_model(model_name, dbengine, model_seed):
                                 type=res_type,
                                 parent=parent)
             session.add(resource)
+
+            ancestor = resource
+            depth = 0
+            while ancestor is not None:
+                session.add(ResourceAncestor(ancestor=ancestor.type_name,
+                                             descendant=resource_type_name,
+                                             depth=depth))
+                ancestor = ancestor.parent
+                depth += 1
             return resource
 
         @classmethod
@@ -1700,6 +2660,7 @@ def define_model(model_name, dbengine, model_seed):
                             parents=parents)
             session.add(member)
             session.commit()
+            cls.increment_update_counter()
             if denorm and res_type == 'group' and parents:
                 cls.denorm_group_in_group(session)
             return member
@@ -1717,19 +2678,15 @@ def define_model(model_name, dbengine, model_seed):
                       {res_type_name: Expansion(res_type_name), ... }
             """
 
+            cls._ensure_resource_ancestry(session)
             res_key = aliased(Resource, name='res_key')
             res_values = aliased(Resource, name='res_values')
 
-            expressions = []
-            for res_type_name in res_type_names:
-                expressions.append(and_(
-                    res_key.type_name == res_type_name))
-
             res = (
                 session.query(res_key, res_values)
                 .filter(res_key.type_name.in_(res_type_names))
-                .filter(res_values.full_name.startswith(
-                    res_key.full_name))
+                .filter(ResourceAncestor.ancestor == res_key.type_name)
+                .filter(ResourceAncestor.descendant == res_values.type_name)
                 .yield_per(1024)
             )
 
@@ -1755,36 +2712,12 @@ def define_model(model_name, dbengine, model_seed):
                 object: set if graph not requested, set and graph if requested
             """
             member_names.extend(cls.ALL_USER_MEMBERS)
-            members = session.query(Member).filter(
-                Member.name.in_(member_names)).all()
-            membership_graph = collections.defaultdict(set)
-            member_set = set()
-            new_member_set = set()
-
-            def add_to_sets(members, child):
-                """Adds the members & children to the sets.
-
-                Args:
-                    members (list): list of Members to be added
-                    child (Member): child to be added
-                """
-
-                for member in members:
-                    if request_graph and child:
-                        membership_graph[child.name].add(member.name)
-                    if request_graph and not child:
-                        if member.name not in membership_graph:
-                            membership_graph[member.name] = set()
-                    if member not in member_set:
-                        new_member_set.add(member)
-                        member_set.add(member)
-
-            add_to_sets(members, None)
-            while new_member_set:
-                members_to_walk = new_member_set
-                new_member_set = set()
-                for member in members_to_walk:
-                    add_to_sets(member.parents, member)
+            membership_graph = (
+                collections.defaultdict(set) if request_graph else None)
+            member_set = set(cls._get_members(
+                session,
+                cls.get_membership_index(session).reverse_expand(
+                    member_names, membership_graph)))
 
             if request_graph:
                 return member_set, membership_graph
@@ -1902,47 +2835,9 @@ def define_model(model_name, dbengine, model_seed):
                 set: expanded group members
             """
 
-            members = session.query(Member).filter(
-                Member.name.in_(member_names)).all()
-
-            def is_group(member):
-                """Returns true iff the member is a group.
-
-                Args:
-                    member (Member): member to check
-
-                Returns:
-                    bool: whether the member is a group
-                """
-                return member.type in cls.GROUP_TYPES
-
-            group_set = set()
-            non_group_set = set()
-            new_group_set = set()
-
-            def add_to_sets(members):
-                """Adds new members to the sets.
-
-                Args:
-                    members (list): members to be added
-                """
-                for member in members:
-                    if is_group(member):
-                        if member not in group_set:
-                            new_group_set.add(member)
-                        group_set.add(member)
-                    else:
-                        non_group_set.add(member)
-
-            add_to_sets(members)
-
-            while new_group_set:
-                groups_to_walk = new_group_set
-                new_group_set = set()
-                for group in groups_to_walk:
-                    add_to_sets(group.children)
-
-            return group_set.union(non_group_set)
+            return set(cls._get_members(
+                session,
+                cls.get_membership_index(session).expand(member_names)))
 
         @classmethod
         def resource_ancestors(cls, session, resource_type_names):
@@ -1960,34 +2855,20 @@ def define_model(model_name, dbengine, model_seed):
                 dict: <parent, childs> graph of the resource hierarchy
             """
 
-            resource_names = resource_type_names
+            cls._ensure_resource_ancestry(session)
             resource_graph = collections.defaultdict(set)
-
-            res_childs = aliased(Resource, name='res_childs')
-            res_anc = aliased(Resource, name='resource_parent')
-
-            resources_set = set(resource_names)
-            resources_new = set(resource_names)
-
-            for resource in resources_new:
+            for resource in resource_type_names:
                 resource_graph[resource] = set()
 
-            while resources_new:
-                resources_new = set()
-                for parent, child in (
-                        session.query(res_anc, res_childs)
-                        .filter(res_childs.type_name.in_(resources_set))
-                        .filter(res_childs.parent_type_name ==
-                                res_anc.type_name)
-                        .all()):
-
-                    if parent.type_name not in resources_set:
-                        resources_new.add(parent.type_name)
-
-                    resources_set.add(parent.type_name)
-                    resources_set.add(child.type_name)
-
-                    resource_graph[parent.type_name].add(child.type_name)
+            res_parent = aliased(Resource, name='resource_parent')
+            for child, parent in (
+                    session.query(Resource.type_name, res_parent.type_name)
+                    .filter(ResourceAncestor.descendant.in_(
+                        resource_type_names))
+                    .filter(Resource.type_name == ResourceAncestor.ancestor)
+                    .filter(Resource.parent_type_name == res_parent.type_name)
+                    .distinct()):
+                resource_graph[parent].add(child)
 
             return resource_graph
 
@@ -2006,39 +2887,15 @@ def define_model(model_name, dbengine, model_seed):
                     resource
             """
 
+            cls._ensure_resource_ancestry(session)
             qry = (
-                session.query(Resource).filter(
-                    Resource.type_name == resource_type_name)
+                session.query(Resource)
+                .filter(ResourceAncestor.descendant == resource_type_name)
+                .filter(Resource.type_name == ResourceAncestor.ancestor)
+                .order_by(ResourceAncestor.depth)
             )
 
-            resources = qry.all()
-            return cls._find_resource_path(session, resources)
-
-        @classmethod
-        def _find_resource_path(cls, _, resources):
-            """Find the list of transitive ancestors for the given resource.
-
-            Args:
-                _ (object): position holder
-                resources (list): list of the resources to query
-
-            Returns:
-                list: list of Resources, transitive ancestors for the given
-                    resource
-            """
-
-            if not resources:
-                return []
-
-            path = []
-            resource = resources[0]
-
-            path.append(resource)
-            while resource.parent:
-                resource = resource.parent
-                path.append(resource)
-
-            return path
+            return qry.all()
 
         @classmethod
         def get_roles_by_permission_names(cls, session, permission_names):
@@ -2052,25 +2909,9 @@ def define_model(model_name, dbengine, model_seed):
                 set: roles set that cover the permissions
             """
 
-            permission_set = set(permission_names)
-            qry = session.query(Permission)
-            if permission_set:
-                qry = qry.filter(Permission.name.in_(permission_set))
-            permissions = qry.all()
-
-            roles = set()
-            for permission in permissions:
-                for role in permission.roles:
-                    roles.add(role)
-
-            result_set = set()
-            for role in roles:
-                role_permissions = set(
-                    [p.name for p in role.permissions])
-                if permission_set.issubset(role_permissions):
-                    result_set.add(role)
-
-            return result_set
+            role_names = cls.get_role_index(session).roles_covering(
+                permission_names)
+            return set(cls._get_by_name(session, Role, role_names).values())
 
         @classmethod
         def get_member(cls, session, name):
@@ -2217,6 +3058,9 @@ class ModelManager(object):
                 )
                 self.sessionmakers[model.handle] = define_model(
                     model.handle, self.engine, model.etag_seed)
+                # Changes to a frozen model are refused after a restart too.
+                self.sessionmakers[model.handle][1].frozen = (
+                    'snapshot' in json.loads(model.description or '{}'))
                 return self.sessionmakers[model.handle]
 
     @mutual_exclusive(LOCK)
@@ -2350,10 +3194,11 @@ class ModelManager(object):
             with self.modelmaker() as scoped_session:
                 model = scoped_session.query(Model).filter(
                     Model.handle == model_name).one()
+                model.add_description(new_description)
         else:
             model = session.query(Model).filter(
                 Model.handle == model_name).one()
-        model.add_description(new_description)
+            model.add_description(new_description)
 
     def get_description(self, model_name, session=None):
         """Get the description to a model.
@@ -0,0 +1,494 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""In memory access graph of a model, answering Explain queries."""
+
+from builtins import object
+import collections
+import time
+
+from google.cloud.forseti.common.util import logger
+
+LOGGER = logger.get_logger(__name__)
+
+PER_YIELD = 4096
+
+
+class AccessGraph(object):
+    """Resources, members, roles and bindings of a model, held in memory.
+
+    Resources and members are numbered. Resources are held as an array of
+    parent numbers, members with adjacency lists of their groups and their
+    children, roles as bitsets over the permission numbers, and bindings as
+    (role, member numbers) lists indexed by resource number.
+
+    The query methods return the same results as the ModelAccess methods of
+    the same name, without touching the database. The model must not change
+    once the graph is built.
+    """
+
+    def __init__(self, session, data_access):
+        """Load the graph of a model.
+
+        Args:
+            session (object): Database session of the model.
+            data_access (object): The ModelAccess of the model.
+        """
+        start = time.time()
+        self.group_types = data_access.GROUP_TYPES
+        self.all_user_members = data_access.ALL_USER_MEMBERS
+
+        self.resource_names = []
+        self.resource_numbers = {}
+        self.resource_parents = []
+        self._resource_children = None
+        self._load_resources(session, data_access)
+
+        self.member_names = []
+        self.member_numbers = {}
+        self.member_types = []
+        self.member_parents = []
+        self.member_children = []
+        self._load_members(session, data_access)
+
+        self.permission_bits = {}
+        self.role_permissions = {}
+        self._load_roles(session, data_access)
+
+        self.resource_bindings = collections.defaultdict(list)
+        self._load_bindings(session, data_access)
+
+        LOGGER.info('Built access graph with %i resources, %i members, '
+                    '%i roles in %.2f seconds.', len(self.resource_names),
+                    len(self.member_names), len(self.role_permissions),
+                    time.time() - start)
+
+    def _load_resources(self, session, data_access):
+        """Load the resource hierarchy.
+
+        Args:
+            session (object): Database session of the model.
+            data_access (object): The ModelAccess of the model.
+        """
+        resource = data_access.TBL_RESOURCE
+        parent_names = []
+        for type_name, parent_type_name in (
+                session.query(resource.type_name, resource.parent_type_name)
+                .yield_per(PER_YIELD)):
+            self.resource_numbers[type_name] = len(self.resource_names)
+            self.resource_names.append(type_name)
+            parent_names.append(parent_type_name)
+        self.resource_parents = [self.resource_numbers.get(name, -1)
+                                 for name in parent_names]
+
+    def _load_members(self, session, data_access):
+        """Load the members and group memberships.
+
+        Args:
+            session (object): Database session of the model.
+            data_access (object): The ModelAccess of the model.
+        """
+        member = data_access.TBL_MEMBER
+        for name, member_type in (
+                session.query(member.name, member.type).yield_per(PER_YIELD)):
+            self.member_numbers[name] = len(self.member_names)
+            self.member_names.append(name)
+            self.member_types.append(member_type)
+            self.member_parents.append([])
+            self.member_children.append([])
+
+        membership = data_access.TBL_MEMBERSHIP
+        for group_name, member_name in (
+                session.query(membership.c.group_name,
+                              membership.c.members_name)
+                .yield_per(PER_YIELD)):
+            group = self.member_numbers.get(group_name)
+            child = self.member_numbers.get(member_name)
+            if group is not None and child is not None:
+                self.member_parents[child].append(group)
+                self.member_children[group].append(child)
+
+    def _load_roles(self, session, data_access):
+        """Load the roles as bitsets of their permissions.
+
+        Args:
+            session (object): Database session of the model.
+            data_access (object): The ModelAccess of the model.
+        """
+        for role_name, in session.query(data_access.TBL_ROLE.name):
+            self.role_permissions[role_name] = 0
+
+        permission = data_access.TBL_PERMISSION
+        role = data_access.TBL_ROLE
+        for role_name, permission_name in (
+                session.query(role.name, permission.name)
+                .join(role.permissions).yield_per(PER_YIELD)):
+            bit = self.permission_bits.setdefault(
+                permission_name, 1 << len(self.permission_bits))
+            self.role_permissions[role_name] |= bit
+
+    def _load_bindings(self, session, data_access):
+        """Load the bindings, indexed by resource.
+
+        Args:
+            session (object): Database session of the model.
+            data_access (object): The ModelAccess of the model.
+        """
+        binding = data_access.TBL_BINDING
+        member = data_access.TBL_MEMBER
+        bindings = collections.OrderedDict()
+        for binding_id, resource_name, role_name, member_name in (
+                session.query(binding.id, binding.resource_type_name,
+                              binding.role_name, member.name)
+                .join(binding.members).order_by(binding.id)
+                .yield_per(PER_YIELD)):
+            if binding_id not in bindings:
+                bindings[binding_id] = (resource_name, role_name, [])
+            bindings[binding_id][2].append(self.member_numbers[member_name])
+
+        for resource_name, role_name, members in bindings.values():
+            resource = self.resource_numbers.get(resource_name)
+            if resource is not None:
+                self.resource_bindings[resource].append(
+                    (role_name, frozenset(members)))
+
+    def _children(self, resource):
+        """The child resources of a resource.
+
+        Args:
+            resource (int): The resource number.
+
+        Returns:
+            list: The numbers of the children.
+        """
+        if self._resource_children is None:
+            children = [[] for _ in range(len(self.resource_names))]
+            for child, parent in enumerate(self.resource_parents):
+                if parent >= 0:
+                    children[parent].append(child)
+            self._resource_children = children
+        return self._resource_children[resource]
+
+    def _resource_path(self, resource_type_name):
+        """The numbers of a resource and its ancestors.
+
+        Args:
+            resource_type_name (str): The resource type name.
+
+        Returns:
+            list: The resource numbers, starting with the resource.
+        """
+        resource = self.resource_numbers.get(resource_type_name, -1)
+        path = []
+        while resource >= 0:
+            path.append(resource)
+            resource = self.resource_parents[resource]
+        return path
+
+    def _reverse_expand(self, member_names, graph=None):
+        """Expand members to the groups containing them.
+
+        Args:
+            member_names (list): Names of the members to expand.
+            graph (dict): If set, filled with the groups of each member.
+
+        Returns:
+            set: The numbers of the members and all their groups.
+        """
+        start = [self.member_numbers[name]
+                 for name in list(member_names) + self.all_user_members
+                 if name in self.member_numbers]
+        found = set(start)
+        if graph is not None:
+            for member in start:
+                graph.setdefault(self.member_names[member], set())
+        stack = list(found)
+        while stack:
+            member = stack.pop()
+            for group in self.member_parents[member]:
+                if graph is not None:
+                    graph.setdefault(self.member_names[member], set()).add(
+                        self.member_names[group])
+                if group not in found:
+                    found.add(group)
+                    stack.append(group)
+        return found
+
+    def _roles_with_permissions(self, permission_names):
+        """Roles covering all the permissions.
+
+        Args:
+            permission_names (list): Names of the permissions.
+
+        Returns:
+            set: Names of the roles with all permissions, or of all roles
+                with any permission if no permissions are given.
+        """
+        mask = 0
+        for name in permission_names:
+            if name not in self.permission_bits:
+                return set()
+            mask |= self.permission_bits[name]
+        if not mask:
+            return set(role for role, bits in self.role_permissions.items()
+                       if bits)
+        return set(role for role, bits in self.role_permissions.items()
+                   if bits & mask == mask)
+
+    def reverse_expand_members(self, member_names, request_graph=False):
+        """Expand members to their groups.
+
+        Args:
+            member_names (list): Names of the members to expand.
+            request_graph (bool): Whether to return the membership graph.
+
+        Returns:
+            object: set of member names, and the graph if requested.
+        """
+        graph = collections.defaultdict(set) if request_graph else None
+        names = set(self.member_names[member]
+                    for member in self._reverse_expand(member_names, graph))
+        if request_graph:
+            return names, graph
+        return names
+
+    def expand_members(self, member_names):
+        """Expand groups to their transitive members.
+
+        Args:
+            member_names (iterable): Names of the members to expand.
+
+        Returns:
+            set: Names of the members, and of all members of the groups.
+        """
+        found = set(self.member_numbers[name] for name in member_names
+                    if name in self.member_numbers)
+        stack = [member for member in found
+                 if self.member_types[member] in self.group_types]
+        while stack:
+            group = stack.pop()
+            for child in self.member_children[group]:
+                if child not in found:
+                    found.add(child)
+                    if self.member_types[child] in self.group_types:
+                        stack.append(child)
+        return set(self.member_names[member] for member in found)
+
+    def find_resource_path(self, resource_type_name):
+        """Find a resource and its ancestors.
+
+        Args:
+            resource_type_name (str): The resource type name.
+
+        Returns:
+            list: Type names of the resource and its ancestors.
+        """
+        return [self.resource_names[resource]
+                for resource in self._resource_path(resource_type_name)]
+
+    def check_iam_policy(self, resource_type_name, permission_name,
+                         member_name):
+        """Check access according to the resource IAM policy.
+
+        Args:
+            resource_type_name (str): type_name of the resource to check
+            permission_name (str): name of the permission to check
+            member_name (str): name of the member to check
+
+        Returns:
+            bool: whether such access is allowed
+
+        Raises:
+            Exception: member or resource not found
+        """
+        members = self._reverse_expand([member_name])
+        path = self._resource_path(resource_type_name)
+        if not members:
+            error_message = 'Member not found: {}'.format(member_name)
+            LOGGER.error(error_message)
+            raise Exception(error_message)
+        if not path:
+            error_message = 'Resource not found: {}'.format(
+                resource_type_name)
+            LOGGER.error(error_message)
+            raise Exception(error_message)
+
+        bit = self.permission_bits.get(permission_name, 0)
+        for resource in path:
+            for role, role_members in self.resource_bindings[resource]:
+                if (self.role_permissions.get(role, 0) & bit and
+                        not role_members.isdisjoint(members)):
+                    return True
+        return False
+
+    def batch_check_iam_policy(self, checks):
+        """Check many accesses according to the resource IAM policies.
+
+        Args:
+            checks (list): (resource_type_name, permission_name, member_name)
+                tuples to check
+
+        Returns:
+            list: whether each access is allowed, in the order of checks
+
+        Raises:
+            Exception: member or resource not found
+        """
+        member_groups = {}
+        resource_paths = {}
+        results = []
+        for resource_type_name, permission_name, member_name in checks:
+            if member_name not in member_groups:
+                member_groups[member_name] = self._reverse_expand(
+                    [member_name])
+            if resource_type_name not in resource_paths:
+                resource_paths[resource_type_name] = self._resource_path(
+                    resource_type_name)
+            members = member_groups[member_name]
+            path = resource_paths[resource_type_name]
+            if not members:
+                error_message = 'Member not found: {}'.format(member_name)
+                LOGGER.error(error_message)
+                raise Exception(error_message)
+            if not path:
+                error_message = 'Resource not found: {}'.format(
+                    resource_type_name)
+                LOGGER.error(error_message)
+                raise Exception(error_message)
+
+            bit = self.permission_bits.get(permission_name, 0)
+            results.append(any(
+                self.role_permissions.get(role, 0) & bit and
+                not role_members.isdisjoint(members)
+                for resource in path
+                for role, role_members in self.resource_bindings[resource]))
+        return results
+
+    def explain_granted(self, member_name, resource_type_name, role,
+                        permission):
+        """Provide info about how the member has access to the resource.
+
+        Args:
+            member_name (str): name of the member
+            resource_type_name (str): type_name of the resource
+            role (str): role to query
+            permission (str): permission to query
+
+        Returns:
+            tuples: (bindings, member_graph, resource_type_names)
+
+        Raises:
+            Exception: not granted
+        """
+        member_graph = collections.defaultdict(set)
+        members = self._reverse_expand([member_name], member_graph)
+        path = self._resource_path(resource_type_name)
+        if role:
+            roles = set([role])
+        else:
+            roles = self._roles_with_permissions([permission])
+
+        bindings = []
+        for resource in path:
+            for binding_role, role_members in self.resource_bindings[resource]:
+                if binding_role in roles:
+                    bindings.extend(
+                        (self.resource_names[resource], binding_role,
+                         self.member_names[member])
+                        for member in sorted(role_members & members))
+        if not bindings:
+            error_message = 'Grant not found: ({},{},{})'.format(
+                member_name,
+                resource_type_name,
+                role if role is not None else permission)
+            LOGGER.error(error_message)
+            raise Exception(error_message)
+        return (bindings, member_graph,
+                [self.resource_names[resource] for resource in path])
+
+    def query_access_by_member(self, member_name, permission_names,
+                               expand_resources=False,
+                               reverse_expand_members=True):
+        """Return the set of resources the member has access to.
+
+        Args:
+            member_name (str): name of the member
+            permission_names (list): list of names of permissions to query
+            expand_resources (bool): whether to expand resources
+            reverse_expand_members (bool): whether to expand members
+
+        Returns:
+            list: list of access tuples, ("role_name", "resource_type_name")
+        """
+        if reverse_expand_members:
+            members = self._reverse_expand([member_name])
+        else:
+            members = set([self.member_numbers.get(member_name)])
+        roles = self._roles_with_permissions(permission_names)
+
+        result = []
+        for resource, bindings in self.resource_bindings.items():
+            for role, role_members in bindings:
+                if role not in roles:
+                    continue
+                if role_members.isdisjoint(members):
+                    continue
+                if expand_resources:
+                    result.append((role, self._expand_resource(resource)))
+                else:
+                    result.append((role, [self.resource_names[resource]]))
+        return result
+
+    def _expand_resource(self, resource):
+        """A resource and all its descendants.
+
+        Args:
+            resource (int): The resource number.
+
+        Returns:
+            list: Type names of the resource and its descendants.
+        """
+        names = []
+        stack = [resource]
+        while stack:
+            resource = stack.pop()
+            names.append(self.resource_names[resource])
+            stack.extend(self._children(resource))
+        return names
+
+    def query_access_by_resource(self, resource_type_name, permission_names,
+                                 expand_groups=False):
+        """Return members who have access to the given resource.
+
+        Args:
+            resource_type_name (str): type_name of the resource to query
+            permission_names (list): list of strs, names of the permissions
+                to query
+            expand_groups (bool): whether to expand groups
+
+        Returns:
+            dict: role_member_mapping, <"role_name", "member_names">
+        """
+        roles = self._roles_with_permissions(permission_names)
+        role_member_mapping = collections.defaultdict(set)
+        for resource in self._resource_path(resource_type_name):
+            for role, role_members in self.resource_bindings[resource]:
+                if role in roles:
+                    role_member_mapping[role].update(
+                        self.member_names[member] for member in role_members)
+
+        if expand_groups:
+            for role in role_member_mapping:
+                role_member_mapping[role] = list(
+                    self.expand_members(role_member_mapping[role]))
+        return role_member_mapping
@@ -15,11 +15,53 @@
 """ Explain API. """
 
 from builtins import object
+import base64
+import json
+import os
+import threading
+
 from google.cloud.forseti.common.util import logger
+from google.cloud.forseti.services.explain.access_graph import AccessGraph
+from google.cloud.forseti.services.explain.result_cache import normalize_args
+from google.cloud.forseti.services.explain.snapshot import SnapshotAccessGraph
 
 LOGGER = logger.get_logger(__name__)
 
 
+def encode_page_token(resource, role):
+    """Encode the position after an access tuple as a page token.
+
+    Args:
+        resource (str): The resource type name of the access tuple.
+        role (str): The role name of the access tuple.
+
+    Returns:
+        str: The page token.
+    """
+    return base64.urlsafe_b64encode(
+        json.dumps([resource, role]).encode()).decode()
+
+
+def decode_page_token(page_token):
+    """Decode a page token.
+
+    Args:
+        page_token (str): The page token.
+
+    Returns:
+        tuple: The (resource, role) of the last access tuple returned.
+
+    Raises:
+        ValueError: If the token is invalid.
+    """
+    try:
+        resource, role = json.loads(
+            base64.urlsafe_b64decode(page_token.encode()).decode())
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError('Invalid page token: {}'.format(e))
+    return resource, role
+
+
 class Explainer(object):
     """Implements the Explain API."""
 
@@ -30,6 +72,84 @@ class Explainer(object):
             config (object): ServiceConfig in server
         """
         self.config = config
+        self.cache = config.explain_cache
+        self.access_graphs = {}
+        self.access_graph_lock = threading.Lock()
+
+    def _cached(self, model_name, method, args, query):
+        """Run a query, or return its cached result.
+
+        Args:
+            model_name (str): Model to operate on.
+            method (str): Name of the query method.
+            args (tuple): Arguments of the query.
+            query (func): Function of (session, data_access) running the
+                query, the result must not be modified by the caller.
+
+        Returns:
+            object: The query result.
+        """
+        model_manager = self.config.model_manager
+        scoped_session, data_access = model_manager.get(model_name)
+        update_counter = data_access.update_counter
+        args = normalize_args(*args)
+        found, result = self.cache.get(model_name, update_counter, method,
+                                       args)
+        if found:
+            return result
+        with scoped_session as session:
+            result = query(session, data_access)
+        self.cache.put(model_name, update_counter, method, args, result)
+        return result
+
+    def _access_graph(self, model_name):
+        """Get the in memory access graph of a model, if enabled.
+
+        The graph of a frozen model is opened from its snapshot file. For
+        other models it is built on first use if enabled, and rebuilt when
+        the model is updated. It is kept until the model is deleted.
+
+        Args:
+            model_name (str): Model to operate on.
+
+        Returns:
+            AccessGraph: The access graph, or None if the model is not frozen
+                and the graph is disabled, or the model is not completely
+                imported.
+        """
+        global_configs = self.config.get_global_config() or {}
+        graph_enabled = global_configs.get('explain_access_graph', False)
+
+        with self.access_graph_lock:
+            model_manager = self.config.model_manager
+            scoped_session, data_access = model_manager.get(model_name)
+            update_counter, enabled, graph = self.access_graphs.get(
+                model_name, (None, None, None))
+            if (update_counter == data_access.update_counter and
+                    enabled == graph_enabled):
+                return graph
+
+            models = {m.handle: m for m in model_manager.models()}
+            for handle in list(self.access_graphs):
+                if handle not in models:
+                    del self.access_graphs[handle]
+            model = models.get(model_name)
+            if model is None or model.state not in ['SUCCESS',
+                                                    'PARTIAL_SUCCESS']:
+                return None
+
+            update_counter = data_access.update_counter
+            snapshot = json.loads(model.description or '{}').get('snapshot')
+            if snapshot and os.path.exists(snapshot):
+                graph = SnapshotAccessGraph(snapshot)
+            elif graph_enabled:
+                with scoped_session as session:
+                    graph = AccessGraph(session, data_access)
+            else:
+                graph = None
+            self.access_graphs[model_name] = (update_counter, graph_enabled,
+                                              graph)
+            return graph
 
     def list_resources(self, model_name, full_resource_name_prefix):
         """Lists resources by resource name prefix.
@@ -121,13 +241,39 @@ class Explainer(object):
         LOGGER.debug('Checking IAM policy, model_name = %s, resource = %s,'
                      ' permission = %s, identity = %s',
                      model_name, resource, permission, identity)
+        access_graph = self._access_graph(model_name)
+        if access_graph is not None:
+            return access_graph.check_iam_policy(resource, permission,
+                                                 identity)
         model_manager = self.config.model_manager
         scoped_session, data_access = model_manager.get(model_name)
         with scoped_session as session:
             return data_access.check_iam_policy(
                 session, resource, permission, identity)
 
-    def explain_denied(self, model_name, member, resources, permissions, roles):
+    def batch_check_iam_policy(self, model_name, checks):
+        """Checks many accesses according to IAM policy in one call.
+
+        Args:
+            model_name (str): Model to operate on.
+            checks (list): (resource, permission, identity) tuples to check.
+
+        Returns:
+            list: whether each access is allowed, in the order of checks
+        """
+
+        LOGGER.debug('Checking IAM policy in batch, model_name = %s,'
+                     ' checks = %s', model_name, len(checks))
+        access_graph = self._access_graph(model_name)
+        if access_graph is not None:
+            return access_graph.batch_check_iam_policy(checks)
+        model_manager = self.config.model_manager
+        scoped_session, data_access = model_manager.get(model_name)
+        with scoped_session as session:
+            return data_access.batch_check_iam_policy(session, checks)
+
+    def explain_denied(self, model_name, member, resources, permissions, roles,
+                       prune_roles=False, top_k=0):
         """Provides information on granting a member access to a resource.
 
         Args:
@@ -136,16 +282,21 @@ class Explainer(object):
             resources (list): Resources to query
             permissions (list): Permissions to query
             roles (list): Roles to query
+            prune_roles (bool): Whether to drop the covering roles granting
+                more permissions than another covering role
+            top_k (int): Maximum number of strategies, all if 0
 
         Returns:
             list: list of tuples,
-            (overgranting,[(role_name,member_name,resource_name)])
+            (overgranting,[(role_name,member_name,resource_name)]), best
+            first
         """
 
         LOGGER.debug('Explaining how to grant access to a member,'
                      ' model_name = %s, member = %s, resources = %s,'
-                     ' permissions = %s, roles = %s',
-                     model_name, member, resources, permissions, roles)
+                     ' permissions = %s, roles = %s, prune_roles = %s,'
+                     ' top_k = %s', model_name, member, resources,
+                     permissions, roles, prune_roles, top_k)
         model_manager = self.config.model_manager
         scoped_session, data_access = model_manager.get(model_name)
         with scoped_session as session:
@@ -153,7 +304,9 @@ class Explainer(object):
                                                 member,
                                                 resources,
                                                 permissions,
-                                                roles)
+                                                roles,
+                                                prune_roles,
+                                                top_k)
             return result
 
     def explain_granted(self, model_name, member, resource, role, permission):
@@ -177,6 +330,10 @@ class Explainer(object):
                      ' model_name = %s, member = %s, resource = %s,'
                      ' permission = %s, role = %s',
                      model_name, member, resource, permission, role)
+        access_graph = self._access_graph(model_name)
+        if access_graph is not None:
+            return access_graph.explain_granted(member, resource, role,
+                                                permission)
         model_manager = self.config.model_manager
         scoped_session, data_access = model_manager.get(model_name)
         with scoped_session as session:
@@ -206,17 +363,26 @@ class Explainer(object):
                      ' permission_names = %s, expand_groups = %s',
                      model_name, resource_name,
                      permission_names, expand_groups)
-        model_manager = self.config.model_manager
-        scoped_session, data_access = model_manager.get(model_name)
-        with scoped_session as session:
-            mapping = data_access.query_access_by_resource(session,
-                                                           resource_name,
-                                                           permission_names,
-                                                           expand_groups)
-            return mapping
+        access_graph = self._access_graph(model_name)
+        if access_graph is not None:
+            return access_graph.query_access_by_resource(resource_name,
+                                                         permission_names,
+                                                         expand_groups)
+
+        def query(session, data_access):
+            """Query the database."""
+            return data_access.query_access_by_resource(session,
+                                                        resource_name,
+                                                        permission_names,
+                                                        expand_groups)
+
+        return self._cached(model_name, 'get_access_by_resources',
+                            (resource_name, permission_names, expand_groups),
+                            query)
 
     def get_access_by_permissions(self, model_name, role_name, permission_name,
-                                  expand_groups, expand_resources):
+                                  expand_groups, expand_resources,
+                                  page_token='', page_size=0):
         """Returns access tuples satisfying the permission or role.
 
         Args:
@@ -225,26 +391,40 @@ class Explainer(object):
             permission_name (str): Permission name to query for.
             expand_groups (bool): Whether to expand groups in policies.
             expand_resources (bool): Whether to expand resources.
+            page_token (str): If set, continue after the access tuple this
+                token was returned with.
+            page_size (int): Maximum number of access tuples, 0 for all.
 
         Yields:
-            tuple: Generator for (role, resource, members).
+            tuple: Generator for (role, resource, members, page_token), the
+                page token resumes the query after the access tuple.
         """
 
         LOGGER.debug('Retrieving access tuples that satisfy the role or'
                      ' permission: model_name = %s, role_name = %s,'
                      ' permission_name = %s, expand_groups = %s,'
-                     ' expand_resources = %s', model_name, role_name,
-                     permission_name, expand_groups, expand_resources)
+                     ' expand_resources = %s, page_token = %s,'
+                     ' page_size = %s', model_name, role_name,
+                     permission_name, expand_groups, expand_resources,
+                     page_token, page_size)
+        start_after = decode_page_token(page_token) if page_token else None
         model_manager = self.config.model_manager
         scoped_session, data_access = model_manager.get(model_name)
         with scoped_session as session:
+            count = 0
             for role, resource, members in (
-                    data_access.query_access_by_permission(session,
-                                                           role_name,
-                                                           permission_name,
-                                                           expand_groups,
-                                                           expand_resources)):
-                yield role, resource, members
+                    data_access.query_access_by_permission(
+                        session,
+                        role_name,
+                        permission_name,
+                        expand_groups,
+                        expand_resources,
+                        start_after=start_after)):
+                yield (role, resource, members,
+                       encode_page_token(resource, role))
+                count += 1
+                if count == page_size:
+                    break
 
     def get_access_by_members(self, model_name, member_name, permission_names,
                               expand_resources):
@@ -265,12 +445,22 @@ class Explainer(object):
                      ' permission_names = %s, expand_resources = %s',
                      model_name, member_name,
                      permission_names, expand_resources)
-        model_manager = self.config.model_manager
-        scoped_session, data_access = model_manager.get(model_name)
-        with scoped_session as session:
-            for role, resources in data_access.query_access_by_member(
-                    session, member_name, permission_names, expand_resources):
+        access_graph = self._access_graph(model_name)
+        if access_graph is not None:
+            for role, resources in access_graph.query_access_by_member(
+                    member_name, permission_names, expand_resources):
                 yield role, resources
+            return
+
+        def query(session, data_access):
+            """Query the database."""
+            return data_access.query_access_by_member(
+                session, member_name, permission_names, expand_resources)
+
+        for role, resources in self._cached(
+                model_name, 'get_access_by_members',
+                (member_name, permission_names, expand_resources), query):
+            yield role, resources
 
     def get_permissions_by_roles(self, model_name, role_names, role_prefixes):
         """Returns the permissions associated with the specified roles.
@@ -288,9 +478,12 @@ class Explainer(object):
                      ' specified roles, model_name = %s, role_names = %s,'
                      ' role_prefixes = %s',
                      model_name, role_names, role_prefixes)
-        model_manager = self.config.model_manager
-        scoped_session, data_access = model_manager.get(model_name)
-        with scoped_session as session:
-            for result in data_access.query_permissions_by_roles(
-                    session, role_names, role_prefixes):
-                yield result
+
+        def query(session, data_access):
+            """Query the database."""
+            return data_access.query_permissions_by_roles(
+                session, role_names, role_prefixes)
+
+        for result in self._cached(model_name, 'get_permissions_by_roles',
+                                   (role_names, role_prefixes), query):
+            yield result
@@ -0,0 +1,124 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cache of Explain query results."""
+
+from builtins import object
+from collections import OrderedDict
+import threading
+
+# Default maximum number of cached query results.
+EXPLAIN_CACHE_SIZE = 1024
+
+
+def normalize_args(*args):
+    """Turn query arguments into a hashable cache key.
+
+    Lists of names, including repeated request fields, are order
+    independent, so they are sorted.
+
+    Args:
+        *args: The query arguments.
+
+    Returns:
+        tuple: The normalized arguments.
+    """
+    return tuple(arg if isinstance(arg, (str, bytes)) or
+                 not hasattr(arg, '__len__') else tuple(sorted(arg))
+                 for arg in args)
+
+
+class ResultCache(object):
+    """Thread safe LRU cache of Explain query results.
+
+    Results are keyed by (model handle, method, arguments) and tagged with
+    the update counter of the model when they were computed, a result
+    computed before the model was last updated is never returned.
+    """
+
+    def __init__(self, maxsize=EXPLAIN_CACHE_SIZE):
+        """Initialize.
+
+        Args:
+            maxsize (int): The maximum number of cached results, 0 disables
+                the cache.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, handle, update_counter, method, args):
+        """Get a cached result and mark it as recently used.
+
+        Args:
+            handle (str): The model handle.
+            update_counter (int): The current update counter of the model.
+            method (str): The query method.
+            args (tuple): The normalized query arguments.
+
+        Returns:
+            tuple: (True, result) if cached, (False, None) otherwise.
+        """
+        key = (handle, method, args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != update_counter:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, handle, update_counter, method, args, result):
+        """Cache a result, evicting the least recently used if full.
+
+        Args:
+            handle (str): The model handle.
+            update_counter (int): The update counter of the model the result
+                was computed with.
+            method (str): The query method.
+            args (tuple): The normalized query arguments.
+            result (object): The query result.
+        """
+        key = (handle, method, args)
+        with self._lock:
+            self._entries[key] = (update_counter, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, handle):
+        """Remove all cached results of a model.
+
+        Args:
+            handle (str): The model handle.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == handle]:
+                del self._entries[key]
+
+    def statistics(self):
+        """Get the cache counters.
+
+        Returns:
+            dict: The hits, misses, number of entries and maximum size.
+        """
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'size': len(self._entries),
+                    'maxsize': self.maxsize}
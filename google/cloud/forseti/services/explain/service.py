@@ -232,6 +232,28 @@ class GrpcExplainer(explain_pb2_grpc.ExplainServicer):
         reply.result = authorized
         return reply
 
+    def BatchCheckIamPolicy(self, request, context):
+        """Checks many accesses according to policy in one call.
+
+        Args:
+            request (object): gRPC request.
+            context (object): gRPC context.
+
+        Returns:
+            object: proto message of whether each access is granted
+        """
+        reply = explain_pb2.BatchCheckIamPolicyReply()
+
+        if not self.is_supported:
+            return self._set_not_supported_status(context, reply)
+
+        handle = self._get_handle(context)
+        checks = [(check.resource, check.permission, check.identity)
+                  for check in request.checks]
+        reply.results.extend(
+            self.explainer.batch_check_iam_policy(handle, checks))
+        return reply
+
     @autoclose_stream
     def ExplainDenied(self, request, context):
         """Provides information on how to grant access.
@@ -253,7 +275,9 @@ class GrpcExplainer(explain_pb2_grpc.ExplainServicer):
                                                            request.member,
                                                            request.resources,
                                                            request.permissions,
-                                                           request.roles)
+                                                           request.roles,
+                                                           request.prune_roles,
+                                                           request.top_k)
         for overgranting, bindings in binding_strategies:
             strategy = explain_pb2.BindingStrategy(overgranting=overgranting)
             strategy.bindings.extend([explain_pb2.Binding(
@@ -312,17 +336,30 @@ class GrpcExplainer(explain_pb2_grpc.ExplainServicer):
         if not self.is_supported:
             yield self._set_not_supported_status(context, reply)
 
+        if request.page_token:
+            # Checked before streaming, errors raised while streaming only
+            # reach the client as UNKNOWN.
+            try:
+                explainer.decode_page_token(request.page_token)
+            except ValueError as e:
+                context.set_code(StatusCode.INVALID_ARGUMENT)
+                context.set_details(str(e))
+                return
+
         model_name = self._get_handle(context)
-        for role, resource, members in (
+        for role, resource, members, page_token in (
                 self.explainer.get_access_by_permissions(
                     model_name,
                     request.role_name,
                     request.permission_name,
                     request.expand_groups,
-                    request.expand_resources)):
+                    request.expand_resources,
+                    request.page_token,
+                    request.page_size)):
             yield explain_pb2.Access(members=members,
                                      role=role,
-                                     resource=resource)
+                                     resource=resource,
+                                     next_page_token=page_token)
 
     @autoclose_stream
     def GetAccessByResources(self, request, context):
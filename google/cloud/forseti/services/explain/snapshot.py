@@ -0,0 +1,617 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Read-only snapshot files of the access graph of a model.
+
+A snapshot holds the resources, members, roles and bindings of a frozen
+model as sorted string tables and integer arrays. It is opened with mmap,
+the tables and arrays are read in place, so opening a snapshot is fast and
+all the threads using it share the same pages.
+
+File layout: the MAGIC bytes, the length of the JSON header as a little
+endian unsigned 64 bit integer, the JSON header, then the sections, each
+aligned to 8 bytes. The header lists the offset, size and array typecode of
+every section, relative to the end of the header.
+"""
+
+from array import array
+from bisect import bisect_left
+from builtins import object
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+from google.cloud.forseti.common.util import logger
+from google.cloud.forseti.services.explain.access_graph import AccessGraph
+
+LOGGER = logger.get_logger(__name__)
+
+MAGIC = b'FSGRAPH\n'
+VERSION = 1
+SNAPSHOT_SUFFIX = '.snapshot'
+
+_ALIGNMENT = 8
+_LENGTH = struct.Struct('<Q')
+_OFFSET_TYPECODE = 'q'
+_NUMBER_TYPECODE = 'i'
+
+
+def snapshot_path(snapshot_dir, handle):
+    """The path of the snapshot file of a model.
+
+    Args:
+        snapshot_dir (str): The snapshot directory.
+        handle (str): The model handle.
+
+    Returns:
+        str: The snapshot file path.
+    """
+    return os.path.join(snapshot_dir, handle + SNAPSHOT_SUFFIX)
+
+
+def _padding(size):
+    """The number of bytes to pad a section to the alignment.
+
+    Args:
+        size (int): The section size.
+
+    Returns:
+        int: The number of padding bytes.
+    """
+    return -size % _ALIGNMENT
+
+
+class _SnapshotWriter(object):
+    """Collects the sections of a snapshot file."""
+
+    def __init__(self):
+        """Initialize."""
+        self.sections = []
+
+    def add_strings(self, name, strings):
+        """Add a sorted string table.
+
+        Args:
+            name (str): The section name.
+            strings (list): The sorted strings.
+        """
+        offsets = array(_OFFSET_TYPECODE, [0])
+        data = bytearray()
+        for string in strings:
+            data.extend(string.encode('utf-8'))
+            offsets.append(len(data))
+        self.sections.append((name + '.offsets', offsets))
+        self.sections.append((name + '.data', data))
+
+    def add_numbers(self, name, numbers):
+        """Add an integer array.
+
+        Args:
+            name (str): The section name.
+            numbers (iterable): The integers.
+        """
+        self.sections.append((name, array(_NUMBER_TYPECODE, numbers)))
+
+    def add_rows(self, name, rows):
+        """Add integer rows as compressed sparse row arrays.
+
+        Args:
+            name (str): The section name.
+            rows (iterable): The rows, each an iterable of integers.
+        """
+        offsets = array(_NUMBER_TYPECODE, [0])
+        values = array(_NUMBER_TYPECODE)
+        for row in rows:
+            values.extend(row)
+            offsets.append(len(values))
+        self.sections.append((name + '.offsets', offsets))
+        self.sections.append((name + '.values', values))
+
+    def write(self, path, metadata):
+        """Write the snapshot file.
+
+        The file is written next to its final path and renamed, so readers
+        never see a partial snapshot.
+
+        Args:
+            path (str): The snapshot file path.
+            metadata (dict): Additional header fields.
+        """
+        directory = {}
+        offset = 0
+        for name, section in self.sections:
+            typecode = getattr(section, 'typecode', 'B')
+            size = len(section) * getattr(section, 'itemsize', 1)
+            directory[name] = [offset, size, typecode]
+            offset += size + _padding(size)
+
+        header = dict(metadata, version=VERSION, byteorder=sys.byteorder,
+                      sections=directory)
+        header = json.dumps(header, sort_keys=True).encode('utf-8')
+        header += b' ' * _padding(len(MAGIC) + _LENGTH.size + len(header))
+
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'wb') as snapshot_file:
+            snapshot_file.write(MAGIC)
+            snapshot_file.write(_LENGTH.pack(len(header)))
+            snapshot_file.write(header)
+            for _, section in self.sections:
+                data = bytes(section)
+                snapshot_file.write(data)
+                snapshot_file.write(b'\0' * _padding(len(data)))
+        os.rename(temporary_path, path)
+
+
+def write_snapshot(graph, path):
+    """Write the access graph of a model to a snapshot file.
+
+    Args:
+        graph (AccessGraph): The access graph.
+        path (str): The snapshot file path.
+    """
+    start = time.time()
+    resources = sorted(graph.resource_names)
+    resource_numbers = {name: number for number, name in enumerate(resources)}
+    members = sorted(graph.member_names)
+    member_numbers = {name: number for number, name in enumerate(members)}
+    member_types = sorted(set(graph.member_types[graph.member_numbers[name]]
+                              for name in members))
+    member_type_numbers = {name: number
+                           for number, name in enumerate(member_types)}
+    permissions = sorted(graph.permission_bits)
+    permission_numbers = {graph.permission_bits[name].bit_length() - 1: number
+                          for number, name in enumerate(permissions)}
+
+    bindings = [graph.resource_bindings[graph.resource_numbers[name]]
+                for name in resources]
+    roles = sorted(set(graph.role_permissions).union(
+        role for resource_bindings in bindings
+        for role, _ in resource_bindings))
+    role_numbers = {name: number for number, name in enumerate(roles)}
+
+    def new_member_numbers(old_members):
+        """Renumber members of the graph.
+
+        Args:
+            old_members (iterable): Member numbers in the graph.
+
+        Returns:
+            list: The sorted member numbers in the snapshot.
+        """
+        return sorted(member_numbers[graph.member_names[member]]
+                      for member in old_members)
+
+    def permission_row(bits):
+        """Permission numbers of a role bitset.
+
+        Args:
+            bits (int): The role permission bitset.
+
+        Returns:
+            list: The sorted permission numbers in the snapshot.
+        """
+        row = []
+        while bits:
+            bit = bits & -bits
+            row.append(permission_numbers[bit.bit_length() - 1])
+            bits ^= bit
+        return sorted(row)
+
+    def parent_number(name):
+        """Snapshot number of the parent of a resource.
+
+        Args:
+            name (str): The resource type name.
+
+        Returns:
+            int: The parent number, or -1 for roots.
+        """
+        parent = graph.resource_parents[graph.resource_numbers[name]]
+        if parent < 0:
+            return -1
+        return resource_numbers[graph.resource_names[parent]]
+
+    writer = _SnapshotWriter()
+    writer.add_strings('resources', resources)
+    writer.add_numbers('resource_parents',
+                       [parent_number(name) for name in resources])
+    writer.add_strings('members', members)
+    writer.add_strings('member_type_names', member_types)
+    writer.add_numbers('member_types', [
+        member_type_numbers[graph.member_types[graph.member_numbers[name]]]
+        for name in members])
+    writer.add_rows('member_parents', (
+        new_member_numbers(graph.member_parents[graph.member_numbers[name]])
+        for name in members))
+    writer.add_rows('member_children', (
+        new_member_numbers(graph.member_children[graph.member_numbers[name]])
+        for name in members))
+    writer.add_strings('permissions', permissions)
+    writer.add_strings('roles', roles)
+    writer.add_rows('role_permissions', (
+        permission_row(graph.role_permissions.get(name, 0))
+        for name in roles))
+    writer.add_numbers('resource_bindings', [0] + _cumulative(
+        len(resource_bindings) for resource_bindings in bindings))
+    writer.add_numbers('binding_roles', [
+        role_numbers[role] for resource_bindings in bindings
+        for role, _ in resource_bindings])
+    writer.add_rows('binding_members', (
+        new_member_numbers(role_members)
+        for resource_bindings in bindings
+        for _, role_members in resource_bindings))
+    writer.write(path, {'group_types': sorted(graph.group_types),
+                        'all_user_members': list(graph.all_user_members)})
+    LOGGER.info('Wrote snapshot %s with %i resources and %i members in %.2f '
+                'seconds.', path, len(resources), len(members),
+                time.time() - start)
+
+
+def _cumulative(counts):
+    """Running totals of counts.
+
+    Args:
+        counts (iterable): The counts.
+
+    Returns:
+        list: The running total after each count.
+    """
+    totals = []
+    total = 0
+    for count in counts:
+        total += count
+        totals.append(total)
+    return totals
+
+
+class StringTable(object):
+    """Sorted strings read in place from a snapshot."""
+
+    def __init__(self, offsets, data):
+        """Initialize.
+
+        Args:
+            offsets (memoryview): Offset of each string in data, followed by
+                the end of the data.
+            data (memoryview): The utf-8 encoded strings.
+        """
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        """The number of strings.
+
+        Returns:
+            int: The number of strings.
+        """
+        return len(self.offsets) - 1
+
+    def __getitem__(self, number):
+        """Decode a string.
+
+        Args:
+            number (int): The string number.
+
+        Returns:
+            str: The string.
+        """
+        return str(self.data[self.offsets[number]:self.offsets[number + 1]],
+                   'utf-8')
+
+    def __iter__(self):
+        """Iterate over the strings in order.
+
+        Yields:
+            str: The strings.
+        """
+        for number in range(len(self)):
+            yield self[number]
+
+    def number(self, string):
+        """Find the number of a string by binary search.
+
+        Args:
+            string (str): The string to find.
+
+        Returns:
+            int: The string number, or None if the string is not in the table.
+        """
+        number = bisect_left(self, string)
+        if number < len(self) and self[number] == string:
+            return number
+        return None
+
+
+class StringNumbers(object):
+    """Read-only mapping of the strings of a table to their numbers."""
+
+    def __init__(self, table):
+        """Initialize.
+
+        Args:
+            table (StringTable): The string table.
+        """
+        self.table = table
+
+    def get(self, string, default=None):
+        """Get the number of a string.
+
+        Args:
+            string (str): The string.
+            default (object): The value to return if not found.
+
+        Returns:
+            int: The string number, or default if not found.
+        """
+        number = self.table.number(string)
+        return default if number is None else number
+
+    def __contains__(self, string):
+        """Whether the table contains a string.
+
+        Args:
+            string (str): The string.
+
+        Returns:
+            bool: Whether the string is in the table.
+        """
+        return self.table.number(string) is not None
+
+    def __getitem__(self, string):
+        """Get the number of a string.
+
+        Args:
+            string (str): The string.
+
+        Returns:
+            int: The string number.
+
+        Raises:
+            KeyError: The string is not in the table.
+        """
+        number = self.table.number(string)
+        if number is None:
+            raise KeyError(string)
+        return number
+
+
+class Rows(object):
+    """Integer rows read in place from compressed sparse row arrays."""
+
+    def __init__(self, offsets, values):
+        """Initialize.
+
+        Args:
+            offsets (memoryview): Offset of each row in values, followed by
+                the number of values.
+            values (memoryview): The row values.
+        """
+        self.offsets = offsets
+        self.values = values
+
+    def __len__(self):
+        """The number of rows.
+
+        Returns:
+            int: The number of rows.
+        """
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        """Get a row.
+
+        Args:
+            row (int): The row number.
+
+        Returns:
+            memoryview: The row values.
+        """
+        return self.values[self.offsets[row]:self.offsets[row + 1]]
+
+
+class CodedStrings(object):
+    """Strings stored as numbers into a small table."""
+
+    def __init__(self, codes, strings):
+        """Initialize.
+
+        Args:
+            codes (memoryview): The string number of every item.
+            strings (list): The distinct strings.
+        """
+        self.codes = codes
+        self.strings = strings
+
+    def __len__(self):
+        """The number of items.
+
+        Returns:
+            int: The number of items.
+        """
+        return len(self.codes)
+
+    def __getitem__(self, item):
+        """Get the string of an item.
+
+        Args:
+            item (int): The item number.
+
+        Returns:
+            str: The string.
+        """
+        return self.strings[self.codes[item]]
+
+
+class Bindings(object):
+    """Bindings of each resource, decoded from a snapshot on access."""
+
+    def __init__(self, resource_offsets, roles, role_names, members):
+        """Initialize.
+
+        Args:
+            resource_offsets (memoryview): Number of the first binding of
+                every resource, followed by the number of bindings.
+            roles (memoryview): The role number of every binding.
+            role_names (StringTable): The role names.
+            members (Rows): The member numbers of every binding.
+        """
+        self.resource_offsets = resource_offsets
+        self.roles = roles
+        self.role_names = role_names
+        self.members = members
+
+    def __len__(self):
+        """The number of bindings.
+
+        Returns:
+            int: The number of bindings.
+        """
+        return len(self.roles)
+
+    def __getitem__(self, resource):
+        """Get the bindings of a resource.
+
+        Args:
+            resource (int): The resource number.
+
+        Returns:
+            list: (role name, frozenset of member numbers) of the bindings.
+        """
+        return [(self.role_names[self.roles[binding]],
+                 frozenset(self.members[binding]))
+                for binding in range(self.resource_offsets[resource],
+                                     self.resource_offsets[resource + 1])]
+
+    def items(self):
+        """Iterate over the resources with bindings.
+
+        Yields:
+            tuple: (resource number, bindings of the resource)
+        """
+        offsets = self.resource_offsets
+        for resource in range(len(offsets) - 1):
+            if offsets[resource] != offsets[resource + 1]:
+                yield resource, self[resource]
+
+
+class SnapshotAccessGraph(AccessGraph):
+    """Access graph of a frozen model, read in place from a snapshot file.
+
+    The resources, members and bindings stay in the memory mapped file, only
+    the role permission bitsets are built when the snapshot is opened.
+    """
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, path):
+        """Open a snapshot.
+
+        Args:
+            path (str): The snapshot file path.
+
+        Raises:
+            ValueError: The file is not a snapshot of this version and byte
+                order.
+        """
+        start = time.time()
+        self.path = path
+        with open(path, 'rb') as snapshot_file:
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if view[:len(MAGIC)] != MAGIC:
+            raise ValueError('Not a model snapshot: {}'.format(path))
+        header_start = len(MAGIC) + _LENGTH.size
+        header_end = header_start + _LENGTH.unpack(
+            view[len(MAGIC):header_start])[0]
+        header = json.loads(str(view[header_start:header_end], 'utf-8'))
+        if (header['version'] != VERSION or
+                header['byteorder'] != sys.byteorder):
+            raise ValueError('Unsupported model snapshot version {} with {} '
+                             'byte order: {}'.format(header['version'],
+                                                     header['byteorder'],
+                                                     path))
+
+        def section(name):
+            """Get a section in place.
+
+            Args:
+                name (str): The section name.
+
+            Returns:
+                memoryview: The section.
+            """
+            offset, size, typecode = header['sections'][name]
+            offset += header_end
+            return view[offset:offset + size].cast(typecode)
+
+        def strings(name):
+            """Get a string table section.
+
+            Args:
+                name (str): The section name.
+
+            Returns:
+                StringTable: The string table.
+            """
+            return StringTable(section(name + '.offsets'),
+                               section(name + '.data'))
+
+        def rows(name):
+            """Get a compressed sparse row section.
+
+            Args:
+                name (str): The section name.
+
+            Returns:
+                Rows: The rows.
+            """
+            return Rows(section(name + '.offsets'), section(name + '.values'))
+
+        self.group_types = set(header['group_types'])
+        self.all_user_members = header['all_user_members']
+
+        self.resource_names = strings('resources')
+        self.resource_numbers = StringNumbers(self.resource_names)
+        self.resource_parents = section('resource_parents')
+        self._resource_children = None
+
+        self.member_names = strings('members')
+        self.member_numbers = StringNumbers(self.member_names)
+        self.member_types = CodedStrings(section('member_types'),
+                                         list(strings('member_type_names')))
+        self.member_parents = rows('member_parents')
+        self.member_children = rows('member_children')
+
+        self.permission_bits = {name: 1 << number for number, name in
+                                enumerate(strings('permissions'))}
+        role_names = strings('roles')
+        role_permissions = rows('role_permissions')
+        self.role_permissions = {}
+        for number, name in enumerate(role_names):
+            bits = 0
+            for permission in role_permissions[number]:
+                bits |= 1 << permission
+            self.role_permissions[name] = bits
+
+        self.resource_bindings = Bindings(section('resource_bindings'),
+                                          section('binding_roles'),
+                                          role_names,
+                                          rows('binding_members'))
+
+        LOGGER.info('Opened snapshot %s with %i resources, %i members, '
+                    '%i roles in %.2f seconds.', path,
+                    len(self.resource_names), len(self.member_names),
+                    len(self.role_permissions), time.time() - start)
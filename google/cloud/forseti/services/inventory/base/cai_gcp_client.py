@@ -21,8 +21,8 @@ import os
 from google.cloud.forseti.common.util import logger
 from google.cloud.forseti.services.inventory.base import gcp
 from google.cloud.forseti.services.inventory.base import iam_helpers
-from google.cloud.forseti.services.inventory.cai_temporary_storage import (
-    CaiDataAccess)
+from google.cloud.forseti.services.inventory.cai_memory_storage import (
+    get_data_access)
 from google.cloud.forseti.services.inventory.cai_temporary_storage import (
     ContentTypes)
 
@@ -79,17 +79,19 @@ class CaiApiClientImpl(gcp.ApiClientImpl):
 
         Args:
             config (dict): GCP API client configuration.
-            engine (object): Database engine to operate on.
-            tmpfile (str): The temporary file storing the cai sqlite database.
+            engine (object): Database engine to operate on, or a
+                CaiMemoryStore.
+            tmpfile (str): The temporary file storing the cai sqlite database,
+                None if the CAI data is held in memory.
         """
         super(CaiApiClientImpl, self).__init__(config)
-        self.dao = CaiDataAccess()
+        self.dao = get_data_access(engine)()
         self.engine = engine
         self.tmpfile = tmpfile
 
     def __del__(self):
         """Destructor."""
-        if os.path.exists(self.tmpfile):
+        if self.tmpfile and os.path.exists(self.tmpfile):
             os.unlink(self.tmpfile)
 
     def fetch_bigquery_iam_policy(self, project_id, project_number, dataset_id):
@@ -13,9 +13,12 @@
 # limitations under the License.
 
 """Forseti Inventory Cloud Asset API integration."""
-import codecs
 from collections import deque
+import functools
+import itertools
+import multiprocessing
 import os
+from queue import Queue
 import threading
 
 import concurrent.futures
@@ -25,11 +28,18 @@ from google.cloud.forseti.common.gcp_api import cloudasset
 from google.cloud.forseti.common.gcp_api import errors as api_errors
 from google.cloud.forseti.common.gcp_api import storage
 from google.cloud.forseti.common.util import logger
+from google.cloud.forseti.services.inventory import cai_memory_storage
 from google.cloud.forseti.services.inventory import cai_temporary_storage
 
 LOGGER = logger.get_logger(__name__)
 CONTENT_TYPES = ['RESOURCE', 'IAM_POLICY']
 
+# Number of dump files streamed at the same time.
+MAX_DUMP_READERS = 4
+
+# Number of dump lines handed to a parser worker at a time.
+PARSE_BATCH_LINES = 1000
+
 # Any asset type referenced in cai_gcp_client.py needs to be added here.
 DEFAULT_ASSET_TYPES = [
     'appengine.googleapis.com/Application',
@@ -150,7 +160,7 @@ def load_cloudasset_data(engine, config, inventory_index_id):
     """Export asset data from Cloud Asset API and load into storage.
 
     Args:
-        engine (object): Database engine.
+        engine (object): Database engine, or a CaiMemoryStore.
         config (InventoryConfig): Inventory configuration on server.
         inventory_index_id (int): The inventory index ID for this export.
 
@@ -161,7 +171,6 @@ def load_cloudasset_data(engine, config, inventory_index_id):
     cai_gcs_dump_paths = config.get_cai_dump_file_paths()
 
     storage_client = storage.StorageClient({})
-    imported_assets = 0
 
     if not cai_gcs_dump_paths:
         # Dump file paths not specified, download the dump files instead.
@@ -169,102 +178,280 @@ def load_cloudasset_data(engine, config, inventory_index_id):
             config,
             inventory_index_id)
 
-    for gcs_path in cai_gcs_dump_paths:
-        try:
-            LOGGER.debug(f'Streaming CAI dump from GCS {gcs_path}.')
-            assets = _stream_gcs_to_database(gcs_path,
-                                             engine,
-                                             storage_client)
-            imported_assets += assets
-        except StreamError as e:
-            LOGGER.error('Error streaming data from GCS to Database: %s', e)
-            return _clear_cai_data(engine)
-
-    # Each worker's imported asset count is appended to the deque, sum them all
-    # to get total imported assets.
+    try:
+        imported_assets = _stream_dumps_to_database(
+            cai_gcs_dump_paths,
+            engine,
+            storage_client,
+            config.get_cai_ingestion_workers(),
+            config.get_cai_data_format())
+    except StreamError as e:
+        LOGGER.error('Error streaming data from GCS to Database: %s', e)
+        return _clear_cai_data(engine)
+
     LOGGER.info('%i assets imported to database.', imported_assets)
 
-    # Optimize the new database before returning
-    engine.execute('pragma optimize;')
+    # Build the lookup indexes now that the bulk load is done.
+    cai_memory_storage.get_data_access(engine).create_indexes(engine)
     return imported_assets
 
 
-def _stream_cloudasset_worker(cai_data, engine, output_queue):
-    """Worker to stream data from GCS into sqlite temporary table.
+def _parse_dump_lines(data_format, lines):
+    """Convert a batch of dump lines into cai temporary store rows.
+
+    Runs in the parser worker processes, so it must be a module level
+    function.
 
     Args:
-        cai_data (file): An open file like pipe.
-        engine (sqlalchemy.engine.Engine): Database engine to write data to.
-        output_queue (collections.deque): A queue storing the results of this
-            thread.
+        data_format (str): The format to store the asset data in.
+        lines (list): Lines of json from a CAI dump file.
+
+    Returns:
+        list: The database row dictionaries, None for unparsable assets.
     """
-    # Codecs transforms the raw byte stream into an iterable of lines.
-    cai_iter = codecs.getreader('utf-8')(cai_data)
-    rows = cai_temporary_storage.CaiDataAccess.populate_cai_data(
-        cai_iter, engine)
-    LOGGER.info('%s assets imported to database.', rows)
-    output_queue.append(rows)
+    return [cai_temporary_storage.CaiTemporaryStore.from_json(line,
+                                                              data_format)
+            for line in lines]
 
 
-def _stream_gcs_to_database(gcs_object, engine, storage_client):
-    """Stream data from GCS into a local database using pipes.
+def _download_to_pipe(gcs_object, storage_client, write_file, download_errors):
+    """Download a GCS object into the write side of a pipe.
 
     Args:
         gcs_object (str): The full path to the GCS object to read.
-        engine (sqlalchemy.engine.Engine): The db engine to store the data in.
         storage_client (storage.StorageClient): The storage client to use to
             download data from GCS.
+        write_file (file): The write side of the pipe.
+        download_errors (collections.deque): Collects any download error.
+    """
+    try:
+        storage_client.download(full_bucket_path=gcs_object,
+                                output_file=write_file)
+    except errors.HttpError as e:
+        LOGGER.error('Could not download %s from GCS: %s',
+                     gcs_object, e)
+        download_errors.append(
+            StreamError('Could not download %s from GCS : %s' %
+                        (gcs_object, e)))
+    finally:
+        # Close the write side of the pipe so the read side will know
+        # when it reaches EOF.
+        write_file.close()
 
-    Returns:
-        int: The number of rows stored in the database.
+
+def _queue_dump_lines(dump_file, line_queue):
+    """Split a dump file into batches of lines for the parser workers.
+
+    Args:
+        dump_file (file): A file like object with the binary dump data.
+        line_queue (queue.Queue): Queue to put the batches of lines on.
+    """
+    batch = []
+    for line in dump_file:
+        line = line.strip()
+        if not line:
+            continue
+        batch.append(line)
+        if len(batch) >= PARSE_BATCH_LINES:
+            line_queue.put(batch)
+            batch = []
+    if batch:
+        line_queue.put(batch)
+
+
+def _read_dump(dump_path, storage_client, line_queue):
+    """Reader stage, stream one CAI dump onto the line queue.
+
+    GCS objects are streamed through a pipe without downloading them to the
+    local system first. Any other path is read as a local file.
+
+    Args:
+        dump_path (str): The full path to the GCS object or local file.
+        storage_client (storage.StorageClient): The storage client to use to
+            download data from GCS.
+        line_queue (queue.Queue): Queue to put the batches of lines on.
 
     Raises:
-        StreamError: Raised on any errors streaming data from GCS.
+        StreamError: Raised on any errors streaming the data.
     """
-    if not gcs_object:
+    if not dump_path:
         raise StreamError('GCS Object name not defined.')
 
-    LOGGER.info('Importing Cloud Asset data from %s to database.',
-                gcs_object)
+    LOGGER.info('Importing Cloud Asset data from %s to database.', dump_path)
 
-    # Use a deque to store the output of the worker threads as appends are
-    # atomic and thread safe.
-    imported_rows = deque()
+    if not dump_path.startswith('gs://'):
+        try:
+            with open(dump_path, 'rb') as dump_file:
+                _queue_dump_lines(dump_file, line_queue)
+        except IOError as e:
+            raise StreamError('Could not read %s: %s' % (dump_path, e))
+        return
 
     # Create a pair of connected pipe objects to stream the data from
-    # GCS into the sqlite database without having to download the data
-    # to the local system first.
+    # GCS into the line queue.
     read_pipe, write_pipe = os.pipe()
-    # Create file like objects for each pipe
     read_file = os.fdopen(read_pipe, mode='rb')
     write_file = os.fdopen(write_pipe, mode='wb')
-    # Create a separate thread for writing the data to sqlite, reading
-    # from the input side of the pipe.
-    worker = threading.Thread(target=_stream_cloudasset_worker,
-                              args=(read_file, engine, imported_rows))
-    worker.start()
-
+    download_errors = deque()
+    downloader = threading.Thread(target=_download_to_pipe,
+                                  args=(dump_path,
+                                        storage_client,
+                                        write_file,
+                                        download_errors))
+    downloader.start()
     try:
-        # Stream data from GCS into the output side of the pip
-        storage_client.download(full_bucket_path=gcs_object,
-                                output_file=write_file)
-    except errors.HttpError as e:
-        LOGGER.error('Could not download %s from GCS: %s',
-                     gcs_object, e)
-        raise StreamError('Could not download %s from GCS : %s' %
-                          (gcs_object, e))
+        _queue_dump_lines(read_file, line_queue)
     finally:
-        # Close the write side of the pipe so the read side will know
-        # when it reaches EOF and the tread will return.
-        write_file.close()
-
         # Wait for thread to complete before continuing
-        worker.join()
+        downloader.join()
 
         # Don't leak resources, ensure both sides of pipe are closed.
         read_file.close()
 
-    return imported_rows.popleft()
+    if download_errors:
+        raise download_errors.popleft()
+
+
+def _read_dumps(dump_paths, storage_client, line_queue, reader_errors):
+    """Run a reader for each dump path as the paths become available.
+
+    Args:
+        dump_paths (iterable): The GCS or local paths of the dump files.
+        storage_client (storage.StorageClient): The storage client to use to
+            download data from GCS.
+        line_queue (queue.Queue): Queue to put the batches of lines on, a
+            None is put on the queue once all readers are done.
+        reader_errors (collections.deque): Collects any reader error.
+    """
+    try:
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=MAX_DUMP_READERS) as executor:
+            futures = [executor.submit(_read_dump,
+                                       dump_path,
+                                       storage_client,
+                                       line_queue)
+                       for dump_path in dump_paths]
+        for future in futures:
+            if future.exception():
+                reader_errors.append(future.exception())
+    except Exception as e:  # pylint: disable=broad-except
+        # Errors from the Cloud Asset export are raised from dump_paths.
+        reader_errors.append(e)
+    finally:
+        line_queue.put(None)
+
+
+def _acquire_batches(line_batches, in_flight, stopped):
+    """Take a slot for each batch of lines before it is sent to be parsed.
+
+    Args:
+        line_batches (iterable): The batches of lines.
+        in_flight (threading.Semaphore): Slots for the batches sent to the
+            parser pool whose rows are not yet written.
+        stopped (threading.Event): Set when the pipeline is stopped, batches
+            are then passed on without waiting for a slot.
+
+    Yields:
+        list: The batches of lines.
+    """
+    for lines in line_batches:
+        if not stopped.is_set():
+            in_flight.acquire()
+        yield lines
+
+
+def _release_batches(row_batches, in_flight):
+    """Release the slot of each batch of rows once its rows are consumed.
+
+    Args:
+        row_batches (iterable): The batches of rows.
+        in_flight (threading.Semaphore): Slots for the batches sent to the
+            parser pool whose rows are not yet written.
+
+    Yields:
+        dict: The rows of the batches.
+    """
+    for rows in row_batches:
+        for row in rows:
+            yield row
+        in_flight.release()
+
+
+def _stream_dumps_to_database(
+        dump_paths, engine, storage_client, workers,
+        data_format=cai_temporary_storage.JSON_DATA_FORMAT):
+    """Load CAI dumps into the database with a three stage pipeline.
+
+    Reader threads stream each dump into batches of lines, a pool of parser
+    processes decodes the json into rows, and the calling thread writes the
+    rows to the database in batches, as sqlite only supports one writer.
+
+    Args:
+        dump_paths (iterable): The GCS or local paths of the dump files.
+        engine (object): The db engine or CaiMemoryStore to store the data
+            in.
+        storage_client (storage.StorageClient): The storage client to use to
+            download data from GCS.
+        workers (int): Number of parser processes, the json is parsed in the
+            writer thread if this is 1 or less.
+        data_format (str): The format to store the asset data in.
+
+    Returns:
+        int: The number of rows stored in the database.
+
+    Raises:
+        StreamError: Raised on any errors streaming data from GCS.
+    """
+    # Bound the number of batches waiting to be parsed to limit memory use.
+    line_queue = Queue(maxsize=max(workers, 1) * 2 + MAX_DUMP_READERS)
+    # Also bound the batches in the parser pool, its parsed rows are queued
+    # without limit when the writer is slower than the parsers.
+    in_flight = threading.Semaphore(max(workers, 1) * 2)
+    stopped = threading.Event()
+    reader_errors = deque()
+    reader = threading.Thread(target=_read_dumps,
+                              args=(dump_paths,
+                                    storage_client,
+                                    line_queue,
+                                    reader_errors))
+    reader.start()
+
+    line_batches = iter(line_queue.get, None)
+    parse_dump_lines = functools.partial(_parse_dump_lines, data_format)
+    pool = None
+    try:
+        if workers > 1:
+            pool = multiprocessing.get_context('spawn').Pool(workers)
+            rows = _release_batches(
+                pool.imap_unordered(
+                    parse_dump_lines,
+                    _acquire_batches(line_batches, in_flight, stopped)),
+                in_flight)
+        else:
+            rows = itertools.chain.from_iterable(
+                parse_dump_lines(lines) for lines in line_batches)
+
+        data_access = cai_memory_storage.get_data_access(engine)
+        imported_rows = data_access.write_cai_rows(rows, engine)
+    finally:
+        # Unblock the pool task handler if it waits for a slot.
+        stopped.set()
+        in_flight.release()
+        if pool:
+            pool.terminate()
+            pool.join()
+        # Drain the queue so blocked readers can finish.
+        for _ in line_batches:
+            pass
+        reader.join()
+
+    for error in reader_errors:
+        if not isinstance(error, StreamError):
+            raise error
+    if reader_errors:
+        raise reader_errors.popleft()
+
+    return imported_rows
 
 
 def _export_assets(
@@ -355,7 +542,7 @@ def _clear_cai_data(engine):
         engine (object): Database engine.
     """
     LOGGER.debug('Deleting Cloud Asset data from database.')
-    count = cai_temporary_storage.CaiDataAccess.clear_cai_data(engine)
+    count = cai_memory_storage.get_data_access(engine).clear_cai_data(engine)
     LOGGER.debug('%s assets deleted from database.', count)
     return None
 
@@ -60,6 +60,14 @@ class Progresser(object):
         """
         raise NotImplementedError()
 
+    def on_duplicate(self, resource):
+        """Ignore resources skipped as duplicates by default.
+
+        Args:
+            resource (object): the Resource object
+        """
+        pass
+
     def get_summary(self):
         """Not Implemented.
 
@@ -102,6 +110,14 @@ class CliProgresser(object):
         print('error: {}'.format(error))
         self.errors.append(error)
 
+    def on_duplicate(self, resource):
+        """Show progress state when a duplicate object is skipped
+
+        Args:
+            resource (Resource): the Resource object in resources
+        """
+        print('skipped duplicate object: {}'.format(resource))
+
     def get_summary(self):
         """Show progress state when finish"""
         print('Errors: {}, Warnings: {}'.format(
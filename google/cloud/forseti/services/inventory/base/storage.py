@@ -39,6 +39,9 @@ class Storage(object):
     def write(self, resource):
         """Not Implemented.
 
+        Implementations return False if the resource was skipped as a
+        duplicate, else True.
+
         Args:
             resource (object): the resource object to write
 
@@ -132,8 +135,12 @@ class Memory(Storage):
 
         Args:
             resource (object): the resource object to write
+
+        Returns:
+            bool: Always True, duplicates overwrite the previous object.
         """
         self.mem[resource.type() + resource.key()] = resource
+        return True
 
     def read(self, key):
         """Read a resource object from storage
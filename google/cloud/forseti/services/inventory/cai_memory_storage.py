@@ -0,0 +1,350 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""In memory temporary storage for Cloud Asset data."""
+import time
+
+from google.cloud.forseti.common.util import logger
+from google.cloud.forseti.services.inventory import cai_temporary_storage
+from google.cloud.forseti.services.inventory.base.gcp import AssetMetadata
+
+LOGGER = logger.get_logger(__name__)
+
+# Approximate bytes held per asset besides its name and data: the index dict
+# entry and key tuple, and the slot in the parent group.
+ASSET_OVERHEAD = 200
+
+
+class CaiMemoryStore(object):
+    """Keeps the CAI assets in memory, up to a memory cap.
+
+    Assets are grouped by (content_type, asset_type, parent_name), each group
+    is a list of asset names sorted once the load is done, and the encoded
+    asset data is indexed by (content_type, asset_type, name). Repeated
+    asset types and parent names are interned so each is held once.
+
+    If the assets outgrow the memory cap while they are loaded, they are
+    moved to a sqlite temporary store, which then serves all further writes
+    and reads.
+    """
+
+    def __init__(self, memory_cap, threads=1):
+        """Initialize.
+
+        Args:
+            memory_cap (int): Maximum bytes of asset data to keep in memory.
+            threads (int): The number of threads the sqlite temporary store
+                must support, if it is needed.
+        """
+        self.memory_cap = memory_cap
+        self.threads = threads
+        self.memory_usage = 0
+        self.engine = None
+        self.tmpfile = None
+        self._strings = {}
+        self._groups = {}
+        self._assets = {}
+
+    def __len__(self):
+        """Number of assets held in memory.
+
+        Returns:
+            int: The number of assets.
+        """
+        return len(self._assets)
+
+    def _intern(self, value):
+        """Get the single shared copy of a string.
+
+        Args:
+            value (str): The string.
+
+        Returns:
+            str: The interned string.
+        """
+        return self._strings.setdefault(value, value)
+
+    def add_row(self, row):
+        """Add a row created by CaiTemporaryStore.from_json.
+
+        Args:
+            row (dict): The database row dictionary.
+
+        Returns:
+            bool: True if the asset was added, False if it is a duplicate.
+        """
+        content_type = row['content_type']
+        asset_type = self._intern(row['asset_type'])
+        key = (content_type, asset_type, row['name'])
+        if key in self._assets:
+            LOGGER.debug('Skipping duplicate asset %s.', key)
+            return False
+
+        self._assets[key] = row['asset_data']
+        group_key = (content_type, asset_type,
+                     self._intern(row['parent_name']))
+        self._groups.setdefault(group_key, []).append(row['name'])
+        self.memory_usage += (len(row['name']) + len(row['asset_data']) +
+                              ASSET_OVERHEAD)
+        return True
+
+    def sort(self):
+        """Sort the asset names of every group, once the load is done."""
+        for names in self._groups.values():
+            names.sort()
+
+    def get(self, content_type, asset_type, name):
+        """Get the encoded data of an asset.
+
+        Args:
+            content_type (str): The content type name.
+            asset_type (str): The asset type.
+            name (str): The asset name.
+
+        Returns:
+            bytes: The encoded asset data, or None if there is no such asset.
+        """
+        return self._assets.get((content_type, asset_type, name))
+
+    def iter_group(self, content_type, asset_type, parent_name):
+        """Iterate the assets under a parent, ordered by name.
+
+        Args:
+            content_type (str): The content type name.
+            asset_type (str): The asset type.
+            parent_name (str): The parent resource name.
+
+        Yields:
+            tuple: The name and encoded data of each asset.
+        """
+        for name in self._groups.get((content_type, asset_type, parent_name),
+                                     ()):
+            yield name, self._assets[(content_type, asset_type, name)]
+
+    def iter_rows(self):
+        """Iterate the assets as database row dictionaries.
+
+        Yields:
+            dict: The database row dictionary of each asset.
+        """
+        for (content_type, asset_type, parent_name), names in (
+                self._groups.items()):
+            for name in names:
+                yield {'name': name,
+                       'parent_name': parent_name,
+                       'content_type': content_type,
+                       'asset_type': asset_type,
+                       'asset_data': self._assets[(content_type, asset_type,
+                                                   name)]}
+
+    def spill_to_sqlite(self):
+        """Move all assets to a new sqlite temporary store."""
+        LOGGER.info('CAI data exceeds the %i byte memory cap, moving %i assets '
+                    'to a sqlite temporary store.', self.memory_cap, len(self))
+        self.engine, self.tmpfile = cai_temporary_storage.create_sqlite_db(
+            self.threads)
+        cai_temporary_storage.CaiDataAccess.write_cai_rows(self.iter_rows(),
+                                                           self.engine)
+        self.clear()
+
+    def clear(self):
+        """Remove all assets held in memory.
+
+        Returns:
+            int: The number of assets removed.
+        """
+        count = len(self)
+        self._strings = {}
+        self._groups = {}
+        self._assets = {}
+        self.memory_usage = 0
+        return count
+
+
+def _content_type_name(content_type):
+    """Get the name of a content type.
+
+    Args:
+        content_type (Union[ContentTypes, str]): The content type.
+
+    Returns:
+        str: The content type name.
+    """
+    return getattr(content_type, 'name', content_type)
+
+
+class CaiMemoryDataAccess(object):
+    """Access to a CaiMemoryStore, with the interface of CaiDataAccess.
+
+    Every method delegates to CaiDataAccess once the store has moved its
+    assets to sqlite.
+    """
+
+    @staticmethod
+    def clear_cai_data(store):
+        """Deletes all temporary CAI data from the store.
+
+        Args:
+            store (CaiMemoryStore): The in memory store.
+
+        Returns:
+            int: The number of assets deleted.
+        """
+        if store.engine:
+            return cai_temporary_storage.CaiDataAccess.clear_cai_data(
+                store.engine)
+        return store.clear()
+
+    @staticmethod
+    def populate_cai_data(data, store,
+                          data_format=cai_temporary_storage.JSON_DATA_FORMAT):
+        """Add assets from cai data dump into the store.
+
+        Args:
+            data (file): A file like object, line delimeted text dump of json
+                data representing assets from Cloud Asset Inventory exportAssets
+                API.
+            store (CaiMemoryStore): The in memory store.
+            data_format (str): The format to store the asset data in, one of
+                DATA_FORMATS.
+
+        Returns:
+            int: The number of assets added.
+        """
+        rows = (cai_temporary_storage.CaiTemporaryStore.from_json(
+            line.strip().encode(), data_format) for line in data if line)
+        num_rows = CaiMemoryDataAccess.write_cai_rows(rows, store)
+        CaiMemoryDataAccess.create_indexes(store)
+        return num_rows
+
+    @staticmethod
+    def write_cai_rows(rows, store):
+        """Add database rows to the store, moving to sqlite over the cap.
+
+        Args:
+            rows (iterable): Row dictionaries created by
+                CaiTemporaryStore.from_json, None values are skipped.
+            store (CaiMemoryStore): The in memory store.
+
+        Returns:
+            int: The number of assets added.
+        """
+        rows = iter(rows)
+        num_rows = 0
+        if not store.engine:
+            for row in rows:
+                if row and store.add_row(row):
+                    num_rows += 1
+                    if store.memory_usage > store.memory_cap:
+                        store.spill_to_sqlite()
+                        break
+
+        if store.engine:
+            num_rows += cai_temporary_storage.CaiDataAccess.write_cai_rows(
+                rows, store.engine)
+        return num_rows
+
+    @staticmethod
+    def create_indexes(store):
+        """Sort the assets, once the CAI data is loaded.
+
+        Args:
+            store (CaiMemoryStore): The in memory store.
+        """
+        if store.engine:
+            cai_temporary_storage.CaiDataAccess.create_indexes(store.engine)
+            return
+        store.sort()
+        LOGGER.info('%i assets held in memory, about %i bytes.',
+                    len(store), store.memory_usage)
+
+    @staticmethod
+    def log_query_stats(store):
+        """Log the call counts and timings of the lookups.
+
+        Args:
+            store (CaiMemoryStore): The in memory store.
+        """
+        cai_temporary_storage.CaiDataAccess.log_query_stats(
+            store.engine or store)
+
+    @staticmethod
+    def iter_cai_assets(content_type, asset_type, parent_name, store):
+        """Iterate the assets in the store.
+
+        Args:
+            content_type (ContentTypes): The content type to return.
+            asset_type (str): The asset type to return.
+            parent_name (str): The parent resource to iter children under.
+            store (CaiMemoryStore): The in memory store.
+
+        Yields:
+            object: The content_type data for each resource.
+        """
+        if store.engine:
+            for asset in cai_temporary_storage.CaiDataAccess.iter_cai_assets(
+                    content_type, asset_type, parent_name, store.engine):
+                yield asset
+            return
+
+        start = time.time()
+        assets = list(store.iter_group(_content_type_name(content_type),
+                                       asset_type, parent_name))
+        cai_temporary_storage.get_query_stats(store).record(
+            'iter_cai_assets', time.time() - start)
+        for name, asset_data in assets:
+            yield (cai_temporary_storage.decode_asset_data(asset_data),
+                   AssetMetadata(cai_name=name, cai_type=asset_type))
+
+    @staticmethod
+    def fetch_cai_asset(content_type, asset_type, name, store):
+        """Returns a single resource from the store.
+
+        Args:
+            content_type (ContentTypes): The content type to return.
+            asset_type (str): The asset type to return.
+            name (str): The resource to return.
+            store (CaiMemoryStore): The in memory store.
+
+        Returns:
+            dict: The content data for the specified resource.
+        """
+        if store.engine:
+            return cai_temporary_storage.CaiDataAccess.fetch_cai_asset(
+                content_type, asset_type, name, store.engine)
+
+        start = time.time()
+        asset_data = store.get(_content_type_name(content_type), asset_type,
+                               name)
+        cai_temporary_storage.get_query_stats(store).record(
+            'fetch_cai_asset', time.time() - start)
+        if asset_data is None:
+            return {}, None
+
+        # Decoded for every call, as resources modify their data.
+        return (cai_temporary_storage.decode_asset_data(asset_data),
+                AssetMetadata(cai_name=name, cai_type=asset_type))
+
+
+def get_data_access(engine):
+    """Get the data access class for a CAI temporary store.
+
+    Args:
+        engine (object): A sqlite engine or a CaiMemoryStore.
+
+    Returns:
+        class: CaiMemoryDataAccess for a CaiMemoryStore, else CaiDataAccess.
+    """
+    if isinstance(engine, CaiMemoryStore):
+        return CaiMemoryDataAccess
+    return cai_temporary_storage.CaiDataAccess
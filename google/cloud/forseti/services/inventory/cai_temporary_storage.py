@@ -12,15 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Inventory temporary storage for Cloud Asset data."""
+from collections import OrderedDict
 import json
 import os
 import enum
+import pickle
 import tempfile
+import threading
+import time
+import weakref
 
 from retrying import retry
+from sqlalchemy import and_
+from sqlalchemy import bindparam
 from sqlalchemy import Column
 from sqlalchemy import Enum
-from sqlalchemy import Index
 from sqlalchemy import PrimaryKeyConstraint
 from sqlalchemy import String
 from sqlalchemy import LargeBinary
@@ -47,6 +53,29 @@ BASE = declarative_base()
 # should be re-evaluated for large Virtual Machines.
 MAX_ALLOWED_INSERT_SIZE = 32 * 1024 * 1024  # 32 Megabytes
 
+# Formats for the asset_data column. json stores the asset as sorted json
+# text. pickle stores the already decoded asset in python's binary pickle
+# format, which is cheaper to write during the load and to decode again when
+# the crawler reads the asset back.
+JSON_DATA_FORMAT = 'json'
+PICKLE_DATA_FORMAT = 'pickle'
+DATA_FORMATS = frozenset([JSON_DATA_FORMAT, PICKLE_DATA_FORMAT])
+
+# Pickle protocol 2 and later start with the PROTO opcode, json data never
+# does, so both formats can be read back from the same table.
+_PICKLE_PREFIX = pickle.PROTO
+
+# Number of fetch_cai_asset results cached per engine.
+ASSET_CACHE_SIZE = 4096
+
+# Lookup indexes, created once the dumps are loaded so the bulk insert only
+# maintains the primary key. The parent index covers every filter and the
+# sort order of iter_cai_assets, fetch_cai_asset is served by the primary key.
+CAI_LOOKUP_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_cai_parent_lookup ON cai_temporary_store '
+    '(parent_name, content_type, asset_type, name)',
+]
+
 
 class ContentTypes(enum.Enum):
     """Cloud Asset Inventory Content Types."""
@@ -74,11 +103,10 @@ class CaiTemporaryStore(BASE):
     asset_data = Column(LargeBinary(length=(2**32) - 1), nullable=False)
 
     __table_args__ = (
-        Index('idx_parent_name', 'parent_name'),
         PrimaryKeyConstraint('content_type',
                              'asset_type',
                              'name',
-                             name='cai_temp_store_pk'))
+                             name='cai_temp_store_pk'),)
 
     # Assets with no parent resource.
     UNPARENTED_ASSETS = frozenset([
@@ -87,11 +115,13 @@ class CaiTemporaryStore(BASE):
     ])
 
     @classmethod
-    def from_json(cls, asset_json):
+    def from_json(cls, asset_json, data_format=JSON_DATA_FORMAT):
         """Creates a database row object from the json data in a dump file.
 
         Args:
             asset_json (str): The json representation of an Asset.
+            data_format (str): The format to store the asset data in, one of
+                DATA_FORMATS.
 
         Returns:
             dict: database row dictionary or None if there is no data.
@@ -109,31 +139,31 @@ class CaiTemporaryStore(BASE):
             resource_data = asset['resource']['data']
             # Remove unused proto representation of asset
             resource_data.pop('internal_data', None)
-            asset_data = json.dumps(resource_data, sort_keys=True)
+            asset_data = resource_data
         elif 'iam_policy' in asset:
             content_type = 'iam_policy'
             parent_name = asset['name']
-            asset_data = json.dumps(asset['iam_policy'], sort_keys=True)
+            asset_data = asset['iam_policy']
         elif 'org_policy' in asset:
             content_type = 'org_policy'
             parent_name = asset['name']
-            asset_data = json.dumps(asset['org_policy'], sort_keys=True)
+            asset_data = asset['org_policy']
             name = asset['org_policy'][0]['constraint']
         elif 'access_policy' in asset:
             content_type = 'access_policy'
             parent_name = asset['name']
-            asset_data = json.dumps(asset['access_policy'], sort_keys=True)
+            asset_data = asset['access_policy']
             name = asset['access_policy']['name']
         elif 'access_level' in asset:
             content_type = 'access_level'
             access_level = asset[content_type]
-            asset_data = json.dumps(access_level, sort_keys=True)
+            asset_data = access_level
             name = access_level['name']
             parent_name = name.split('/accessLevels')[0]
         elif 'service_perimeter' in asset:
             content_type = 'service_perimeter'
             service_perimeter = asset[content_type]
-            asset_data = json.dumps(service_perimeter, sort_keys=True)
+            asset_data = service_perimeter
             name = service_perimeter['name']
             parent_name = name.split('/servicePerimeters')[0]
         else:
@@ -145,7 +175,7 @@ class CaiTemporaryStore(BASE):
                 'parent_name': parent_name,
                 'content_type': content_type,
                 'asset_type': asset['asset_type'],
-                'asset_data': asset_data.encode('utf-8')}
+                'asset_data': encode_asset_data(asset_data, data_format)}
 
     @classmethod
     def delete_all(cls, engine):
@@ -282,6 +312,231 @@ class CaiTemporaryStore(BASE):
         return ''
 
 
+def encode_asset_data(asset_data, data_format=JSON_DATA_FORMAT):
+    """Serialize decoded asset data for the asset_data column.
+
+    Args:
+        asset_data (object): The decoded asset data.
+        data_format (str): The format to store the asset data in, one of
+            DATA_FORMATS.
+
+    Returns:
+        bytes: The serialized asset data.
+    """
+    if data_format == PICKLE_DATA_FORMAT:
+        return pickle.dumps(asset_data, pickle.HIGHEST_PROTOCOL)
+    return json.dumps(asset_data, sort_keys=True).encode('utf-8')
+
+
+def decode_asset_data(asset_data):
+    """Deserialize the asset_data column, whichever format it was stored in.
+
+    The pickle data is only ever written by this module to its own temporary
+    database, it is never read from the CAI dump files.
+
+    Args:
+        asset_data (bytes): The serialized asset data.
+
+    Returns:
+        object: The decoded asset data.
+    """
+    if asset_data[:1] == _PICKLE_PREFIX:
+        return pickle.loads(asset_data)
+    return json.loads(asset_data)
+
+
+class AssetCache(object):
+    """Thread safe LRU cache of assets fetched from the temporary store.
+
+    Resources modify the data they are created from, so the cache keeps the
+    serialized asset data and every hit is decoded into a new object.
+    """
+
+    def __init__(self, maxsize=ASSET_CACHE_SIZE):
+        """Initialize.
+
+        Args:
+            maxsize (int): The maximum number of cached assets.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Get a cached entry and mark it as recently used.
+
+        Args:
+            key (tuple): The cache key.
+
+        Returns:
+            tuple: The cached entry, or None if the key is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        """Cache an entry, evicting the least recently used if full.
+
+        Args:
+            key (tuple): The cache key.
+            entry (tuple): The entry to cache.
+        """
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+class QueryStats(object):
+    """Thread safe call counts and timings of the temporary store queries."""
+
+    def __init__(self):
+        """Initialize."""
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, query_name, elapsed):
+        """Record one execution of a query.
+
+        Args:
+            query_name (str): The name of the query.
+            elapsed (float): The execution time in seconds.
+        """
+        with self._lock:
+            calls, total, slowest = self._stats.get(query_name, (0, 0.0, 0.0))
+            self._stats[query_name] = (calls + 1,
+                                       total + elapsed,
+                                       max(slowest, elapsed))
+
+    def summary(self):
+        """Get the recorded stats.
+
+        Returns:
+            dict: Maps query name to a dict with the number of calls, and the
+                total, mean and max execution time in seconds.
+        """
+        with self._lock:
+            return {query_name: {'calls': calls,
+                                 'total': total,
+                                 'mean': total / calls,
+                                 'max': slowest}
+                    for query_name, (calls, total, slowest)
+                    in self._stats.items()}
+
+
+class _EngineState(object):
+    """Per engine caches and stats of the temporary store."""
+
+    def __init__(self):
+        """Initialize."""
+        self.asset_cache = AssetCache()
+        self.compiled_cache = {}
+        self.query_stats = QueryStats()
+
+
+# One _EngineState per temporary store engine, dropped with the engine.
+_ENGINE_STATES = weakref.WeakKeyDictionary()
+_ENGINE_STATES_LOCK = threading.Lock()
+
+
+def _get_engine_state(engine):
+    """Get the caches and stats of a temporary store engine.
+
+    Args:
+        engine (object): Database engine.
+
+    Returns:
+        _EngineState: The state of the engine.
+    """
+    with _ENGINE_STATES_LOCK:
+        state = _ENGINE_STATES.get(engine)
+        if state is None:
+            state = _EngineState()
+            _ENGINE_STATES[engine] = state
+        return state
+
+
+def get_asset_cache(engine):
+    """Get the asset cache for a temporary store engine.
+
+    Args:
+        engine (object): Database engine.
+
+    Returns:
+        AssetCache: The asset cache for the engine.
+    """
+    return _get_engine_state(engine).asset_cache
+
+
+def get_query_stats(engine):
+    """Get the query stats for a temporary store engine.
+
+    Args:
+        engine (object): Database engine.
+
+    Returns:
+        QueryStats: The query stats for the engine.
+    """
+    return _get_engine_state(engine).query_stats
+
+
+def _build_lookup_queries():
+    """Build the lookup queries once, with bound parameters.
+
+    Returns:
+        dict: The select statements keyed by query name.
+    """
+    table = CaiTemporaryStore.__table__
+    iter_query = table.select().where(and_(
+        table.c.parent_name == bindparam('parent_name'),
+        table.c.content_type == bindparam('content_type'),
+        table.c.asset_type == bindparam('asset_type'),
+    )).order_by(table.c.name.asc())
+    fetch_query = table.select().where(and_(
+        table.c.content_type == bindparam('content_type'),
+        table.c.asset_type == bindparam('asset_type'),
+        table.c.name == bindparam('name'),
+    ))
+    return {'iter_cai_assets': iter_query, 'fetch_cai_asset': fetch_query}
+
+
+_LOOKUP_QUERIES = _build_lookup_queries()
+
+
+def _execute_lookup(engine, query_name, **params):
+    """Execute a lookup query, reusing its compiled form for the engine.
+
+    Args:
+        engine (object): Database engine.
+        query_name (str): The name of the query in _LOOKUP_QUERIES.
+        **params (dict): The values of the bound parameters.
+
+    Returns:
+        ResultProxy: The query results.
+    """
+    state = _get_engine_state(engine)
+    start = time.time()
+    results = engine.execution_options(
+        compiled_cache=state.compiled_cache).execute(
+            _LOOKUP_QUERIES[query_name], **params)
+    state.query_stats.record(query_name, time.time() - start)
+    return results
+
+
 class CaiDataAccess(object):
     """Access to the CAI temporary store table."""
 
@@ -295,10 +550,11 @@ class CaiDataAccess(object):
         Returns:
             int: The number of rows deleted.
         """
+        get_asset_cache(engine).clear()
         return CaiTemporaryStore.delete_all(engine)
 
     @staticmethod
-    def populate_cai_data(data, engine):
+    def populate_cai_data(data, engine, data_format=JSON_DATA_FORMAT):
         """Add assets from cai data dump into cai temporary table.
 
         Args:
@@ -306,33 +562,77 @@ class CaiDataAccess(object):
                 data representing assets from Cloud Asset Inventory exportAssets
                 API.
             engine (object): Database engine.
+            data_format (str): The format to store the asset data in, one of
+                DATA_FORMATS.
+
+        Returns:
+            int: The number of rows inserted
+        """
+        rows = (CaiTemporaryStore.from_json(line.strip().encode(), data_format)
+                for line in data if line)
+        num_rows = CaiDataAccess.write_cai_rows(rows, engine)
+        CaiDataAccess.create_indexes(engine)
+        return num_rows
+
+    @staticmethod
+    def create_indexes(engine):
+        """Create the lookup indexes and optimize, once the data is loaded.
+
+        Args:
+            engine (object): Database engine.
+        """
+        for index_ddl in CAI_LOOKUP_INDEXES:
+            engine.execute(index_ddl)
+        engine.execute('pragma optimize;')
+
+    @staticmethod
+    def log_query_stats(engine):
+        """Log the call counts and timings of the lookup queries.
+
+        Args:
+            engine (object): Database engine.
+        """
+        for query_name, stats in sorted(
+                get_query_stats(engine).summary().items()):
+            LOGGER.info('CAI temporary store query %s: %i calls, %.3fs total, '
+                        '%.6fs mean, %.6fs max.', query_name, stats['calls'],
+                        stats['total'], stats['mean'], stats['max'])
+
+    @staticmethod
+    def write_cai_rows(rows, engine):
+        """Insert database rows into the cai temporary table in batches.
+
+        Args:
+            rows (iterable): Row dictionaries created by
+                CaiTemporaryStore.from_json, None values are skipped.
+            engine (object): Database engine.
 
         Returns:
             int: The number of rows inserted
         """
+        # Cached misses may be inserted now.
+        get_asset_cache(engine).clear()
         num_rows = 0
         cai_table_insert = CaiTemporaryStore.__table__.insert
         try:
             rows_total_length = 0
-            rows = []
-            for line in data:
-                if not line:
-                    continue
-                row = CaiTemporaryStore.from_json(line.strip().encode())
+            batch = []
+            for row in rows:
                 if row:
                     num_rows += 1
-                    rows.append(row)
+                    batch.append(row)
                     rows_total_length += sum(len(v) for v in row.values())
                     if rows_total_length > MAX_ALLOWED_INSERT_SIZE * .9:
-                        LOGGER.debug('Flushing %i rows to CAI table', len(rows))
-                        engine.execute(cai_table_insert(), rows)
+                        LOGGER.debug('Flushing %i rows to CAI table',
+                                     len(batch))
+                        engine.execute(cai_table_insert(), batch)
                         rows_total_length = 0
-                        rows = []
+                        batch = []
 
-            if rows:
+            if batch:
                 LOGGER.debug('Flushing remaining %i rows to CAI table',
-                             len(rows))
-                engine.execute(cai_table_insert(), rows)
+                             len(batch))
+                engine.execute(cai_table_insert(), batch)
         except SQLAlchemyError as e:
             LOGGER.error('Error populating CAI data: %s', e)
         return num_rows
@@ -354,18 +654,11 @@ class CaiDataAccess(object):
         Yields:
             object: The content_type data for each resource.
         """
-        base_query = CaiTemporaryStore.__table__.select()
-        filters = [
-            CaiTemporaryStore.parent_name == parent_name,
-            CaiTemporaryStore.content_type == content_type,
-            CaiTemporaryStore.asset_type == asset_type,
-        ]
-
-        for qry_filter in filters:
-            base_query = base_query.where(qry_filter)
-
-        base_query = base_query.order_by(CaiTemporaryStore.name.asc())
-        results = engine.execute(base_query)
+        results = _execute_lookup(engine,
+                                  'iter_cai_assets',
+                                  parent_name=parent_name,
+                                  content_type=content_type,
+                                  asset_type=asset_type)
 
         for row in results:
             yield CaiDataAccess._extract_asset_data(row)
@@ -376,7 +669,8 @@ class CaiDataAccess(object):
     def fetch_cai_asset(content_type, asset_type, name, engine):
         """Returns a single resource from the cai temporary store.
 
-        Retries query on exception up to 5 times.
+        Retries query on exception up to 5 times. Results, including missing
+        resources, are kept in the LRU cache of the engine.
 
         Args:
             content_type (ContentTypes): The content type to return.
@@ -387,24 +681,45 @@ class CaiDataAccess(object):
         Returns:
             dict: The content data for the specified resource.
         """
-        base_query = CaiTemporaryStore.__table__.select()
-        filters = [
-            CaiTemporaryStore.content_type == content_type,
-            CaiTemporaryStore.asset_type == asset_type,
-            CaiTemporaryStore.name == name,
-        ]
-
-        for qry_filter in filters:
-            base_query = base_query.where(qry_filter)
-
-        results = engine.execute(base_query)
-        row = results.first()
+        cache = get_asset_cache(engine)
+        cache_key = (content_type, asset_type, name)
+        row = cache.get(cache_key)
+        if row is None:
+            row = CaiDataAccess._query_cai_asset(content_type, asset_type,
+                                                 name, engine)
+            cache.put(cache_key, row)
 
         if row:
             return CaiDataAccess._extract_asset_data(row)
 
         return {}, None
 
+    @staticmethod
+    def _query_cai_asset(content_type, asset_type, name, engine):
+        """Query a single resource from the cai temporary store.
+
+        Args:
+            content_type (ContentTypes): The content type to return.
+            asset_type (str): The asset type to return.
+            name (str): The resource to return.
+            engine (object): Database engine.
+
+        Returns:
+            dict: The columns of the row, or an empty dict if there is no
+                matching row.
+        """
+        results = _execute_lookup(engine,
+                                  'fetch_cai_asset',
+                                  content_type=content_type,
+                                  asset_type=asset_type,
+                                  name=name)
+        row = results.first()
+        if row:
+            return {'name': row['name'],
+                    'asset_type': row['asset_type'],
+                    'asset_data': row['asset_data']}
+        return {}
+
     @staticmethod
     def _extract_asset_data(row):
         """Extracts the data from the database row.
@@ -416,7 +731,7 @@ class CaiDataAccess(object):
             Tuple[dict, AssetMetadata]: The dict representation of the asset
                 data and an Asset metadata along with it.
         """
-        asset = json.loads(row['asset_data'])
+        asset = decode_asset_data(row['asset_data'])
         asset_metadata = AssetMetadata(cai_name=row['name'],
                                        cai_type=row['asset_type'])
 
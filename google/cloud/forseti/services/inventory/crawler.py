@@ -23,6 +23,7 @@ import time
 
 from future import standard_library
 from google.cloud.forseti.common.util import logger
+from google.cloud.forseti.services.inventory import cai_memory_storage
 from google.cloud.forseti.services.inventory import cai_temporary_storage
 from google.cloud.forseti.services.inventory.base import cai_gcp_client
 from google.cloud.forseti.services.inventory.base import cloudasset
@@ -123,7 +124,9 @@ class Crawler(crawler.Crawler):
             resource.get_billing_info(self.get_client())
             resource.get_enabled_apis(self.get_client())
             resource.get_kubernetes_service_config(self.get_client())
-            self.write(resource)
+            if not self.write(resource):
+                progresser.on_duplicate(resource)
+                return
         except Exception as e:
             LOGGER.exception(e)
             progresser.on_error(e)
@@ -144,8 +147,11 @@ class Crawler(crawler.Crawler):
 
         Args:
             resource (object): Resource to handle.
+
+        Returns:
+            bool: False if the storage skipped the resource as a duplicate.
         """
-        self.config.storage.write(resource)
+        return self.config.storage.write(resource)
 
     def get_client(self):
         """Get the GCP API client.
@@ -250,13 +256,20 @@ def _api_client_factory(config, threads, inventory_index_id):
     if config.get_cai_enabled():
         # TODO: When CAI supports resource exclusion, update the following
         #       method to handle resource exclusion during export time.
-        engine, tmpfile = cai_temporary_storage.create_sqlite_db(threads)
+        memory_cap = config.get_cai_memory_store_cap()
+        if memory_cap:
+            engine = cai_memory_storage.CaiMemoryStore(memory_cap, threads)
+        else:
+            engine, tmpfile = cai_temporary_storage.create_sqlite_db(threads)
         asset_count = cloudasset.load_cloudasset_data(
             engine,
             config,
             inventory_index_id)
         LOGGER.info('%s total assets loaded from Cloud Asset data.',
                     asset_count)
+        if memory_cap:
+            # Only set if the assets were moved to sqlite.
+            tmpfile = engine.tmpfile
 
         if asset_count:
             return cai_gcp_client.CaiApiClientImpl(client_config,
@@ -346,4 +359,6 @@ def run_crawler(storage,
     resource = _root_resource_factory(config, client)
 
     progresser = crawler_impl.run(resource)
+    if isinstance(client, cai_gcp_client.CaiApiClientImpl):
+        client.dao.log_query_stats(client.engine)
     return progresser
@@ -0,0 +1,211 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Duplicate detection for resources written to the inventory."""
+
+from builtins import object
+import hashlib
+import sys
+import threading
+
+from google.cloud.forseti.common.util import logger
+
+LOGGER = logger.get_logger(__name__)
+
+DEFAULT_SHARDS = 16
+
+# Size of a python int holding a 64 bit hash.
+_HASH_SIZE = sys.getsizeof(2 ** 63)
+
+
+class ResourceDedupe(object):
+    """Interface for detecting resources that were already written."""
+
+    def __init__(self):
+        """Initialize."""
+        self.duplicates = 0
+
+    def add(self, full_name):
+        """Not Implemented.
+
+        Args:
+            full_name (str): The full resource name.
+
+        Raises:
+            NotImplementedError: Because not implemented.
+        """
+        raise NotImplementedError()
+
+    def done(self, full_name):
+        """Mark a recorded resource as written to storage.
+
+        Args:
+            full_name (str): The full resource name.
+        """
+        pass
+
+    def memory_usage(self):
+        """Not Implemented.
+
+        Raises:
+            NotImplementedError: Because not implemented.
+        """
+        raise NotImplementedError()
+
+
+class ExactDedupe(ResourceDedupe):
+    """Keeps every full resource name in a single set."""
+
+    def __init__(self):
+        """Initialize."""
+        super(ExactDedupe, self).__init__()
+        self._lock = threading.Lock()
+        self._seen = set()
+        self._names_size = 0
+
+    def add(self, full_name):
+        """Record a full resource name.
+
+        Args:
+            full_name (str): The full resource name.
+
+        Returns:
+            bool: True if the name was not seen before, else False.
+        """
+        with self._lock:
+            if full_name in self._seen:
+                self.duplicates += 1
+                return False
+            self._seen.add(full_name)
+            self._names_size += sys.getsizeof(full_name)
+        return True
+
+    def memory_usage(self):
+        """Approximate memory held by the dedupe set.
+
+        Returns:
+            int: Size in bytes.
+        """
+        return sys.getsizeof(self._seen) + self._names_size
+
+
+class HashedDedupe(ResourceDedupe):
+    """Keeps 64 bit hashes of full resource names in sharded sets.
+
+    Each shard has its own lock so crawler threads rarely contend. A hash
+    match is treated as a duplicate, unless an exact_check callback is given,
+    in which case it is used to confirm the name was really written before.
+    Names that were added but not yet marked done are kept until then, so
+    the exact check also covers writes that are still in flight.
+    """
+
+    def __init__(self, shards=DEFAULT_SHARDS, exact_check=None):
+        """Initialize.
+
+        Args:
+            shards (int): Number of independently locked shards.
+            exact_check (function): Optional callback taking a full name and
+                returning True if it was already written.
+        """
+        super(HashedDedupe, self).__init__()
+        self._shards = [set() for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._exact_check = exact_check
+        self._pending = [set() for _ in range(shards)]
+        self.collisions = 0
+
+    @staticmethod
+    def _hash(full_name):
+        """Compute the 64 bit hash of a full resource name.
+
+        Args:
+            full_name (str): The full resource name.
+
+        Returns:
+            int: The hash.
+        """
+        digest = hashlib.blake2b(full_name.encode('utf-8'),
+                                 digest_size=8).digest()
+        return int.from_bytes(digest, 'big')
+
+    def add(self, full_name):
+        """Record a full resource name.
+
+        Args:
+            full_name (str): The full resource name.
+
+        Returns:
+            bool: True if the name was not seen before, else False.
+        """
+        name_hash = self._hash(full_name)
+        shard = name_hash % len(self._shards)
+        with self._locks[shard]:
+            if name_hash not in self._shards[shard]:
+                self._shards[shard].add(name_hash)
+                if self._exact_check:
+                    self._pending[shard].add(full_name)
+                return True
+
+            if (self._exact_check and
+                    full_name not in self._pending[shard] and
+                    not self._exact_check(full_name)):
+                self.collisions += 1
+                LOGGER.warning('Hash collision for %s, resource is not a '
+                               'duplicate.', full_name)
+                self._pending[shard].add(full_name)
+                return True
+
+            self.duplicates += 1
+            return False
+
+    def done(self, full_name):
+        """Mark a recorded resource as written to storage.
+
+        Args:
+            full_name (str): The full resource name.
+        """
+        if not self._exact_check:
+            return
+        shard = self._hash(full_name) % len(self._shards)
+        with self._locks[shard]:
+            self._pending[shard].discard(full_name)
+
+    def memory_usage(self):
+        """Approximate memory held by the hash shards.
+
+        Returns:
+            int: Size in bytes.
+        """
+        return sum(sys.getsizeof(shard) + len(shard) * _HASH_SIZE +
+                   sys.getsizeof(pending)
+                   for shard, pending in zip(self._shards, self._pending))
+
+
+def create_dedupe(dedupe_configs=None, exact_check=None):
+    """Create the dedupe implementation selected by the configuration.
+
+    Args:
+        dedupe_configs (dict): Dedupe settings from the inventory config.
+        exact_check (function): Callback confirming a name was written, used
+            by the hashed dedupe on collision if exact_on_collision is set.
+
+    Returns:
+        ResourceDedupe: The dedupe implementation.
+    """
+    dedupe_configs = dedupe_configs or {}
+    if dedupe_configs.get('type') == 'hashed':
+        if not dedupe_configs.get('exact_on_collision', True):
+            exact_check = None
+        return HashedDedupe(dedupe_configs.get('shards', DEFAULT_SHARDS),
+                            exact_check)
+    return ExactDedupe()
@@ -53,6 +53,8 @@ class Progress(object):
         self.step = step
         self.warnings = 0
         self.errors = 0
+        self.duplicates = 0
+        self.dedupe_memory_bytes = 0
         self.last_warning = ''
         self.last_error = ''
 
@@ -111,6 +113,16 @@ class QueueProgresser(Progress):
         self.errors += 1
         self._notify()
 
+    def on_duplicate(self, resource):
+        """Updates the counter of resources skipped as duplicates.
+
+        Args:
+            resource (Resource): db row of Resource
+        """
+
+        self.duplicates += 1
+        self._notify()
+
     def get_summary(self):
         """Indicate end of updates, and return self as last state.
 
@@ -192,6 +204,10 @@ def run_inventory(service_config,
             storage.error('Inventory raised an exception: %s' % message)
             storage.rollback()
         else:
+            result.dedupe_memory_bytes = storage.dedupe.memory_usage()
+            LOGGER.info('Skipped %s duplicate resources, dedupe memory usage '
+                        'is %s bytes.', storage.dedupe.duplicates,
+                        result.dedupe_memory_bytes)
             storage.commit()
             return result
 
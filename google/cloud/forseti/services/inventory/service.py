@@ -117,7 +117,9 @@ class GrpcInventory(inventory_pb2_grpc.InventoryServicer):
                 warnings=progress.warnings,
                 errors=progress.errors,
                 last_warning=last_warning,
-                last_error=last_error)
+                last_error=last_error,
+                duplicates=progress.duplicates,
+                dedupe_memory_bytes=progress.dedupe_memory_bytes)
 
     @autoclose_stream
     def List(self, request, _):
@@ -17,6 +17,7 @@ from builtins import object
 import json
 import enum
 import threading
+import time
 
 from sqlalchemy import and_
 from sqlalchemy import BigInteger
@@ -44,6 +45,7 @@ from google.cloud.forseti.common.util import logger
 from google.cloud.forseti.common.util.index_state import IndexState
 # pylint: disable=line-too-long
 from google.cloud.forseti.services import utils
+from google.cloud.forseti.services.inventory import dedupe
 from google.cloud.forseti.services.inventory.base.storage import Storage as BaseStorage
 from google.cloud.forseti.services.scanner.dao import ScannerIndex
 # pylint: enable=line-too-long
@@ -53,6 +55,10 @@ BASE = declarative_base()
 CURRENT_SCHEMA = 1
 PER_YIELD = 1024
 
+# Defaults for the buffered inventory writer.
+DEFAULT_MAX_BUFFERED_ROWS = 1000
+DEFAULT_FLUSH_INTERVAL = 5.0
+
 
 class Categories(enum.Enum):
     """Inventory Categories."""
@@ -830,19 +836,20 @@ def initialize(engine):
 class Storage(BaseStorage):
     """Inventory storage used during creation."""
 
-    def __init__(self, session, engine):
+    def __init__(self, session, engine, dedupe_configs=None):
         """Initialize
 
         Args:
             session (object): db session.
             engine (sqlalchemy.engine.Engine): db engine.
+            dedupe_configs (dict): Settings for duplicate resource detection.
         """
         self.session = session
         self.engine = engine
         self.opened = False
         self.inventory_index = None
         self.session_completed = False
-        self._wrote_resources = set()
+        self.dedupe = dedupe.create_dedupe(dedupe_configs, self._is_stored)
         self._storage_lock = threading.Lock()
 
     def _require_opened(self):
@@ -973,21 +980,63 @@ class Storage(BaseStorage):
 
         self.opened = False
 
+    def _is_stored(self, full_name):
+        """Check the database for a resource written to this inventory.
+
+        Used by the hashed dedupe to resolve hash collisions.
+
+        Args:
+            full_name (str): The full resource name.
+
+        Returns:
+            bool: True if the resource is stored in this inventory.
+        """
+        return self.engine.execute(select([exists().where(and_(
+            Inventory.inventory_index_id == self.inventory_index.id,
+            Inventory.category == Categories.resource,
+            Inventory.full_name == full_name
+        ))])).scalar()
+
+    def _is_duplicate(self, resource):
+        """Check if the resource was already written and record it if not.
+
+        Args:
+            resource (object): Resource object to check.
+
+        Returns:
+            bool: True if the resource was written before and should be
+                skipped.
+        """
+        if self.dedupe.add(resource.get_full_resource_name()):
+            return False
+        LOGGER.warning('Duplicate Resource in inventory, skipping %s',
+                       resource.get_full_resource_name())
+        return True
+
     def write(self, resource):
         """Write a resource to the storage and updates its row
 
         Args:
             resource (object): Resource object to store in db.
+
+        Returns:
+            bool: False if the resource was skipped as a duplicate.
         """
-        # Use a lock to quickly check if this is a duplicate resource before
-        # updating the cache and proceeding.
-        with self._storage_lock:
-            if resource.get_full_resource_name() in self._wrote_resources:
-                LOGGER.warning('Duplicate Resource in inventory, skipping %s',
-                               resource.get_full_resource_name())
-                return
-            self._wrote_resources.add(resource.get_full_resource_name())
+        if self._is_duplicate(resource):
+            return False
 
+        try:
+            self._write_rows(resource)
+        finally:
+            self.dedupe.done(resource.get_full_resource_name())
+        return True
+
+    def _write_rows(self, resource):
+        """Insert the rows for a resource and its policies.
+
+        Args:
+            resource (object): Resource object to store in db.
+        """
         (resource_row, policy_rows) = Inventory.from_resource(
             self.inventory_index, resource)
 
@@ -1048,3 +1097,181 @@ class Storage(BaseStorage):
         """
 
         self.close()
+
+
+class InventoryIdSequence(object):
+    """Client side sequence of primary keys for the gcp_inventory table.
+
+    The sequence is seeded once from the highest id already stored, after
+    which ids are handed out from memory. This lets the buffered storage set
+    the inventory key on a resource before its row is inserted. Inventories
+    are created one at a time by the server, so no other writer allocates
+    gcp_inventory ids while the sequence is in use.
+    """
+
+    def __init__(self, engine):
+        """Initialize
+
+        Args:
+            engine (sqlalchemy.engine.Engine): db engine to seed from.
+        """
+        self._lock = threading.Lock()
+        self._next_id = (engine.execute(
+            select([func.max(Inventory.id)])).scalar() or 0) + 1
+
+    def next_id(self):
+        """Allocate the next primary key.
+
+        Returns:
+            int: The allocated id.
+        """
+        with self._lock:
+            allocated = self._next_id
+            self._next_id += 1
+        return allocated
+
+
+class BufferedStorage(Storage):
+    """Inventory storage that writes resources in multi-row batches.
+
+    Primary keys are allocated client side so set_inventory_key still works
+    before a row is written. Rows are buffered in memory and flushed when the
+    buffer is full, when flush_interval seconds have passed since the last
+    flush, and on commit.
+    """
+
+    def __init__(self,
+                 session,
+                 engine,
+                 dedupe_configs=None,
+                 max_buffered_rows=DEFAULT_MAX_BUFFERED_ROWS,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        """Initialize
+
+        Args:
+            session (object): db session.
+            engine (sqlalchemy.engine.Engine): db engine.
+            dedupe_configs (dict): Settings for duplicate resource detection.
+            max_buffered_rows (int): Rows to buffer before flushing.
+            flush_interval (float): Max seconds between flushes.
+        """
+        super(BufferedStorage, self).__init__(session, engine, dedupe_configs)
+        self.max_buffered_rows = max_buffered_rows
+        self.flush_interval = flush_interval
+        self._id_sequence = None
+        self._buffer = []
+        # Full names of the buffered resources, done in the dedupe once their
+        # rows are inserted so duplicates are caught while they are pending.
+        self._buffered_names = []
+        self._last_flush = time.time()
+        self._flush_lock = threading.Lock()
+
+    def open(self, handle=None):
+        """Open the storage, potentially create a new index.
+
+        Args:
+            handle (str): If None, create a new index instead
+                of opening an existing one.
+
+        Returns:
+            str: Index id of the opened or created inventory.
+        """
+        inventory_index_id = super(BufferedStorage, self).open(handle)
+        self._id_sequence = InventoryIdSequence(self.engine)
+        return inventory_index_id
+
+    def write(self, resource):
+        """Buffer a resource and its policies for a batched insert.
+
+        The resource stays pending in the dedupe until its rows are inserted
+        by a flush.
+
+        Args:
+            resource (object): Resource object to store in db.
+
+        Returns:
+            bool: False if the resource was skipped as a duplicate.
+        """
+        if self._is_duplicate(resource):
+            return False
+
+        try:
+            self._write_rows(resource)
+        except Exception:
+            self.dedupe.done(resource.get_full_resource_name())
+            raise
+        return True
+
+    def _write_rows(self, resource):
+        """Buffer a resource and its policies for a batched insert.
+
+        Args:
+            resource (object): Resource object to store in db.
+        """
+        self._require_opened()
+        (resource_row, policy_rows) = Inventory.from_resource(
+            self.inventory_index, resource)
+
+        resource_id = self._id_sequence.next_id()
+        resource_row['id'] = resource_id
+        resource.set_inventory_key(resource_id)
+
+        rows = [resource_row]
+        for row in policy_rows:
+            row['id'] = self._id_sequence.next_id()
+            row['parent_id'] = resource_id
+            # All rows in a multi-row insert must have the same columns.
+            row['inventory_errors'] = None
+            rows.append(row)
+
+        with self._storage_lock:
+            self._buffer.extend(rows)
+            self._buffered_names.append(resource.get_full_resource_name())
+            self.inventory_index.counter += len(rows)
+            should_flush = (
+                len(self._buffer) >= self.max_buffered_rows or
+                time.time() - self._last_flush >= self.flush_interval)
+
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        """Insert all buffered rows into the database."""
+        with self._storage_lock:
+            rows = self._buffer
+            names = self._buffered_names
+            self._buffer = []
+            self._buffered_names = []
+            self._last_flush = time.time()
+
+        if not rows:
+            return
+
+        try:
+            # Serialize the inserts, SQLite only supports a single writer.
+            with self._flush_lock:
+                self.engine.execute(Inventory.__table__.insert(), rows)
+        finally:
+            for name in names:
+                self.dedupe.done(name)
+        LOGGER.debug('Flushed %s rows to the inventory.', len(rows))
+
+    def rollback(self):
+        """Drop the buffered rows and roll back the stored inventory."""
+        with self._storage_lock:
+            names = self._buffered_names
+            self._buffer = []
+            self._buffered_names = []
+        for name in names:
+            self.dedupe.done(name)
+        super(BufferedStorage, self).rollback()
+
+    def commit(self):
+        """Flush the buffered rows and commit the stored inventory."""
+        try:
+            self.flush()
+        except Exception as e:  # pylint: disable=broad-except
+            LOGGER.exception(e)
+            self.inventory_index.set_error(
+                'Failed to write buffered inventory rows: %s' % e)
+        super(BufferedStorage, self).commit()
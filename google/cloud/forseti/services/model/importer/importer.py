@@ -17,16 +17,26 @@
 # pylint: disable=too-many-instance-attributes
 
 from builtins import object
+import functools
+import hashlib
 import json
 from io import StringIO
 import traceback
 
 from future import standard_library
+from sqlalchemy import bindparam
+from sqlalchemy import func
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 
 from google.cloud.forseti.common.util import logger
+from google.cloud.forseti.services import db
 from google.cloud.forseti.services.inventory.storage import Categories
 from google.cloud.forseti.services.inventory.storage import DataAccess
+from google.cloud.forseti.services.model.importer.scheduler import (
+    ImportPhase)
+from google.cloud.forseti.services.model.importer.scheduler import (
+    ImportScheduler)
 from google.cloud.forseti.services.utils import get_resource_id_from_type_name
 from google.cloud.forseti.services.utils import get_sql_dialect
 from google.cloud.forseti.services.utils import to_full_resource_name
@@ -122,9 +132,34 @@ GROUPS_SETTINGS_LIST = [
     'gsuite_groups_settings',
 ]
 
+# Number of resource rows written per bulk insert.
+RESOURCE_BATCH_SIZE = 5000
+
+# Import phases writing resource rows.
+RESOURCE_PHASES = ['resources', 'roles', 'dataset_policies', 'gcs_policies',
+                   'service_configs', 'enabled_apis', 'iam_policies']
+
+# Resource columns compared to find the changes since a base model.
+RESOURCE_HASH_COLUMNS = [
+    'cai_resource_name',
+    'cai_resource_type',
+    'full_name',
+    'parent_type_name',
+    'name',
+    'type',
+    'policy_update_counter',
+    'display_name',
+    'email',
+    'data',
+]
+
 
 class ResourceCache(dict):
-    """Resource cache."""
+    """Resource cache.
+
+    Maps the inventory id of a resource to the (type_name, full_name) of its
+    model row, all that is needed to store its children.
+    """
 
     def __setitem__(self, key, value):
         """Overriding to assert the keys does not exist previously.
@@ -216,6 +251,7 @@ class InventoryImporter(object):
         self.role_cache = {}
         self.permission_cache = {}
         self.resource_cache = ResourceCache()
+        self.resource_rows = []
         self.membership_items = []
         self.membership_map = {}  # Maps group_name to {member_name}
         self.member_cache = {}
@@ -233,8 +269,22 @@ class InventoryImporter(object):
                 'Unexpected SQLAlchemyError occurred during model creation.')
             self.session.rollback()
 
+    def _write_resource_rows(self):
+        """Bulk insert the pending resource rows with rollback on errors."""
+        if not self.resource_rows:
+            return
+        rows, self.resource_rows = self.resource_rows, []
+        try:
+            self.session.execute(self.dao.TBL_RESOURCE.__table__.insert(),
+                                 rows)
+        except SQLAlchemyError:
+            LOGGER.exception(
+                'Unexpected SQLAlchemyError occurred during model creation.')
+            self.session.rollback()
+
     def _commit_session(self):
         """Commit the session with rollback on errors."""
+        self._write_resource_rows()
         try:
             self.session.commit()
         except SQLAlchemyError:
@@ -262,8 +312,7 @@ class InventoryImporter(object):
 
             description = {
                 'source': 'inventory',
-                'source_info': {
-                    'inventory_index_id': self.inventory_index_id},
+                'source_info': self._source_info(),
                 'source_root': self._type_name(root),
                 'pristine': True,
                 'gsuite_enabled': DataAccess.type_exists(
@@ -281,100 +330,36 @@ class InventoryImporter(object):
                 LOGGER.debug('Root resource is not organization: %s.', root)
 
             item_counter = 0
-            LOGGER.debug('Start storing resources into models.')
-            for resource in DataAccess.iter(self.readonly_session,
-                                            self.inventory_index_id,
-                                            GCP_TYPE_LIST):
-                item_counter += 1
-                self._store_resource(resource)
-                if not item_counter % 1000:
-                    # Flush database every 1000 resources
-                    LOGGER.debug('Flushing model write session: %s',
-                                 item_counter)
-                    self._flush_session()
-                if not item_counter % 100000:
-                    # Commit every 100k resources while iterating
-                    # through all the resources.
-                    LOGGER.debug('Commiting model write session: %s',
-                                 item_counter)
-                    self._commit_session()
-            self._commit_session()
-            LOGGER.debug('Finished storing resources into models.')
-
-            item_counter += self.model_action_wrapper(
-                DataAccess.iter(self.readonly_session,
-                                self.inventory_index_id,
-                                ['role']),
-                self._convert_role
-            )
-
-            item_counter += self.model_action_wrapper(
-                DataAccess.iter(self.readonly_session,
-                                self.inventory_index_id,
-                                GCP_TYPE_LIST,
-                                fetch_category=Categories.dataset_policy),
-                self._convert_dataset_policy
-            )
-
-            item_counter += self.model_action_wrapper(
-                DataAccess.iter(self.readonly_session,
-                                self.inventory_index_id,
-                                GCP_TYPE_LIST,
-                                fetch_category=Categories.gcs_policy),
-                self._convert_gcs_policy
-            )
-
-            item_counter += self.model_action_wrapper(
-                DataAccess.iter(
-                    self.readonly_session,
-                    self.inventory_index_id,
-                    GCP_TYPE_LIST,
-                    fetch_category=Categories.kubernetes_service_config),
-                self._convert_service_config
-            )
-
-            self.model_action_wrapper(
-                DataAccess.iter(self.readonly_session,
-                                self.inventory_index_id,
-                                GSUITE_TYPE_LIST),
-                self._store_gsuite_principal
-            )
-
-            self.model_action_wrapper(
-                DataAccess.iter(self.readonly_session,
-                                self.inventory_index_id,
-                                GCP_TYPE_LIST,
-                                fetch_category=Categories.enabled_apis),
-                self._convert_enabled_apis
-            )
-
-            self.model_action_wrapper(
-                DataAccess.iter(self.readonly_session,
-                                self.inventory_index_id,
-                                MEMBER_TYPE_LIST,
-                                with_parent=True),
-                self._store_gsuite_membership,
-                post_action=self._store_gsuite_membership_post
-            )
-
-            self.model_action_wrapper(
-                DataAccess.iter(self.readonly_session,
-                                self.inventory_index_id,
-                                GROUPS_SETTINGS_LIST),
-                self._store_groups_settings
-            )
-
-            self.dao.denorm_group_in_group(self.session)
-
-            self.model_action_wrapper(
-                DataAccess.iter(self.readonly_session,
-                                self.inventory_index_id,
-                                GCP_TYPE_LIST,
-                                fetch_category=Categories.iam_policy),
-                self._store_iam_policy
-            )
-
-            self.dao.expand_special_members(self.session)
+            if get_sql_dialect(self.readonly_session) == 'sqlite':
+                # SQLite locks the database file for the duration of each
+                # read, which would block the model writer.
+                scheduler = ImportScheduler(self._import_phases())
+            else:
+                engine = self.readonly_session.bind
+                scheduler = ImportScheduler(
+                    self._import_phases(),
+                    session_factory=lambda: db.create_readonly_session(engine))
+
+            def write_phase(phase, rows):
+                """Write one import phase to the model.
+
+                Args:
+                    phase (ImportPhase): The phase to write.
+                    rows (iterable): The inventory rows of the phase.
+                """
+                nonlocal item_counter
+                if rows is None:
+                    phase.action()
+                    return
+                count = self.model_action_wrapper(
+                    rows,
+                    phase.action,
+                    post_action=phase.post_action,
+                    commit_count=phase.commit_count)
+                if phase.counted:
+                    item_counter += count
+
+            scheduler.run(write_phase, self.readonly_session)
 
         except Exception as e:  # pylint: disable=broad-except
             LOGGER.exception(e)
@@ -397,6 +382,115 @@ class InventoryImporter(object):
             self.session.autoflush = autoflush
     # pylint: enable=too-many-statements
 
+    def _source_info(self):
+        """Describe the source of the model.
+
+        Returns:
+            dict: The source info of the model description.
+        """
+        return {'inventory_index_id': self.inventory_index_id}
+
+    def _denorm_group_in_group(self):
+        """Denormalize the group-in-group relation of the model."""
+        self.dao.denorm_group_in_group(self.session)
+
+    def _denorm_resource_ancestry(self):
+        """Denormalize the resource hierarchy of the model."""
+        self._write_resource_rows()
+        self.dao.denorm_resource_ancestry(self.session)
+
+    def _fetch(self, type_list, **kwargs):
+        """Create the fetch function of an import phase.
+
+        Args:
+            type_list (list): List of types to iterate over.
+            **kwargs (dict): Additional arguments to DataAccess.iter.
+
+        Returns:
+            func: Called with a session, iterates the inventory rows.
+        """
+        return functools.partial(DataAccess.iter,
+                                 inventory_index_id=self.inventory_index_id,
+                                 type_list=type_list,
+                                 **kwargs)
+
+    def _import_phases(self):
+        """The phases of the import and their dependencies.
+
+        Resources must be written before anything that is parented by them,
+        and IAM policies once all roles and members are known.
+
+        Returns:
+            list: The ImportPhases, in the order they were always run.
+        """
+        return [
+            ImportPhase('resources',
+                        self._store_resource,
+                        fetch=self._fetch(GCP_TYPE_LIST),
+                        commit_count=100000,
+                        counted=True),
+            ImportPhase('roles',
+                        self._convert_role,
+                        depends_on=['resources'],
+                        fetch=self._fetch(['role']),
+                        counted=True),
+            ImportPhase('dataset_policies',
+                        self._convert_dataset_policy,
+                        depends_on=['resources'],
+                        fetch=self._fetch(
+                            GCP_TYPE_LIST,
+                            fetch_category=Categories.dataset_policy),
+                        counted=True),
+            ImportPhase('gcs_policies',
+                        self._convert_gcs_policy,
+                        depends_on=['resources'],
+                        fetch=self._fetch(
+                            GCP_TYPE_LIST,
+                            fetch_category=Categories.gcs_policy),
+                        counted=True),
+            ImportPhase('service_configs',
+                        self._convert_service_config,
+                        depends_on=['resources'],
+                        fetch=self._fetch(
+                            GCP_TYPE_LIST,
+                            fetch_category=(
+                                Categories.kubernetes_service_config)),
+                        counted=True),
+            ImportPhase('gsuite_principals',
+                        self._store_gsuite_principal,
+                        fetch=self._fetch(GSUITE_TYPE_LIST)),
+            ImportPhase('enabled_apis',
+                        self._convert_enabled_apis,
+                        depends_on=['resources'],
+                        fetch=self._fetch(
+                            GCP_TYPE_LIST,
+                            fetch_category=Categories.enabled_apis)),
+            ImportPhase('memberships',
+                        self._store_gsuite_membership,
+                        depends_on=['gsuite_principals'],
+                        fetch=self._fetch(MEMBER_TYPE_LIST, with_parent=True),
+                        post_action=self._store_gsuite_membership_post),
+            ImportPhase('groups_settings',
+                        self._store_groups_settings,
+                        fetch=self._fetch(GROUPS_SETTINGS_LIST)),
+            ImportPhase('group_in_group',
+                        self._denorm_group_in_group,
+                        depends_on=['memberships']),
+            ImportPhase('iam_policies',
+                        self._store_iam_policy,
+                        depends_on=['resources', 'roles', 'gsuite_principals',
+                                    'memberships', 'group_in_group'],
+                        fetch=self._fetch(
+                            GCP_TYPE_LIST,
+                            fetch_category=Categories.iam_policy)),
+            ImportPhase('special_members',
+                        lambda: self.dao.expand_special_members(self.session),
+                        depends_on=['iam_policies']),
+            ImportPhase('resource_ancestry',
+                        self._denorm_resource_ancestry,
+                        depends_on=RESOURCE_PHASES),
+        ]
+
     def model_action_wrapper(self,
                              inventory_iterable,
                              action,
@@ -716,12 +810,10 @@ class InventoryImporter(object):
         else:
             parent, full_res_name, type_name = self._full_resource_name(
                 resource)
-        row = self.dao.TBL_RESOURCE(
-            cai_resource_name=resource.get_cai_resource_name(),
-            cai_resource_type=resource.get_cai_resource_type(),
+        row = self._add_resource_row(
+            resource,
             full_name=full_res_name,
             type_name=type_name,
-            name=resource.get_resource_id(),
             type=resource.get_resource_type(),
             # display_key key is not present for org policy and display_name is
             # needed. So it is specifically passed in.
@@ -729,10 +821,8 @@ class InventoryImporter(object):
             # email_key key is not always present and it can be empty in
             # certain cases such as for org policy.
             email=data.get(email_key, '') if isinstance(data, dict) else '',
-            data=resource.get_resource_data_raw(),
-            parent=parent)
+            parent_type_name=parent)
 
-        self.session.add(row)
         if cached:
             self._add_to_cache(row, resource.id)
 
@@ -1045,25 +1135,20 @@ class InventoryImporter(object):
         data = cloudsqlinstance.get_resource_data()
         parent, full_res_name, type_name = self._full_resource_name(
             cloudsqlinstance)
-        parent_key = get_resource_id_from_type_name(parent.type_name)
+        parent_key = get_resource_id_from_type_name(parent)
         resource_identifier = '{}:{}'.format(parent_key,
                                              cloudsqlinstance.get_resource_id())
         type_name = to_type_name(cloudsqlinstance.get_resource_type(),
                                  resource_identifier)
 
-        resource = self.dao.TBL_RESOURCE(
-            cai_resource_name=cloudsqlinstance.get_cai_resource_name(),
-            cai_resource_type=cloudsqlinstance.get_cai_resource_type(),
+        self._add_resource_row(
+            cloudsqlinstance,
             full_name=full_res_name,
             type_name=type_name,
-            name=cloudsqlinstance.get_resource_id(),
             type=cloudsqlinstance.get_resource_type(),
             display_name=data.get('name', ''),
             email=data.get('email', ''),
-            data=cloudsqlinstance.get_resource_data_raw(),
-            parent=parent)
-
-        self.session.add(resource)
+            parent_type_name=parent)
 
     def _convert_dataset_policy(self, dataset_policy):
         """Convert a dataset policy to a database object.
@@ -1078,17 +1163,12 @@ class InventoryImporter(object):
             dataset_policy.get_category(),
             dataset_policy.get_resource_id())
         policy_res_name = to_full_resource_name(full_res_name, policy_type_name)
-        resource = self.dao.TBL_RESOURCE(
-            cai_resource_name=dataset_policy.get_cai_resource_name(),
-            cai_resource_type=dataset_policy.get_cai_resource_type(),
+        self._add_resource_row(
+            dataset_policy,
             full_name=policy_res_name,
             type_name=policy_type_name,
-            name=dataset_policy.get_resource_id(),
             type=dataset_policy.get_category(),
-            data=dataset_policy.get_resource_data_raw(),
-            parent=parent)
-
-        self.session.add(resource)
+            parent_type_name=parent)
 
     def _convert_enabled_apis(self, enabled_apis):
         """Convert a description of enabled APIs to a database object.
@@ -1099,19 +1179,14 @@ class InventoryImporter(object):
         parent, full_res_name = self._get_parent(enabled_apis)
         apis_type_name = to_type_name(
             enabled_apis.get_category(),
-            ':'.join(parent.type_name.split('/')))
+            ':'.join(parent.split('/')))
         apis_res_name = to_full_resource_name(full_res_name, apis_type_name)
-        resource = self.dao.TBL_RESOURCE(
-            cai_resource_name=enabled_apis.get_cai_resource_name(),
-            cai_resource_type=enabled_apis.get_cai_resource_type(),
+        self._add_resource_row(
+            enabled_apis,
             full_name=apis_res_name,
             type_name=apis_type_name,
-            name=enabled_apis.get_resource_id(),
             type=enabled_apis.get_category(),
-            data=enabled_apis.get_resource_data_raw(),
-            parent=parent)
-
-        self.session.add(resource)
+            parent_type_name=parent)
 
     def _convert_gcs_policy(self, gcs_policy):
         """Convert a gcs policy to a database object.
@@ -1124,17 +1199,12 @@ class InventoryImporter(object):
             gcs_policy.get_category(),
             gcs_policy.get_resource_id())
         policy_res_name = to_full_resource_name(full_res_name, policy_type_name)
-        resource = self.dao.TBL_RESOURCE(
-            cai_resource_name=gcs_policy.get_cai_resource_name(),
-            cai_resource_type=gcs_policy.get_cai_resource_type(),
+        self._add_resource_row(
+            gcs_policy,
             full_name=policy_res_name,
             type_name=policy_type_name,
-            name=gcs_policy.get_resource_id(),
             type=gcs_policy.get_category(),
-            data=gcs_policy.get_resource_data_raw(),
-            parent=parent)
-
-        self.session.add(resource)
+            parent_type_name=parent)
 
     def _convert_iam_policy(self, iam_policy):
         """Convert an IAM policy to a database object.
@@ -1150,18 +1220,13 @@ class InventoryImporter(object):
         iam_policy_full_res_name = to_full_resource_name(
             full_res_name,
             iam_policy_type_name)
-        resource = self.dao.TBL_RESOURCE(
-            cai_resource_name=iam_policy.get_cai_resource_name(),
-            cai_resource_type=iam_policy.get_cai_resource_type(),
+        self._add_resource_row(
+            iam_policy,
             full_name=iam_policy_full_res_name,
             type_name=iam_policy_type_name,
-            name=iam_policy.get_resource_id(),
             type=iam_policy.get_category(),
-            data=iam_policy.get_resource_data_raw(),
             parent_type_name=parent_type_name)
 
-        self.session.add(resource)
-
     def _convert_role(self, role):
         """Convert a role to a database object.
 
@@ -1205,19 +1270,15 @@ class InventoryImporter(object):
 
         if is_custom:
             parent, full_res_name, type_name = self._full_resource_name(role)
-            role_resource = self.dao.TBL_RESOURCE(
-                cai_resource_name=role.get_cai_resource_name(),
-                cai_resource_type=role.get_cai_resource_type(),
+            role_resource = self._add_resource_row(
+                role,
                 full_name=full_res_name,
                 type_name=type_name,
-                name=role.get_resource_id(),
                 type=role.get_resource_type(),
                 display_name=data.get('title'),
-                data=role.get_resource_data_raw(),
-                parent=parent)
+                parent_type_name=parent)
 
             self._add_to_cache(role_resource, role.id)
-            self.session.add(role_resource)
             LOGGER.debug('Adding role resource :%s to session', role_name)
             LOGGER.debug('Role resource :%s', role_resource)
 
@@ -1236,19 +1297,14 @@ class InventoryImporter(object):
         parent, full_res_name = self._get_parent(service_config)
         sc_type_name = to_type_name(
             service_config.get_category(),
-            parent.type_name)
+            parent)
         sc_res_name = to_full_resource_name(full_res_name, sc_type_name)
-        resource = self.dao.TBL_RESOURCE(
-            cai_resource_name=service_config.get_cai_resource_name(),
-            cai_resource_type=service_config.get_cai_resource_type(),
+        self._add_resource_row(
+            service_config,
             full_name=sc_res_name,
             type_name=sc_type_name,
-            name=service_config.get_resource_id(),
             type=service_config.get_category(),
-            data=service_config.get_resource_data_raw(),
-            parent=parent)
-
-        self.session.add(resource)
+            parent_type_name=parent)
 
     def _convert_bigquery_table(self, table):
         """Convert a table to a database object.
@@ -1259,26 +1315,63 @@ class InventoryImporter(object):
 
         self._convert_resource(table, cached=True)
 
-    def _add_to_cache(self, resource, resource_id):
+    # pylint: disable=redefined-builtin
+    def _add_resource_row(self, resource, full_name, type_name, type,
+                          parent_type_name, display_name='', email=''):
+        """Queue a resource row for the next bulk insert.
+
+        Args:
+            resource (object): The inventory resource to store.
+            full_name (str): Full resource name of the row.
+            type_name (str): Type name of the row.
+            type (str): Type of the row.
+            parent_type_name (str): Type name of the parent row, if any.
+            display_name (str): Display name of the row.
+            email (str): Email associated with the row.
+
+        Returns:
+            dict: The resource row.
+        """
+        row = {
+            'cai_resource_name': resource.get_cai_resource_name(),
+            'cai_resource_type': resource.get_cai_resource_type(),
+            'full_name': full_name,
+            'type_name': type_name,
+            'parent_type_name': parent_type_name,
+            'name': resource.get_resource_id(),
+            'type': type,
+            'policy_update_counter': 0,
+            'display_name': display_name,
+            'email': email,
+            'data': resource.get_resource_data_raw(),
+        }
+        self.resource_rows.append(row)
+        if len(self.resource_rows) >= RESOURCE_BATCH_SIZE:
+            self._write_resource_rows()
+        return row
+    # pylint: enable=redefined-builtin
+
+    def _add_to_cache(self, row, resource_id):
         """Add a resource to the cache for parent lookup.
 
         Args:
-            resource (object): Resource to put in the cache.
+            row (dict): Resource row to put in the cache.
             resource_id (int): The database key for the resource.
         """
 
-        full_res_name = resource.full_name
-        self.resource_cache[resource_id] = (resource, full_res_name)
+        self.resource_cache[resource_id] = (row['type_name'],
+                                            row['full_name'])
 
     def _full_resource_name(self, resource):
-        """Returns the parent object, full resource name and type name.
+        """Returns the parent type name, full resource name and type name.
 
         Args:
             resource (object): Resource whose full resource name and parent
             should be returned.
 
         Returns:
-            str: full resource name for the provided resource.
+            tuple: parent type name, full resource name and type name for the
+                provided resource.
         """
 
         type_name = self._type_name(resource)
@@ -1287,13 +1380,13 @@ class InventoryImporter(object):
         return parent, full_resource_name, type_name
 
     def _get_parent(self, resource):
-        """Return the parent object for a resource from cache.
+        """Return the parent of a resource from cache.
 
         Args:
             resource (object): Resource whose parent to look for.
 
         Returns:
-            tuple: cached object and full resource name
+            tuple: parent type name and full resource name
         """
         parent_id = resource.get_parent_id()
         return self.resource_cache[parent_id]
@@ -1331,6 +1424,216 @@ class InventoryImporter(object):
             resource.get_resource_id())
 
 
+class IncrementalImporter(InventoryImporter):
+    """Imports data from Inventory, reusing the tables of a base model.
+
+    The resources of the base model are copied in bulk, and the converted
+    inventory resources are diffed against them by type name and a hash of
+    their content, so only the added, changed and removed rows are written.
+    The group-in-group relation is copied as well and only re-denormalized
+    for the groups whose membership changed. Roles, members and bindings are
+    imported as usual.
+    """
+
+    def __init__(self,
+                 session,
+                 readonly_session,
+                 model,
+                 dao,
+                 service_config,
+                 inventory_index_id,
+                 *args,
+                 **kwargs):
+        """Create an importer which updates a copy of a base model.
+
+        Args:
+            session (Session): Database session.
+            readonly_session (Session): Database session (read-only).
+            model (Model): Model object.
+            dao (object): Data Access Object from dao.py
+            service_config (ServiceConfig): Service configuration.
+            inventory_index_id (int64): Inventory id to import from
+            *args (list): Unused.
+            **kwargs (dict): Must contain base_model, the handle of the
+                model to start from.
+        """
+        self.base_model = kwargs.pop('base_model')
+        super(IncrementalImporter, self).__init__(
+            session, readonly_session, model, dao, service_config,
+            inventory_index_id, *args, **kwargs)
+        self.base_dao = None
+        # Maps the type name of each base resource not yet seen in the
+        # inventory to the hash of its row and its depth.
+        self.base_resources = {}
+
+    def _source_info(self):
+        """Describe the source of the model.
+
+        Returns:
+            dict: The source info of the model description.
+        """
+        source_info = super(IncrementalImporter, self)._source_info()
+        source_info['base_model'] = self.base_model
+        return source_info
+
+    def _import_phases(self):
+        """The phases of the import and their dependencies.
+
+        The base model is copied first and the removed resources are deleted
+        once all resource rows were written.
+
+        Returns:
+            list: The ImportPhases, in the order they were always run.
+        """
+        phases = super(IncrementalImporter, self)._import_phases()
+        for phase in phases:
+            phase.depends_on |= {'base_model'}
+            if phase.name == 'resource_ancestry':
+                phase.depends_on |= {'removed_resources'}
+        return ([ImportPhase('base_model', self._copy_base_model)] +
+                phases +
+                [ImportPhase('removed_resources',
+                             self._delete_removed_resources,
+                             depends_on=RESOURCE_PHASES)])
+
+    @staticmethod
+    def _row_hash(row):
+        """Hash the content of a resource row.
+
+        Args:
+            row (dict): The resource row.
+
+        Returns:
+            bytes: The hash of the row.
+        """
+        content = [row[column] for column in RESOURCE_HASH_COLUMNS]
+        return hashlib.sha1(json.dumps(content).encode()).digest()
+
+    def _copy_base_model(self):
+        """Copy the resources of the base model and index them by hash.
+
+        Raises:
+            ValueError: If the base model is not usable.
+        """
+        model_manager = self.service_config.model_manager
+        base_model = model_manager.model(self.base_model)
+        if base_model.state not in ['SUCCESS', 'PARTIAL_SUCCESS']:
+            raise ValueError('Base model {} is not usable, state: {}'.format(
+                self.base_model, base_model.state))
+        _, self.base_dao = model_manager.get(self.base_model)
+
+        base_table = self.base_dao.TBL_RESOURCE.__table__
+        table = self.dao.TBL_RESOURCE.__table__
+        columns = [column.name for column in table.columns]
+        # Parents have shorter full names than their children, copying them
+        # first keeps the parent foreign key valid.
+        self.session.execute(table.insert().from_select(
+            columns,
+            select([base_table.c[column] for column in columns]).order_by(
+                func.length(base_table.c.full_name))))
+
+        rows = self.session.execute(
+            select([base_table.c[column] for column in columns])
+            .execution_options(stream_results=True))
+        for row in rows:
+            row = dict(row)
+            self.base_resources[row['type_name']] = (
+                self._row_hash(row), row['full_name'].count('/'))
+        LOGGER.info('Copied %i resources from base model %s.',
+                    len(self.base_resources), self.base_model)
+        self._commit_session()
+
+    def _write_resource_rows(self):
+        """Write the pending resource rows that differ from the base model."""
+        if not self.resource_rows:
+            return
+        rows, self.resource_rows = self.resource_rows, []
+        inserts = []
+        updates = []
+        for row in rows:
+            base = self.base_resources.pop(row['type_name'], None)
+            if not base:
+                inserts.append(row)
+            elif base[0] != self._row_hash(row):
+                row = dict(row)
+                row['b_type_name'] = row['type_name']
+                updates.append(row)
+
+        table = self.dao.TBL_RESOURCE.__table__
+        try:
+            # New rows first, they may be the new parent of changed rows.
+            if inserts:
+                self.session.execute(table.insert(), inserts)
+            if updates:
+                self.session.execute(
+                    table.update().where(
+                        table.c.type_name == bindparam('b_type_name')),
+                    updates)
+        except SQLAlchemyError:
+            LOGGER.exception(
+                'Unexpected SQLAlchemyError occurred during model creation.')
+            self.session.rollback()
+
+    def _delete_removed_resources(self):
+        """Delete the base resources that are not in the inventory anymore."""
+        # Children before their parents, for the parent foreign key.
+        removed = sorted(self.base_resources,
+                         key=lambda name: -self.base_resources[name][1])
+        LOGGER.info('Deleting %i resources removed since base model %s.',
+                    len(removed), self.base_model)
+        table = self.dao.TBL_RESOURCE.__table__
+        for i in range(0, len(removed), RESOURCE_BATCH_SIZE):
+            self.session.execute(table.delete().where(
+                table.c.type_name.in_(removed[i:i + RESOURCE_BATCH_SIZE])))
+        self.base_resources = {}
+        self._commit_session()
+
+    def _denorm_group_in_group(self):
+        """Copy the base group-in-group relation and update changed groups.
+
+        A group is re-denormalized if its direct group members changed, or if
+        it is an ancestor of such a group in the base or the new model.
+        """
+        membership = self.base_dao.TBL_MEMBERSHIP
+        base_edges = set(self.session.query(membership).filter(
+            membership.c.group_name.startswith('group/')).filter(
+                membership.c.members_name.startswith('group/')))
+        new_edges = set((item['group_name'], item['members_name'])
+                        for item in self.membership_items
+                        if item['members_name'].startswith('group/'))
+        changed = set(parent for parent, _ in base_edges ^ new_edges)
+
+        parents = {}
+        for parent, member in new_edges:
+            parents.setdefault(member, set()).add(parent)
+        affected = set()
+        stack = list(changed)
+        while stack:
+            group = stack.pop()
+            if group not in affected:
+                affected.add(group)
+                stack.extend(parents.get(group, ()))
+
+        base_table = self.base_dao.TBL_GROUP_IN_GROUP.__table__
+        table = self.dao.TBL_GROUP_IN_GROUP.__table__
+        changed = sorted(changed)
+        for i in range(0, len(changed), RESOURCE_BATCH_SIZE):
+            affected.update(parent for parent, in self.session.query(
+                base_table.c.parent).filter(
+                    base_table.c.parent.startswith('group/')).filter(
+                        base_table.c.member.in_(
+                            changed[i:i + RESOURCE_BATCH_SIZE])).distinct())
+
+        # Special member groups are expanded again later.
+        self.session.execute(table.insert().from_select(
+            ['parent', 'member'],
+            select([base_table.c.parent, base_table.c.member]).where(
+                base_table.c.parent.startswith('group/'))))
+        LOGGER.info('Re-denormalizing %i groups changed since base model %s.',
+                    len(affected), self.base_model)
+        self.dao.denorm_group_in_group(self.session, groups=affected)
+
+
 def group_name(group):
     """Create the type:name representation for a group.
 
@@ -1357,5 +1660,6 @@ def by_source(source):
 
     return {
         'INVENTORY': InventoryImporter,
+        'INCREMENTAL': IncrementalImporter,
         'EMPTY': EmptyImporter,
     }[source.upper()]
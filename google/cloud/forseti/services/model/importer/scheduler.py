@@ -0,0 +1,275 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Dependency aware scheduling of the model import phases."""
+
+from builtins import object
+from queue import Empty
+from queue import Full
+from queue import Queue
+import threading
+
+from google.cloud.forseti.common.util import logger
+
+LOGGER = logger.get_logger(__name__)
+
+# Number of phases whose inventory rows are read ahead of the model writer.
+MAX_IMPORT_READERS = 4
+
+# Rows per batch handed from a reader to the model writer.
+READ_BATCH_SIZE = 1000
+
+# Batches buffered per reader, bounds the memory used by read ahead.
+MAX_BUFFERED_BATCHES = 20
+
+_END = object()
+
+
+class ImportPhase(object):
+    """One step of the model import."""
+
+    def __init__(self, name, action, depends_on=(), fetch=None,
+                 post_action=None, commit_count=50000, counted=False):
+        """Initialize.
+
+        Args:
+            name (str): Name of the phase.
+            action (func): Called with each inventory row, or once without
+                arguments if the phase has no fetch.
+            depends_on (iterable): Names of the phases that must be written
+                before this phase.
+            fetch (func): Called with a database session, returns an iterator
+                over the inventory rows of this phase.
+            post_action (func): Called after all rows were handled.
+            commit_count (int): Commit the model session every commit_count
+                rows.
+            counted (bool): Whether the rows count towards the model items.
+        """
+        self.name = name
+        self.action = action
+        self.depends_on = frozenset(depends_on)
+        self.fetch = fetch
+        self.post_action = post_action
+        self.commit_count = commit_count
+        self.counted = counted
+
+    def __repr__(self):
+        """Repr.
+
+        Returns:
+            str: The phase name.
+        """
+        return 'ImportPhase<{}>'.format(self.name)
+
+
+class PhaseReader(threading.Thread):
+    """Reads the inventory rows of a phase ahead of the model writer."""
+
+    def __init__(self, phase, session_factory):
+        """Initialize.
+
+        Args:
+            phase (ImportPhase): The phase to read the rows of.
+            session_factory (func): Creates the read-only session used by
+                this reader.
+        """
+        super(PhaseReader, self).__init__(
+            name='import-reader-{}'.format(phase.name))
+        self.daemon = True
+        self.phase = phase
+        self.error = None
+        self._session_factory = session_factory
+        self._queue = Queue(maxsize=MAX_BUFFERED_BATCHES)
+        self._stopped = threading.Event()
+        self._done = threading.Event()
+
+    def run(self):
+        """Read all rows of the phase in batches."""
+        session = self._session_factory()
+        try:
+            batch = []
+            for row in self.phase.fetch(session):
+                batch.append(row)
+                if len(batch) >= READ_BATCH_SIZE:
+                    if not self._put(batch):
+                        return
+                    batch = []
+            if batch:
+                self._put(batch)
+        except Exception as e:  # pylint: disable=broad-except
+            LOGGER.exception('Error reading rows of import phase %s',
+                             self.phase.name)
+            self.error = e
+        finally:
+            session.close()
+            self._done.set()
+            self._put(_END)
+
+    def _put(self, item):
+        """Put an item on the queue, unless the reader is stopped.
+
+        Args:
+            item (object): The item to put on the queue.
+
+        Returns:
+            bool: False if the reader was stopped.
+        """
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def has_rows(self):
+        """Whether the writer can consume rows without waiting.
+
+        Returns:
+            bool: True if rows are buffered or reading is done.
+        """
+        return self._done.is_set() or not self._queue.empty()
+
+    def stop(self):
+        """Stop reading and drop the buffered rows."""
+        self._stopped.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except Empty:
+                break
+
+    def __iter__(self):
+        """Iterate the rows read so far, waiting for more as needed.
+
+        Yields:
+            object: The inventory rows of the phase.
+
+        Raises:
+            Exception: Any error raised while reading the rows.
+        """
+        for batch in iter(self._queue.get, _END):
+            for row in batch:
+                yield row
+        if self.error:
+            raise self.error
+
+
+def order_phases(phases):
+    """Validate the phase dependencies.
+
+    Args:
+        phases (list): The ImportPhases.
+
+    Returns:
+        list: The phases in a valid write order, keeping the given order
+            where the dependencies allow it.
+
+    Raises:
+        ValueError: If a dependency is unknown or circular.
+    """
+    names = set(phase.name for phase in phases)
+    for phase in phases:
+        unknown = phase.depends_on - names
+        if unknown:
+            raise ValueError('Import phase {} depends on unknown phases: {}'
+                             .format(phase.name, sorted(unknown)))
+
+    ordered = []
+    done = set()
+    pending = list(phases)
+    while pending:
+        ready = [phase for phase in pending if phase.depends_on <= done]
+        if not ready:
+            raise ValueError('Circular import phase dependencies: {}'
+                             .format(pending))
+        ordered.append(ready[0])
+        done.add(ready[0].name)
+        pending.remove(ready[0])
+    return ordered
+
+
+class ImportScheduler(object):
+    """Runs the import phases with a single model writer.
+
+    The model session is not thread safe and the objects of later phases
+    reference those written by earlier phases, so all phases are written by
+    the calling thread, in an order that respects their dependencies. When
+    readers are enabled, the inventory rows of upcoming phases are read
+    concurrently, each on its own session, and the writer picks whichever
+    phase with met dependencies has rows ready.
+    """
+
+    def __init__(self, phases, session_factory=None,
+                 readers=MAX_IMPORT_READERS):
+        """Initialize.
+
+        Args:
+            phases (list): The ImportPhases.
+            session_factory (func): Creates read-only sessions for the
+                readers, the rows are read by the writer if None.
+            readers (int): Maximum number of concurrent readers.
+        """
+        self.phases = order_phases(phases)
+        self.session_factory = session_factory
+        self.readers = readers if session_factory else 0
+
+    def _start_readers(self, pending, readers):
+        """Start readers for the next phases, up to the reader limit.
+
+        Args:
+            pending (list): The phases not yet written, in write order.
+            readers (dict): The running readers by phase name.
+        """
+        for phase in pending:
+            if len(readers) >= self.readers:
+                return
+            if phase.fetch and phase.name not in readers:
+                reader = PhaseReader(phase, self.session_factory)
+                reader.start()
+                readers[phase.name] = reader
+
+    def run(self, write_phase, session):
+        """Write all phases.
+
+        Args:
+            write_phase (func): Called with each phase and an iterable of its
+                rows, in the writer thread.
+            session (object): The session rows are read with by the writer.
+        """
+        pending = list(self.phases)
+        done = set()
+        readers = {}
+        try:
+            while pending:
+                self._start_readers(pending, readers)
+                ready = [phase for phase in pending
+                         if phase.depends_on <= done]
+                phase = next((p for p in ready
+                              if p.name in readers and
+                              readers[p.name].has_rows()), ready[0])
+
+                LOGGER.debug('Writing import phase: %s', phase.name)
+                if phase.name in readers:
+                    rows = readers.pop(phase.name)
+                elif phase.fetch:
+                    rows = phase.fetch(session)
+                else:
+                    rows = None
+                write_phase(phase, rows)
+
+                pending.remove(phase)
+                done.add(phase.name)
+        finally:
+            for reader in readers.values():
+                reader.stop()
@@ -15,6 +15,11 @@
 """ Modeller API. """
 
 from builtins import object
+import json
+import os
+
+from google.cloud.forseti.services.explain import snapshot
+from google.cloud.forseti.services.explain.access_graph import AccessGraph
 from google.cloud.forseti.services.model.importer import importer
 from google.cloud.forseti.common.util import logger
 
@@ -32,7 +37,8 @@ class Modeller(object):
         """
         self.config = config
 
-    def create_model(self, source, name, inventory_index_id, background):
+    def create_model(self, source, name, inventory_index_id, background,
+                     base_model=None):
         """Creates a model from the import source.
 
         Args:
@@ -40,13 +46,17 @@ class Modeller(object):
             name (str): Model name to instantiate.
             inventory_index_id (int64): Inventory id to import from
             background (bool): Whether to run the model creation in background
+            base_model (str): Handle of a model to update incrementally from
+                the inventory, instead of importing all of it.
 
         Returns:
             object: the created data model
         """
 
-        LOGGER.info('Creating model: %s, inventory_index_id = %s',
-                    name, inventory_index_id)
+        LOGGER.info('Creating model: %s, inventory_index_id = %s, '
+                    'base_model = %s', name, inventory_index_id, base_model)
+        if base_model:
+            source = 'incremental'
 
         model_manager = self.config.model_manager
         model_handle = model_manager.create(name=name)
@@ -65,7 +75,8 @@ class Modeller(object):
                     model_manager.model(model_handle, expunge=False),
                     data_access,
                     self.config,
-                    inventory_index_id)
+                    inventory_index_id,
+                    base_model=base_model)
                 import_runner.run()
 
         if background:
@@ -108,4 +119,58 @@ class Modeller(object):
 
         LOGGER.info('Deleting model: %s', model_name)
         model_manager = self.config.model_manager
+        snapshot_file = model_manager.get_description(model_name).get(
+            'snapshot')
         model_manager.delete(model_name)
+        self.config.explain_cache.invalidate(model_name)
+        if snapshot_file and os.path.exists(snapshot_file):
+            os.remove(snapshot_file)
+
+    def freeze_model(self, model_name):
+        """Writes a model to a read-only snapshot file.
+
+        Explain then answers the queries supported by the access graph from
+        the snapshot file instead of the database, so changes to the model
+        are refused once it is frozen.
+
+        Args:
+            model_name (str): handle of the model to freeze
+
+        Returns:
+            str: the path of the snapshot file
+
+        Raises:
+            ValueError: no snapshot directory is configured, or the model is
+                not completely imported
+        """
+
+        LOGGER.info('Freezing model: %s', model_name)
+        global_configs = self.config.get_global_config() or {}
+        snapshot_dir = global_configs.get('explain_snapshot_dir')
+        if not snapshot_dir:
+            raise ValueError('explain_snapshot_dir is not configured.')
+
+        model_manager = self.config.model_manager
+        model = model_manager.model(model_name)
+        if model.state not in ['SUCCESS', 'PARTIAL_SUCCESS']:
+            raise ValueError('Model {} is not completely imported, state = '
+                             '{}.'.format(model_name, model.state))
+
+        scoped_session, data_access = model_manager.get(model_name)
+        # Refuse changes while the snapshot is written, so none is missed.
+        data_access.frozen = True
+        try:
+            with scoped_session as session:
+                graph = AccessGraph(session, data_access)
+            if not os.path.isdir(snapshot_dir):
+                os.makedirs(snapshot_dir)
+            path = snapshot.snapshot_path(snapshot_dir, model_name)
+            snapshot.write_snapshot(graph, path)
+            model_manager.add_description(model_name,
+                                          json.dumps({'snapshot': path}))
+        except Exception:
+            data_access.frozen = False
+            raise
+        # Have Explain reload the access graph of the model.
+        data_access.increment_update_counter()
+        return path
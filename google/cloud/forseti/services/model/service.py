@@ -81,7 +81,8 @@ class GrpcModeller(model_pb2_grpc.ModellerServicer):
         model = self.modeller.create_model(request.type,
                                            request.name,
                                            request.id,
-                                           request.background)
+                                           request.background,
+                                           request.base_model)
         created_at_str = self._get_model_created_at_str(model)
         LOGGER.debug('Model %s created at: %s', model, created_at_str)
         reply = model_pb2.CreateModelReply(model=model_pb2.ModelSimplified(
@@ -120,6 +121,35 @@ class GrpcModeller(model_pb2_grpc.ModellerServicer):
         return model_pb2.DeleteModelReply(status=status)
         # pylint: enable=no-member
 
+    def FreezeModel(self, request, _):
+        """Writes a model to a read-only snapshot file used by Explain.
+
+        Args:
+            request (object): pb2 object of FreezeModelRequest
+            _ (object): Not used
+
+        Returns:
+            object: pb2 object of FreezeModelReply
+        """
+
+        # Protobuf enums are not handled correctly by the no-member check.
+        # pylint: disable=no-member
+        model_name = request.handle
+        if not model_name:
+            LOGGER.warning('No model name in request: %s', request)
+            status = model_pb2.FreezeModelReply.FAIL
+            return model_pb2.FreezeModelReply(status=status)
+
+        try:
+            path = self.modeller.freeze_model(model_name)
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception('Unable to freeze model: %s', model_name)
+            status = model_pb2.FreezeModelReply.FAIL
+            return model_pb2.FreezeModelReply(status=status)
+        status = model_pb2.FreezeModelReply.SUCCESS
+        return model_pb2.FreezeModelReply(status=status, snapshot=path)
+        # pylint: enable=no-member
+
     def ListModel(self, request, _):
         """List all models.
 
@@ -17,6 +17,7 @@
 from builtins import object
 from collections import defaultdict
 import hashlib
+import itertools
 import json
 import re
 
@@ -27,7 +28,9 @@ from sqlalchemy import Integer
 from sqlalchemy import String
 from sqlalchemy import Text
 from sqlalchemy import and_
+from sqlalchemy import func
 from sqlalchemy import inspect
+from sqlalchemy import or_
 from sqlalchemy.ext.declarative import declarative_base
 
 from google.cloud.forseti.common.data_access import violation_map as vm
@@ -41,6 +44,9 @@ CURRENT_SCHEMA = 1
 SUCCESS_STATES = [IndexState.SUCCESS, IndexState.PARTIAL_SUCCESS]
 CV_VIOLATION_PATTERN = re.compile('^cv', re.I)
 
+# Number of violations saved by each bulk insert, or read at a time.
+VIOLATION_CHUNK_SIZE = 1000
+
 
 class ScannerIndex(BASE):
     """Represents a scanner run."""
@@ -222,37 +228,34 @@ class ViolationAccess(object):
     def create(self, violations, scanner_index_id):
         """Save violations to the db table.
 
+        Violations are consumed in chunks written with one bulk insert each,
+        so no ORM object is kept in the session and the memory use does not
+        grow with the number of violations.
+
         Args:
-            violations (list): A list of violations.
+            violations (iterable): The violations, a list or a generator.
             scanner_index_id (int): id of the `ScannerIndex` row for this
                 scanner run.
+
+        Returns:
+            int: The number of violations saved.
         """
         created_at_datetime = date_time.get_utc_now_datetime()
-        for violation in violations:
-            violation_hash = _create_violation_hash(
-                violation.get('full_name', ''),
-                violation.get('resource_data', ''),
-                violation.get('violation_data', ''),
-                violation.get('rule_name', '')
-            )
-
-            violation = Violation(
-                created_at_datetime=created_at_datetime,
-                full_name=violation.get('full_name'),
-                resource_data=violation.get('resource_data'),
-                resource_name=violation.get('resource_name'),
-                resource_id=violation.get('resource_id'),
-                resource_type=violation.get('resource_type'),
-                rule_index=violation.get('rule_index'),
-                rule_name=violation.get('rule_name'),
-                scanner_index_id=scanner_index_id,
-                violation_data=json.dumps(
-                    violation.get('violation_data'), sort_keys=True),
-                violation_hash=violation_hash,
-                violation_message=violation.get('violation_message', ''),
-                violation_type=violation.get('violation_type')
-            )
-            self.session.add(violation)
+        violations = iter(violations)
+        insert = Violation.__table__.insert()
+        count = 0
+        while True:
+            rows = [_violation_row(violation, scanner_index_id,
+                                   created_at_datetime)
+                    for violation in itertools.islice(
+                        violations, VIOLATION_CHUNK_SIZE)]
+            if not rows:
+                break
+            self.session.execute(insert, rows)
+            count += len(rows)
+        LOGGER.debug('Saved %i violations for scanner index %s.', count,
+                     scanner_index_id)
+        return count
 
     def list(self, inv_index_id=None, scanner_index_id=None):
         """List all violations from the db table.
@@ -307,6 +310,98 @@ class ViolationAccess(object):
             violations.append(violation)
         return violations
 
+    def _successful_scan(self, query, scanner_index_id):
+        """Restrict a violations query to a successful scanner run.
+
+        Args:
+            query (Query): The violations query.
+            scanner_index_id (int): Id of the scanner index.
+
+        Returns:
+            Query: The query of the violations of the scanner run, if it
+                succeeded.
+        """
+        return (query
+                .filter(Violation.scanner_index_id == ScannerIndex.id)
+                .filter(and_(
+                    ScannerIndex.scanner_status.in_(SUCCESS_STATES),
+                    ScannerIndex.id == scanner_index_id)))
+
+    def count(self, scanner_index_id):
+        """Count the violations of a scanner run.
+
+        Args:
+            scanner_index_id (int): Id of the scanner index.
+
+        Returns:
+            int: The number of violations.
+        """
+        return self._successful_scan(
+            self.session.query(func.count(Violation.id)),
+            scanner_index_id).scalar()
+
+    def count_by_resource(self, scanner_index_id):
+        """Count the violations of a scanner run by notified resource.
+
+        Args:
+            scanner_index_id (int): Id of the scanner index.
+
+        Returns:
+            dict: The number of violations of every resource with
+                violations, i.e. { resource => count }.
+        """
+        counts = defaultdict(int)
+        query = self._successful_scan(
+            self.session.query(Violation.violation_type,
+                               func.count(Violation.id)),
+            scanner_index_id).group_by(Violation.violation_type)
+        for violation_type, count in query:
+            resource = violation_resource(violation_type)
+            if resource:
+                counts[resource] += count
+        return dict(counts)
+
+    def stream(self, scanner_index_id, resource=None):
+        """Stream the violations of a scanner run, ordered by violation type.
+
+        Rows are fetched VIOLATION_CHUNK_SIZE at a time, with a server side
+        cursor where the database supports it, and decoded one at a time,
+        so the memory use does not grow with the number of violations. The
+        session must not run other queries until the stream is consumed.
+
+        Args:
+            scanner_index_id (int): Id of the scanner index.
+            resource (str): If set, only the violations of this notified
+                resource.
+
+        Yields:
+            dict: The violation data, with the violation and resource data
+                decoded.
+        """
+        query = self._successful_scan(
+            self.session.query(*Violation.__table__.columns),
+            scanner_index_id)
+        if resource is not None:
+            violation_types = [violation_type for violation_type, name
+                               in vm.VIOLATION_RESOURCES.items()
+                               if name == resource]
+            if resource == vm.CV_VIOLATION_TYPE:
+                query = query.filter(or_(
+                    Violation.violation_type.in_(violation_types),
+                    Violation.violation_type.like('cv%'),
+                    Violation.violation_type.like('CV%')))
+            else:
+                query = query.filter(
+                    Violation.violation_type.in_(violation_types))
+        query = (query.order_by(Violation.violation_type, Violation.id)
+                 .execution_options(stream_results=True)
+                 .yield_per(VIOLATION_CHUNK_SIZE))
+        for row in query:
+            if (resource is not None and
+                    violation_resource(row.violation_type) != resource):
+                continue
+            yield decode_violation(row._asdict())
+
 
 # pylint: disable=invalid-name
 def convert_sqlalchemy_object_to_dict(sqlalchemy_obj):
@@ -338,33 +433,95 @@ def map_by_resource(violation_rows):
     v_by_type = defaultdict(list)
 
     for v_data in violation_rows:
-
-        try:
-            v_data['violation_data'] = json.loads(v_data['violation_data'])
-        except ValueError:
-            LOGGER.warning('Invalid violation data, unable to parse json '
-                           'for %s',
-                           v_data['violation_data'])
-
-        # resource_data can be regular python string
-        try:
-            v_data['resource_data'] = json.loads(v_data['resource_data'])
-        except ValueError:
-            v_data['resource_data'] = json.loads(
-                json.dumps(v_data['resource_data']))
-
-        violation_type = vm.VIOLATION_RESOURCES.get(v_data['violation_type'])
-        if not violation_type:
-            if bool(CV_VIOLATION_PATTERN.match(v_data['violation_type'])):
-                violation_type = vm.CV_VIOLATION_TYPE
-
+        decode_violation(v_data)
+        violation_type = violation_resource(v_data['violation_type'])
         if violation_type:
             v_by_type[violation_type].append(v_data)
 
     return dict(v_by_type)
 
 
-def _create_violation_hash(violation_full_name, resource_data, violation_data, rule_name):
+def decode_violation(v_data):
+    """Decode the violation and resource data of a violation in place.
+
+    Args:
+        v_data (dict): The violation data.
+
+    Returns:
+        dict: The violation data, decoded.
+    """
+    try:
+        v_data['violation_data'] = json.loads(v_data['violation_data'])
+    except ValueError:
+        LOGGER.warning('Invalid violation data, unable to parse json '
+                       'for %s',
+                       v_data['violation_data'])
+
+    # resource_data can be regular python string
+    try:
+        v_data['resource_data'] = json.loads(v_data['resource_data'])
+    except ValueError:
+        v_data['resource_data'] = json.loads(
+            json.dumps(v_data['resource_data']))
+    return v_data
+
+
+def violation_resource(violation_type):
+    """Get the notified resource of a violation type.
+
+    Args:
+        violation_type (str): The violation type.
+
+    Returns:
+        str: The resource the violations are notified for, None if not
+            notified.
+    """
+    resource = vm.VIOLATION_RESOURCES.get(violation_type)
+    if not resource and CV_VIOLATION_PATTERN.match(violation_type):
+        resource = vm.CV_VIOLATION_TYPE
+    return resource
+
+
+def _violation_row(violation, scanner_index_id, created_at_datetime):
+    """Build the violations table row of a violation.
+
+    Args:
+        violation (dict): The violation.
+        scanner_index_id (int): id of the `ScannerIndex` row for this
+            scanner run.
+        created_at_datetime (datetime): The creation time of the row.
+
+    Returns:
+        dict: The column values of the row.
+    """
+    violation_data = json.dumps(violation.get('violation_data'),
+                                sort_keys=True)
+    violation_hash = _create_violation_hash(
+        violation.get('full_name', ''),
+        violation.get('resource_data', ''),
+        violation.get('violation_data', ''),
+        violation.get('rule_name', ''),
+        violation_data if 'violation_data' in violation else None)
+
+    return {
+        'created_at_datetime': created_at_datetime,
+        'full_name': violation.get('full_name'),
+        'resource_data': violation.get('resource_data'),
+        'resource_name': violation.get('resource_name'),
+        'resource_id': violation.get('resource_id'),
+        'resource_type': violation.get('resource_type'),
+        'rule_index': violation.get('rule_index'),
+        'rule_name': violation.get('rule_name'),
+        'scanner_index_id': scanner_index_id,
+        'violation_data': violation_data,
+        'violation_hash': violation_hash,
+        'violation_message': violation.get('violation_message', ''),
+        'violation_type': violation.get('violation_type'),
+    }
+
+
+def _create_violation_hash(violation_full_name, resource_data, violation_data,
+                           rule_name, violation_data_json=None):
     """Create a hash of violation data.
 
     Args:
@@ -372,6 +529,8 @@ def _create_violation_hash(violation_full_name, resource_data, violation_data, r
         resource_data (str): The inventory data.
         violation_data (dict): A violation.
         rule_name (str): Rule or constraint name.
+        violation_data_json (str): The violation data already dumped with
+            sorted keys, to not dump it again.
 
     Returns:
         str: The resulting hex digest or '' if we can't successfully create
@@ -394,7 +553,8 @@ def _create_violation_hash(violation_full_name, resource_data, violation_data, r
         violation_hash.update(
             json.dumps(violation_full_name).encode() +
             json.dumps(resource_data, sort_keys=True).encode() +
-            json.dumps(violation_data, sort_keys=True).encode() +
+            (violation_data_json if violation_data_json is not None else
+             json.dumps(violation_data, sort_keys=True)).encode() +
             json.dumps(rule_name).encode()
         )
     except TypeError:
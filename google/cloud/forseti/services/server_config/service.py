@@ -204,6 +204,30 @@ class GrpcServiceConfig(server_pb2_grpc.ServerServicer):
 
         return _run(client)
 
+    def GetExplainCacheStatistics(self, request, _):
+        """Get the hit and miss counters of the Explain result cache.
+
+        Args:
+            request (GetExplainCacheStatisticsRequest): The grpc request
+                object.
+            _ (object): Context of the request.
+
+        Returns:
+            GetExplainCacheStatisticsReply: The GetExplainCacheStatisticsReply
+                grpc object.
+        """
+        del request
+
+        statistics = self.service_config.explain_cache.statistics()
+        LOGGER.info('Retrieving explain cache statistics, statistics = %s',
+                    statistics)
+
+        return server_pb2.GetExplainCacheStatisticsReply(
+            hits=statistics['hits'],
+            misses=statistics['misses'],
+            size=statistics['size'],
+            max_size=statistics['maxsize'])
+
 
 class GrpcServerConfigFactory(object):
     """Factory class for Server config service gRPC interface"""
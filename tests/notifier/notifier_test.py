@@ -45,6 +45,40 @@ class NotifierTest(ForsetiTestCase):
         self.assertEqual(expected_timestamps,
                           converted_timestamps)
 
+    def test_violation_stream(self):
+        """The violations are streamed again on every iteration."""
+        violation_access = mock.MagicMock()
+        violation_access.stream.side_effect = lambda *args: iter([
+            dict(created_at_datetime=datetime(1999, 12, 25, 1, 2, 3))])
+        violations = notifier.ViolationStream(
+            violation_access, 'sid-1', 'iam_policy_violations', 1)
+
+        self.assertEqual(1, len(violations))
+        for _ in range(2):
+            self.assertEqual(
+                [{'created_at_datetime': '1999-12-25T01:02:03Z'}],
+                list(violations))
+        violation_access.stream.assert_called_with(
+            'sid-1', 'iam_policy_violations')
+        self.assertEqual(2, violation_access.stream.call_count)
+
+    def test_violation_stream_counted_when_needed(self):
+        """The violations are counted once if no count is given."""
+        violation_access = mock.MagicMock()
+        violation_access.count.return_value = 3
+        violation_access.count_by_resource.return_value = {
+            'iam_policy_violations': 2}
+
+        violations = notifier.ViolationStream(violation_access, 'sid-1')
+        self.assertEqual(3, len(violations))
+        self.assertEqual(3, len(violations))
+        violation_access.count.assert_called_once_with('sid-1')
+
+        self.assertEqual(2, len(notifier.ViolationStream(
+            violation_access, 'sid-1', 'iam_policy_violations')))
+        self.assertEqual(0, len(notifier.ViolationStream(
+            violation_access, 'sid-1', 'buckets_acl_violations')))
+
     @mock.patch(
         'google.cloud.forseti.notifier.notifier.find_notifiers', autospec=True)
     @mock.patch(
@@ -54,13 +88,14 @@ class NotifierTest(ForsetiTestCase):
         """No notifiers are instantiated/run if there are no violations.
 
         Setup:
-            Mock the scanner_dao and make its map_by_resource() function return
+            Mock the scanner_dao and make its count_by_resource() method return
             an empty violations map
 
         Expected outcome:
             The local find_notifiers() function is never called -> no notifiers
             are looked up, istantiated or run."""
-        mock_dao.map_by_resource.return_value = dict()
+        mock_dao.ViolationAccess.return_value.count_by_resource.return_value = (
+            dict())
         mock_service_cfg = mock.MagicMock()
         mock_service_cfg.get_global_config.return_value = fake_violations.GLOBAL_CONFIGS
         mock_service_cfg.get_notifier_config.return_value = fake_violations.NOTIFIER_CONFIGS
@@ -82,14 +117,16 @@ class NotifierTest(ForsetiTestCase):
         """The email/GCS upload notifiers are instantiated/run.
 
         Setup:
-            Mock the scanner_dao and make its map_by_resource() function return
+            Mock the scanner_dao and make its count_by_resource() method return
             the VIOLATIONS dict
 
         Expected outcome:
             The local find_notifiers() is called with with 'email_violations'
             and 'gcs_violations' respectively. These 2 notifiers are
             instantiated and run."""
-        mock_dao.map_by_resource.return_value = fake_violations.VIOLATIONS
+        mock_dao.ViolationAccess.return_value.count_by_resource.return_value = {
+            resource: len(violations)
+            for resource, violations in fake_violations.VIOLATIONS.items()}
         mock_service_cfg = mock.MagicMock()
         mock_service_cfg.get_global_config.return_value = fake_violations.GLOBAL_CONFIGS
         mock_service_cfg.get_notifier_config.return_value = fake_violations.NOTIFIER_CONFIGS
@@ -132,7 +169,7 @@ class NotifierTest(ForsetiTestCase):
         """Without scanner index id, no notifications are sent.
 
         Setup:
-            Mock the scanner_dao and make its map_by_resource() function return
+            Mock the scanner_dao and make its count_by_resource() method return
             the VIOLATIONS dict.
             Make sure that no scanner index with a (SUCCESS, PARTIAL_SUCCESS)
             completion state is found.
@@ -153,7 +190,7 @@ class NotifierTest(ForsetiTestCase):
         notifier.run('iid-1-2-3', None, mock.MagicMock(), mock_service_cfg)
 
         self.assertFalse(mock_find_notifiers.called)
-        self.assertFalse(mock_dao.map_by_resource.called)
+        self.assertFalse(mock_dao.ViolationAccess.called)
         self.assertTrue(mock_logger.error.called)
 
     @mock.patch(
@@ -168,7 +205,7 @@ class NotifierTest(ForsetiTestCase):
         """No violation notifiers are run if there are no violations.
 
         Setup:
-            Mock the scanner_dao and make its map_by_resource() function return
+            Mock the scanner_dao and make its count_by_resource() method return
             an empty violations map
 
         Expected outcome:
@@ -176,7 +213,8 @@ class NotifierTest(ForsetiTestCase):
             are looked up, istantiated or run.
             The `run_inv_summary` function *is* called.
         """
-        mock_dao.map_by_resource.return_value = dict()
+        mock_dao.ViolationAccess.return_value.count_by_resource.return_value = (
+            dict())
         mock_service_cfg = mock.MagicMock()
         mock_service_cfg.get_global_config.return_value = fake_violations.GLOBAL_CONFIGS
         mock_service_cfg.get_notifier_config.return_value = fake_violations.NOTIFIER_CONFIGS
@@ -2023,6 +2023,55 @@ class IamRulesEngineTest(ForsetiTestCase):
 
         self.assertEqual(expected_violations, actual_violations)
 
+    def test_rule_index_updated_with_new_rules(self):
+        """Test the compiled rule lookups follow rules added later.
+
+        Setup:
+            * Create a RuleBook with RULES8 rule set.
+            * Find violations for a project in a folder.
+            * Add a blacklist rule on the folder.
+
+        Expected result:
+            * No violation before the new rule, 1 violation after it.
+            * The ancestry of the folder is cached.
+        """
+        rule_book = ire.IamRuleBook({}, test_rules.RULES8, self.fake_timestamp)
+        policy_resource = mock.MagicMock()
+        policy_resource.full_name = (
+            'organization/778899/folder/333/project/my-project-3/'
+            'iam_policy/project:my-project-3/')
+        rule_bindings = [iam_policy.IamPolicyBinding.create_from({
+            'role': 'roles/owner',
+            'members': ['user:owner@company.com']})]
+
+        actual_violations = list(rule_book.find_violations(
+            self.project3, policy_resource, rule_bindings))
+        self.assertEqual([], actual_violations)
+        # pylint: disable=protected-access
+        self.assertIn('organization/778899/folder/333/',
+                      rule_book._ancestry_cache)
+        # pylint: enable=protected-access
+
+        rule_book.add_rule({
+            'name': 'folder blacklist',
+            'mode': 'blacklist',
+            'resource': [{
+                'type': 'folder',
+                'applies_to': 'children',
+                'resource_ids': ['333']
+            }],
+            'bindings': [{
+                'role': 'roles/owner',
+                'members': ['user:owner@company.com']
+            }]
+        }, 1)
+
+        actual_violations = list(rule_book.find_violations(
+            self.project3, policy_resource, rule_bindings))
+        self.assertEqual(1, len(actual_violations))
+        self.assertEqual('folder blacklist', actual_violations[0].rule_name)
+        self.assertEqual(self.project3.id, actual_violations[0].resource_id)
+
 
 if __name__ == '__main__':
     unittest.main()
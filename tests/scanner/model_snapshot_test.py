@@ -0,0 +1,150 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests the model snapshot shared by scanners."""
+
+from builtins import object
+import json
+import unittest
+import unittest.mock as mock
+
+from tests.unittest_utils import ForsetiTestCase
+from google.cloud.forseti.scanner import model_snapshot
+
+
+class FakeResource(object):
+    """Model Resource stub."""
+
+    def __init__(self, resource_type, name, parent=None, data=None):
+        self.type = resource_type
+        self.name = name
+        self.type_name = '{}/{}'.format(resource_type, name)
+        self.full_name = self.type_name + '/'
+        self.parent = parent
+        self.parent_type_name = parent.type_name if parent else None
+        self.display_name = ''
+        self.email = ''
+        self.data = data
+        self.cai_resource_name = ''
+        self.cai_resource_type = ''
+        if parent:
+            self.full_name = parent.full_name + self.full_name
+
+
+PROJECT_1 = FakeResource('project', 'p1')
+PROJECT_2 = FakeResource('project', 'p2')
+FIREWALLS = [
+    FakeResource('firewall', 'f1', PROJECT_1, json.dumps({'name': 'f1'})),
+    FakeResource('firewall', 'f2', PROJECT_2, json.dumps({'name': 'f2'})),
+    FakeResource('firewall', 'f3', PROJECT_1, json.dumps({'name': 'f3'})),
+]
+
+
+class ModelSnapshotTest(ForsetiTestCase):
+    """Tests for the model snapshot."""
+
+    def setUp(self):
+        """Setup method."""
+        ForsetiTestCase.setUp(self)
+        self.data_access = mock.MagicMock()
+        self.data_access.scanner_iter.side_effect = (
+            lambda session, resource_type: iter(FIREWALLS))
+        self.model_manager = mock.MagicMock()
+        self.model_manager.get.return_value = (mock.MagicMock(),
+                                               self.data_access)
+
+    def _names(self, resources):
+        return [resource.name for resource in resources]
+
+    def test_resources_loaded_once(self):
+        """Test every type is read once and shared."""
+        snapshot = model_snapshot.ModelSnapshot(self.model_manager, 'm1')
+
+        first = list(snapshot.resources('firewall'))
+        second = list(snapshot.resources('firewall'))
+
+        self.assertEqual(['f1', 'f2', 'f3'], self._names(first))
+        self.assertEqual(1, snapshot.loads)
+        self.assertEqual(1, self.data_access.scanner_iter.call_count)
+        self.assertIs(first[0], second[0])
+        self.assertIs(first[0].parent, first[2].parent)
+        self.assertEqual('project/p1/', first[0].parent.full_name)
+        self.assertEqual(['f1', 'f3'], self._names(
+            snapshot.resources('firewall', 'project/p1')))
+        self.assertEqual([], self._names(
+            snapshot.resources('firewall', 'project/p3')))
+
+        decoded = model_snapshot.decoded_data(first[0])
+        self.assertEqual({'name': 'f1'}, decoded)
+        self.assertIs(decoded, model_snapshot.decoded_data(second[0]))
+
+    def test_resources_spilled(self):
+        """Test types over the memory budget are read back from disk."""
+        snapshot = model_snapshot.ModelSnapshot(self.model_manager, 'm1',
+                                                memory_budget_mb=0)
+
+        self.assertEqual(['f1', 'f2', 'f3'],
+                         self._names(snapshot.resources('firewall')))
+        self.assertEqual(['f2'], self._names(
+            snapshot.resources('firewall', 'project/p2')))
+        self.assertEqual(1, snapshot.loads)
+        self.assertEqual(0, snapshot.memory_used)
+
+        snapshot.close()
+        self.assertEqual(['f1', 'f2', 'f3'],
+                         self._names(snapshot.resources('firewall')))
+        self.assertEqual(2, snapshot.loads)
+        snapshot.close()
+
+    def test_resources_spilled_while_read(self):
+        """Test a type over the budget is never fully held in memory."""
+        snapshot = model_snapshot.ModelSnapshot(
+            self.model_manager, 'm1', memory_budget_mb=100.0 / 1024 / 1024)
+        mkstemp = mock.MagicMock(wraps=model_snapshot.tempfile.mkstemp)
+
+        def scanner_iter(session, resource_type):
+            for i, resource in enumerate(FIREWALLS):
+                self.assertLessEqual(snapshot.memory_used,
+                                     snapshot.memory_budget)
+                # The first resource fits, the rest of the type is spilled.
+                self.assertEqual(i > 1, mkstemp.called)
+                yield resource
+
+        self.data_access.scanner_iter.side_effect = scanner_iter
+        with mock.patch.object(model_snapshot.tempfile, 'mkstemp', mkstemp):
+            self.assertEqual(['f1', 'f2', 'f3'],
+                             self._names(snapshot.resources('firewall')))
+        self.assertEqual(0, snapshot.memory_used)
+        snapshot.close()
+
+    def test_scanner_iter(self):
+        """Test scanners read from the snapshot of the run if there is one."""
+        service_config = mock.MagicMock()
+        resources = model_snapshot.scanner_iter(
+            service_config, 'session', self.data_access, 'firewall')
+        self.assertEqual(['f1', 'f2', 'f3'], self._names(resources))
+        self.data_access.scanner_iter.assert_called_once_with(
+            'session', 'firewall')
+
+        service_config.model_snapshot = model_snapshot.ModelSnapshot(
+            self.model_manager, 'm1')
+        for _ in range(2):
+            resources = model_snapshot.scanner_iter(
+                service_config, 'session', self.data_access, 'firewall',
+                'project/p2')
+            self.assertEqual(['f2'], self._names(resources))
+        self.assertEqual(2, self.data_access.scanner_iter.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,6 +14,9 @@
 """Scanner runner script test."""
 
 from datetime import datetime, timedelta
+import queue
+import threading
+import time
 import unittest.mock as mock
 from sqlalchemy.orm import sessionmaker
 import unittest
@@ -49,6 +52,49 @@ TWO_SCANNERS = {'scanners': [
     {'name': 'iam_policy', 'enabled': False}
 ]}
 
+class FakeScanner(object):
+    """Scanner stub recording the memory hints running at the same time."""
+
+    lock = threading.Lock()
+    hints = {'HeavyScanner': 3, 'LightScanner': 1, 'FailingScanner': 1}
+    running = 0
+    peak = 0
+    started = []
+
+    def run(self):
+        """Stub."""
+        cls = FakeScanner
+        hint = cls.hints[self.__class__.__name__]
+        with cls.lock:
+            cls.started.append(self.__class__.__name__)
+            cls.running += hint
+            cls.peak = max(cls.peak, cls.running)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.running -= hint
+        if isinstance(self, FailingScanner):
+            raise ValueError('failed')
+
+
+class HeavyScanner(FakeScanner):
+    """Heavy scanner stub."""
+
+
+class LightScanner(FakeScanner):
+    """Light scanner stub."""
+
+
+class FailingScanner(FakeScanner):
+    """Failing scanner stub."""
+
+
+FAKE_REQUIREMENTS_MAP = {
+    'heavy': {'class_name': 'HeavyScanner', 'memory_hint': 3},
+    'light': {'class_name': 'LightScanner'},
+    'failing': {'class_name': 'FailingScanner'},
+}
+
+
 class ScannerRunnerTest(scanner_base_db.ScannerBaseDbTestCase):
 
     def setUp(self):
@@ -91,6 +137,43 @@ class ScannerRunnerTest(scanner_base_db.ScannerBaseDbTestCase):
                 self.assertTrue(closing_mock.called)
                 self.assertEqual(1, closing_mock.call_count)
 
+    @mock.patch.dict(
+        'google.cloud.forseti.scanner.scanner_requirements_map.REQUIREMENTS_MAP',
+        FAKE_REQUIREMENTS_MAP, clear=True)
+    def test_run_concurrently(self):
+        """Test scanners run heaviest first within the memory budget."""
+        FakeScanner.started = []
+        FakeScanner.peak = 0
+        scanners = [LightScanner(), FailingScanner(), HeavyScanner(),
+                    LightScanner()]
+        progress_queue = queue.Queue()
+        session = mock.MagicMock()
+
+        succeeded, failed = scanner._run_concurrently(
+            session, scanners, progress_queue, 3, memory_budget=4)
+
+        self.assertEqual('HeavyScanner', FakeScanner.started[0])
+        self.assertLessEqual(FakeScanner.peak, 4)
+        self.assertEqual(['FailingScanner'], failed)
+        self.assertEqual(['HeavyScanner', 'LightScanner', 'LightScanner'],
+                         sorted(succeeded))
+        self.assertEqual(4, session.commit.call_count)
+        self.assertEqual(4, progress_queue.qsize())
+
+    @mock.patch.dict(
+        'google.cloud.forseti.scanner.scanner_requirements_map.REQUIREMENTS_MAP',
+        FAKE_REQUIREMENTS_MAP, clear=True)
+    def test_run_concurrently_over_budget(self):
+        """Test a scanner heavier than the memory budget runs alone."""
+        FakeScanner.started = []
+        FakeScanner.peak = 0
+        succeeded, _ = scanner._run_concurrently(
+            mock.MagicMock(), [HeavyScanner(), LightScanner()],
+            queue.Queue(), 2, memory_budget=2)
+
+        self.assertEqual(3, FakeScanner.peak)
+        self.assertEqual(['HeavyScanner', 'LightScanner'], succeeded)
+
     @mock.patch.object(date_time, 'get_utc_now_datetime')
     def test_init_scanner_index(self, mock_date_time):
         utc_now = datetime.utcnow()
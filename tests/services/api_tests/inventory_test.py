@@ -26,6 +26,7 @@ from google.cloud.forseti.services import db
 from google.cloud.forseti.services.base.config import InventoryConfig
 from google.cloud.forseti.services.client import ClientComposition
 from google.cloud.forseti.services.dao import ModelManager
+from google.cloud.forseti.services.explain.result_cache import ResultCache
 from google.cloud.forseti.services.explain.service import GrpcExplainerFactory
 from google.cloud.forseti.services.inventory.service import GrpcInventoryFactory
 from google.cloud.forseti.services.inventory.storage import Storage
@@ -37,6 +38,7 @@ class TestServiceConfig(MockServerConfig):
     def __init__(self):
         self.engine = create_test_engine()
         self.model_manager = ModelManager(self.engine)
+        self.explain_cache = ResultCache()
         self.sessionmaker = db.create_scoped_sessionmaker(self.engine)
         self.workers = ThreadPool(10)
         self.inventory_config = InventoryConfig(gcp_api_mocks.ORGANIZATION_ID,
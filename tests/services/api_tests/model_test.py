@@ -16,12 +16,15 @@
 from builtins import object
 import unittest
 
+import grpc
+
 from tests.services.api_tests.api_tester import ModelTestRunner
 from tests.services.inventory import gcp_api_mocks
 from tests.services.util.db import create_test_engine
 from tests.unittest_utils import ForsetiTestCase
 from google.cloud.forseti.services.base.config import InventoryConfig
 from google.cloud.forseti.services.dao import ModelManager
+from google.cloud.forseti.services.explain.result_cache import ResultCache
 from google.cloud.forseti.services.explain.service import GrpcExplainerFactory
 from google.cloud.forseti.services.inventory.service import GrpcInventoryFactory
 from google.cloud.forseti.services.model import model_pb2
@@ -31,9 +34,11 @@ from google.cloud.forseti.services.model.service import GrpcModellerFactory
 class TestServiceConfig(object):
     """ServiceConfig stub."""
 
-    def __init__(self):
+    def __init__(self, global_config=None):
         self.engine = create_test_engine()
+        self.global_config = global_config or {}
         self.model_manager = ModelManager(self.engine)
+        self.explain_cache = ResultCache()
         self.inventory_config = (
             InventoryConfig(gcp_api_mocks.ORGANIZATION_ID, '', {}, '', {}))
 
@@ -46,6 +51,10 @@ class TestServiceConfig(object):
         """Stub."""
         return self.engine
 
+    def get_global_config(self):
+        """Stub."""
+        return self.global_config
+
 
 MODEL = {
     'resources': {
@@ -117,10 +126,10 @@ MODEL = {
 }
 
 
-def create_tester():
+def create_tester(global_config=None):
     """Creates a model based test runner."""
     return ModelTestRunner(
-        MODEL, TestServiceConfig(),
+        MODEL, TestServiceConfig(global_config),
         [
             GrpcExplainerFactory,
             GrpcInventoryFactory,
@@ -288,6 +297,29 @@ class ExplainerTest(ForsetiTestCase):
                 'user/unknown').result)
         self.setup.run(test)
 
+    def test_batch_check_policy(self):
+        """Test batch check policy."""
+
+        def test(client):
+            """Test implementation with API client."""
+            checks = [
+                ('vm/instance-1', 'permission/c', 'user/d'),
+                ('organization/org1', 'permission/e', 'user/a'),
+                ('bucket/bucket1', 'permission/h', 'user/b'),
+                ('vm/instance-1', 'permission/e', 'user/c'),
+                ('bucket/bucket2', 'permission/i', 'user/unknown'),
+            ]
+            self.assertEqual(
+                [True, False, True, False, True],
+                list(client.explain.batch_check_iam_policy(checks).results))
+            self.assertEqual(
+                [client.explain.check_iam_policy(*check).result
+                 for check in checks],
+                list(client.explain.batch_check_iam_policy(checks).results))
+            self.assertEqual(
+                [], list(client.explain.batch_check_iam_policy([]).results))
+        self.setup.run(test)
+
     def test_explain_denied(self):
         """Test explain_denied."""
         def test(client):
@@ -405,6 +437,46 @@ class ExplainerTest(ForsetiTestCase):
                 ]))
         self.setup.run(test)
 
+    def test_query_access_by_permissions_pages(self):
+        """Test query_access_by_permissions resumed with page tokens."""
+        def test(client):
+            """Test implementation with API client."""
+            expected = [
+                (access.role, access.resource, sorted(access.members))
+                for access in client.explain.query_access_by_permissions(
+                    '', 'permission/a', expand_groups=True)]
+            self.assertEqual(4, len(expected))
+
+            pages = []
+            page_token = ''
+            while True:
+                page = list(client.explain.query_access_by_permissions(
+                    '', 'permission/a', expand_groups=True,
+                    page_token=page_token, page_size=3))
+                if not page:
+                    break
+                pages.append(len(page))
+                page_token = page[-1].next_page_token
+                expected_page = expected[:len(page)]
+                expected = expected[len(page):]
+                self.assertEqual(expected_page, [
+                    (access.role, access.resource, sorted(access.members))
+                    for access in page])
+            self.assertEqual([3, 1], pages)
+        self.setup.run(test)
+
+    def test_query_access_by_permissions_bad_page_token(self):
+        """Test query_access_by_permissions with an invalid page token."""
+        def test(client):
+            """Test implementation with API client."""
+            with self.assertRaises(grpc.RpcError) as context:
+                list(client.explain.query_access_by_permissions(
+                    '', 'permission/a', page_token='not-a-token'))
+            self.assertEqual(grpc.StatusCode.INVALID_ARGUMENT,
+                             context.exception.code())
+            self.assertIn('Invalid page token', context.exception.details())
+        self.setup.run(test)
+
     def test_query_access_by_permissions_special_members(self):
         """Test query_access_by_permissions with special member expansion."""
         def test(client):
@@ -454,5 +526,13 @@ class ExplainerTest(ForsetiTestCase):
 
         self.setup.run(test)
 
+
+class AccessGraphExplainerTest(ExplainerTest):
+    """Test based on declarative model, using the in memory access graph."""
+
+    def setUp(self):
+        self.setup = create_tester({'explain_access_graph': True})
+
+
 if __name__ == '__main__':
     unittest.main()
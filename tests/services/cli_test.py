@@ -64,6 +64,7 @@ CLIENT.model = CLIENT
 CLIENT.model.list_models = mock.Mock(return_value=iter(['test']))
 CLIENT.model.get_model = mock.Mock(return_value=reply_model_s)
 CLIENT.model.delete_model = mock.Mock(return_value='test')
+CLIENT.model.freeze_model = mock.Mock(return_value='test')
 CLIENT.model.new_model = mock.Mock(return_value='test')
 
 CLIENT.explain = CLIENT
@@ -198,9 +199,23 @@ class ImporterTest(ForsetiTestCase):
          '{"endpoint": "192.168.0.1:80"}',
          {'endpoint': '192.168.0.1:80'}),
 
+        ('model freeze foo',
+         CLIENT.model.freeze_model,
+         ['da39a3ee5e6b4b0d3255bfef95601890afd80709'],
+         {},
+         '{"endpoint": "192.168.0.1:80"}',
+         {'endpoint': '192.168.0.1:80'}),
+
         ('model create --inventory_index_id 1 foo',
          CLIENT.model.new_model,
-         ["inventory", "foo", 1, False],
+         ["inventory", "foo", 1, False, ''],
+         {},
+         '{"endpoint": "192.168.0.1:80"}',
+         {'endpoint': '192.168.0.1:80'}),
+
+        ('model create --inventory_index_id 1 --base_model bar foo',
+         CLIENT.model.new_model,
+         ["inventory", "foo", 1, False, 'bar'],
          {},
          '{"endpoint": "192.168.0.1:80"}',
          {'endpoint': '192.168.0.1:80'}),
@@ -263,14 +278,14 @@ class ImporterTest(ForsetiTestCase):
 
         ('explainer why_denied member/foo resource/bar --role role/r1',
          CLIENT.explain.explain_denied,
-         ['member/foo', ['resource/bar'], ['role/r1'], []],
+         ['member/foo', ['resource/bar'], ['role/r1'], [], False, 0],
          {},
          '{}',
          {}),
 
         ('explainer why_denied member/foo resource/bar --permission permission/p1',
          CLIENT.explain.explain_denied,
-         ['member/foo', ['resource/bar'], [], ['permission/p1']],
+         ['member/foo', ['resource/bar'], [], ['permission/p1'], False, 0],
          {},
          '{}',
          {}),
@@ -284,7 +299,7 @@ class ImporterTest(ForsetiTestCase):
 
         ('explainer access_by_authz --role role/foo',
          CLIENT.explain.query_access_by_permissions,
-         ['role/foo', None, False, False],
+         ['role/foo', None, False, False, '', 0],
          {},
          '{}',
          {}),
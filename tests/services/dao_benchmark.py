@@ -0,0 +1,118 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmark the group-in-group denormalization methods.
+
+Generates a nested group graph, then denormalizes it with each method of
+denorm_group_in_group and reports the iterations, time and rows produced.
+
+From the top forseti-security dir, run:
+
+PYTHONPATH=. python tests/services/dao_benchmark.py \
+    [--groups 2000] [--depth 8] [--cycles 10] [--db /tmp/bench.db]
+"""
+import argparse
+import random
+import time
+
+from google.cloud.forseti.services import dao
+
+
+def group_name(number):
+    """Member name of a synthetic group.
+
+    Args:
+        number (int): The group number.
+
+    Returns:
+        str: The member name.
+    """
+    return 'group/g{}@bench.test'.format(number)
+
+
+def generate_memberships(groups, depth, cycles):
+    """Generate nested group memberships.
+
+    Groups are spread over depth levels and each group is a member of one to
+    three groups of the level above. Some memberships are added upwards to
+    form cycles.
+
+    Args:
+        groups (int): The number of groups.
+        depth (int): The number of nesting levels.
+        cycles (int): The number of memberships forming cycles.
+
+    Returns:
+        list: The (group_name, members_name) rows.
+    """
+    rng = random.Random(42)
+    levels = [list(range(level, groups, depth)) for level in range(depth)]
+    edges = set()
+    for upper, lower in zip(levels, levels[1:]):
+        for member in lower:
+            for parent in rng.sample(upper, min(len(upper),
+                                                rng.randint(1, 3))):
+                edges.add((parent, member))
+    for _ in range(cycles):
+        lower, upper = rng.sample(range(1, depth), 2)
+        if lower < upper:
+            lower, upper = upper, lower
+        edges.add((rng.choice(levels[lower]), rng.choice(levels[upper])))
+    return [{'group_name': group_name(parent),
+             'members_name': group_name(member)}
+            for parent, member in sorted(edges)]
+
+
+def run_benchmark(session, data_access, memberships):
+    """Denormalize the memberships with each method.
+
+    Args:
+        session (object): Database session of the model.
+        data_access (object): The model data access.
+        memberships (list): The membership rows.
+    """
+    session.execute(data_access.TBL_MEMBERSHIP.insert(), memberships)
+    session.commit()
+    print('{} memberships'.format(len(memberships)))
+
+    results = {}
+    for method in [dao.GROUP_CLOSURE_SQL, dao.GROUP_CLOSURE_MEMORY]:
+        start = time.time()
+        iterations = data_access.denorm_group_in_group(session, method=method)
+        elapsed = time.time() - start
+        rows = set(session.query(data_access.TBL_GROUP_IN_GROUP.parent,
+                                 data_access.TBL_GROUP_IN_GROUP.member))
+        results[method] = rows
+        print('{:>8}: {:>3} iterations, {:>9} rows, {:8.2f}s'.format(
+            method, iterations, len(rows), elapsed))
+    if results[dao.GROUP_CLOSURE_SQL] != results[dao.GROUP_CLOSURE_MEMORY]:
+        print('Results differ!')
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--groups', type=int, default=2000)
+    parser.add_argument('--depth', type=int, default=8)
+    parser.add_argument('--cycles', type=int, default=10)
+    parser.add_argument('--db', default=None,
+                        help='Sqlite file to use, in memory by default.')
+    args = parser.parse_args()
+
+    session_maker, data_access = dao.session_creator('bench', args.db)
+    run_benchmark(session_maker(), data_access,
+                  generate_memberships(args.groups, args.depth, args.cycles))
+
+
+if __name__ == '__main__':
+    main()
@@ -24,6 +24,7 @@ from tests.services import test_models
 from tests.services.model_tester import ModelCreator
 from tests.services.model_tester import ModelCreatorClient
 from google.cloud.forseti.common.util import logger
+from google.cloud.forseti.services import dao
 from google.cloud.forseti.services.dao import session_creator
 
 LOGGER = logger.get_logger(__name__)
@@ -94,6 +95,50 @@ class DaoTest(ForsetiTestCase):
     res = [r.name for r in res]
     self.assertEqual(set([u'test_role']), set(res))
 
+  def test_role_index(self):
+    """Test the role index lookups."""
+    index = dao.RoleIndex(
+        ['cloud.admin', 'cloud.reader', 'db.viewer', 'empty'],
+        [('cloud.admin', 'read'), ('cloud.admin', 'write'),
+         ('cloud.reader', 'read'), ('db.viewer', 'read'),
+         ('db.viewer', 'list')])
+
+    self.assertEqual(['cloud.admin', 'cloud.reader'],
+                     index.roles_by_prefix('cloud'))
+    self.assertEqual([], index.roles_by_prefix('cloud.z'))
+    self.assertEqual(frozenset(['read', 'list']),
+                     index.permissions('db.viewer'))
+    self.assertEqual(frozenset(), index.permissions('unknown'))
+    self.assertEqual({'cloud.admin', 'cloud.reader', 'db.viewer'},
+                     set(index.roles_covering(['read'])))
+    self.assertEqual(['cloud.admin'], index.roles_covering(['read', 'write']))
+    self.assertEqual([], index.roles_covering(['read', 'unknown']))
+    self.assertEqual({'cloud.admin', 'cloud.reader', 'db.viewer'},
+                     set(index.roles_covering([])))
+
+    index.add_role('cloud.lister', ['list'])
+    self.assertEqual(['cloud.admin', 'cloud.lister', 'cloud.reader'],
+                     index.roles_by_prefix('cloud.'))
+    self.assertEqual({'cloud.lister', 'db.viewer'},
+                     set(index.roles_covering(['list'])))
+
+  def test_role_index_add_role(self):
+    """Test the role index stays current when adding roles."""
+    session_maker, data_access = session_creator('test')
+    session = session_maker()
+    client = ModelCreatorClient(session, data_access)
+    _ = ModelCreator(test_models.ROLES_PREFIX_TESTING_1, client)
+
+    index = data_access.get_role_index(session)
+    data_access.add_role_by_name(session, u'cloud.test', ['perm1', 'perm2'])
+    self.assertIs(index, data_access.get_role_index(session))
+    self.assertEqual(['cloud.test'],
+                     data_access.list_roles_by_prefix(session, 'cloud.t'))
+    self.assertEqual({('cloud.test', 'perm1'), ('cloud.test', 'perm2')},
+                     {(role.name, permission.name) for role, permission in
+                      data_access.query_permissions_by_roles(
+                          session, ['cloud.test'], [])})
+
   def test_add_group_member(self):
     """Test add_group_member."""
     session_maker, data_access = session_creator('test')
@@ -489,6 +534,46 @@ class DaoTest(ForsetiTestCase):
     for item in expectation:
       self.assertIn(item, explanation)
 
+  def test_explain_denied_prune_top_k(self):
+    """Test explain_denied with role pruning and ranking."""
+    session_maker, data_access = session_creator('test')
+    session = session_maker()
+    client = ModelCreatorClient(session, data_access)
+    _ = ModelCreator(test_models.EXPLAIN_GRANTED_1, client)
+
+    explanation = data_access.explain_denied(
+        session, 'user/u2', ['r/res4'], ['read'], None, prune=True)
+    expectation = [
+        (0, [(u'viewer', u'user/u2', u'r/res4')]),
+        (1, [(u'viewer', u'user/u2', u'r/res3')]),
+        (1, [(u'viewer', u'group/g1', u'r/res3')]),
+        (2, [(u'viewer', u'user/u2', u'r/res1')]),
+        (2, [(u'viewer', u'group/g1', u'r/res1')]),
+    ]
+    self.assertEqual(expectation, explanation)
+
+    explanation = data_access.explain_denied(
+        session, 'user/u2', ['r/res4'], ['read'], None, top_k=3)
+    expectation = [
+        (0, [(u'viewer', u'user/u2', u'r/res4')]),
+        (0, [(u'writer', u'user/u2', u'r/res4')]),
+        (0, [(u'admin', u'user/u2', u'r/res4')]),
+    ]
+    self.assertEqual(expectation, explanation)
+
+  def test_prune_roles(self):
+    """Test roles granting a superset of another role are dropped."""
+    role_permissions = {
+        'viewer': frozenset(['read', 'list']),
+        'writer': frozenset(['read', 'list', 'write']),
+        'reader': frozenset(['read', 'get']),
+        'copy': frozenset(['read', 'list']),
+    }
+    self.assertEqual(['copy', 'reader', 'viewer'],
+                     dao.prune_roles(role_permissions, role_permissions))
+    self.assertEqual(['writer'],
+                     dao.prune_roles(role_permissions, ['writer']))
+
   def test_denorm_group_in_group(self):
     """Test group_in_group denormalization."""
     session_maker, data_access = session_creator('test')
@@ -496,7 +581,8 @@ class DaoTest(ForsetiTestCase):
     client = ModelCreatorClient(session, data_access)
     _ = ModelCreator(test_models.GROUP_IN_GROUP_TESTING_1, client)
 
-    iterations = data_access.denorm_group_in_group(session)
+    iterations = data_access.denorm_group_in_group(
+        session, method=dao.GROUP_CLOSURE_SQL)
     self.assertEqual(iterations,
                      4,
                      'Denormalization should have taken 4 iterations.')
@@ -536,6 +622,41 @@ class DaoTest(ForsetiTestCase):
         denormed_set,
         'Denormalized should be equivalent to transitive closure')
 
+  def test_denorm_group_in_group_in_memory(self):
+    """Test in memory group_in_group denormalization matches SQL."""
+    session_maker, data_access = session_creator('test')
+    session = session_maker()
+    client = ModelCreatorClient(session, data_access)
+    _ = ModelCreator(test_models.GROUP_IN_GROUP_TESTING_1, client)
+
+    def denormed():
+      entries = session.query(data_access.TBL_GROUP_IN_GROUP).all()
+      return set([(i.parent, i.member) for i in entries])
+
+    data_access.denorm_group_in_group(session, method=dao.GROUP_CLOSURE_SQL)
+    expected = denormed()
+    iterations = data_access.denorm_group_in_group(session)
+    self.assertEqual(1, iterations)
+    self.assertEqual(expected, denormed())
+
+  def test_group_closure(self):
+    """Test group_closure with cycles and selected groups."""
+    edges = [('g1', 'g2'), ('g2', 'g3'), ('g3', 'g1'), ('g3', 'g4'),
+             ('g4', 'g5'), ('g5', 'g5'), ('g6', 'g4')]
+    cycle = set(['g1', 'g2', 'g3', 'g4', 'g5'])
+    expected = set([(p, m) for p in ['g1', 'g2', 'g3'] for m in cycle])
+    expected.update([('g4', 'g5'), ('g5', 'g5'), ('g6', 'g4'), ('g6', 'g5')])
+
+    self.assertEqual(expected, set(dao.group_closure(edges)))
+    self.assertEqual(set([('g6', 'g4'), ('g6', 'g5')]),
+                     set(dao.group_closure(edges, ['g6', 'g7'])))
+
+  def test_bit_numbers(self):
+    """Test _bit_numbers returns the set bits of wide sparse bitmaps."""
+    self.assertEqual([], dao._bit_numbers(0))
+    self.assertEqual([0, 3], dao._bit_numbers(0b1001))
+    self.assertEqual([2, 100000], dao._bit_numbers((1 << 100000) | 4))
+
   def test_query_access_by_permission(self):
     """Test query_access_by_permission."""
     session_maker, data_access = session_creator('test')
@@ -635,6 +756,40 @@ class DaoTest(ForsetiTestCase):
         self.assertIn((acc_res, acc_members), access,
                       'Should find access in expected')
 
+  def test_query_access_by_permission_pages(self):
+    """Test query_access_by_permission read in pages and resumed."""
+    session_maker, data_access = session_creator('test')
+    session = session_maker()
+    client = ModelCreatorClient(session, data_access)
+    _ = ModelCreator(test_models.ACCESS_BY_PERMISSIONS_1, client)
+
+    for expand_groups in [False, True]:
+      for expand_resources in [False, True]:
+        expected = list(data_access.query_access_by_permission(
+            session, permission_name='read', expand_groups=expand_groups,
+            expand_resources=expand_resources))
+        self.assertEqual(sorted((res, role) for role, res, _ in expected),
+                         [(res, role) for role, res, _ in expected])
+        self.assertEqual(
+            expected,
+            list(data_access.query_access_by_permission(
+                session, permission_name='read', expand_groups=expand_groups,
+                expand_resources=expand_resources, page_size=1)))
+
+        for i, (role, resource, _) in enumerate(expected):
+          self.assertEqual(
+              expected[i + 1:],
+              list(data_access.query_access_by_permission(
+                  session, permission_name='read',
+                  expand_groups=expand_groups,
+                  expand_resources=expand_resources,
+                  start_after=(resource, role), page_size=2)))
+
+    self.assertIn(
+        ('writer', u'r/res3', set([u'group/g3', u'user/u3', u'user/u4'])),
+        list(data_access.query_access_by_permission(
+            session, permission_name='read', expand_groups=True)))
+
   def test_query_access_by_member(self):
     """Test query_access_by_member."""
     session_maker, data_access = session_creator('test')
@@ -861,6 +1016,28 @@ class DaoTest(ForsetiTestCase):
       else:
         self.assertFalse(f(session, frn, perm, member))
 
+  def test_batch_check_iam_policy(self):
+    """Test batch_check_iam_policy gives the same answers as single checks."""
+    session_maker, data_access = session_creator('test')
+    session = session_maker()
+    client = ModelCreatorClient(session, data_access)
+    _ = ModelCreator(test_models.EXPLAIN_GRANTED_1, client)
+
+    checks = [(resource, permission, member)
+              for resource in ['r/res1', 'r/res2', 'r/res3', 'r/res4']
+              for permission in ['read', 'list', 'write', 'delete', 'unknown']
+              for member in ['user/u1', 'user/u2', 'user/u3', 'user/u4',
+                             'group/g1']]
+    self.assertEqual(
+        [data_access.check_iam_policy(session, *check) for check in checks],
+        data_access.batch_check_iam_policy(session, checks))
+    self.assertEqual([], data_access.batch_check_iam_policy(session, []))
+
+    with self.assertRaisesRegexp(Exception, 'Resource not found: r/unknown'):
+      data_access.batch_check_iam_policy(
+          session, [('r/res1', 'read', 'user/u1'),
+                    ('r/unknown', 'read', 'user/u1')])
+
   def test_get_roles_by_permission_names(self):
     session_maker, data_access = session_creator('test')
     session = session_maker()
@@ -986,6 +1163,132 @@ class DaoTest(ForsetiTestCase):
                 for r in data_access.find_resource_path(session, test_val)]
       self.assertEqual(comparison, set(result))
 
+  def test_resource_closure(self):
+    """Test resource_closure with missing parents and cycles."""
+    parents = {'r/a': None, 'r/b': 'r/a', 'r/c': 'r/b', 'r/d': 'r/gone',
+               'r/e': 'r/f', 'r/f': 'r/e'}
+    expected = set([
+        ('r/a', 'r/a', 0), ('r/b', 'r/b', 0), ('r/a', 'r/b', 1),
+        ('r/c', 'r/c', 0), ('r/b', 'r/c', 1), ('r/a', 'r/c', 2),
+        ('r/d', 'r/d', 0)])
+    result = set(dao.resource_closure(parents))
+    self.assertEqual(expected, set(row for row in result
+                                   if row[1] not in ['r/e', 'r/f']))
+    # The cycle is broken at the first resource walked.
+    self.assertEqual(set([('r/e', 'r/e', 0), ('r/f', 'r/e', 1),
+                          ('r/f', 'r/f', 0)]),
+                     result - expected)
+
+  def test_expand_special_members(self):
+    """Test the project members are expanded to their special groups."""
+    session_maker, data_access = session_creator('test')
+    session = session_maker()
+    client = ModelCreatorClient(session, data_access)
+    _ = ModelCreator(test_models.COMPLEX_MODEL, client)
+    membership = data_access.TBL_MEMBERSHIP
+
+    def special_memberships():
+      return set(session.query(membership.c.group_name,
+                               membership.c.members_name).filter(
+                                   membership.c.group_name.in_(
+                                       ['projecteditor/project1',
+                                        'projectowner/project1',
+                                        'projectviewer/project2'])))
+
+    expected = set()
+    for group, members in [
+        ('projecteditor/project1', ['user/b', 'group/b']),
+        ('projectowner/project1', ['group/c']),
+        ('projectviewer/project2', ['user/e'])]:
+      expected.update((group, m.name) for m in
+                      data_access.expand_members(session, members))
+    self.assertIn(('projecteditor/project1', 'group/b'), expected)
+    self.assertIn(('projecteditor/project1', 'user/b'), expected)
+    self.assertEqual(expected, special_memberships())
+
+    self.assertEqual(
+        set(['projecteditor/project_does_not_exist']),
+        set(m.name for m in data_access.expand_members(
+            session, ['projecteditor/project_does_not_exist'])))
+
+  def test_membership_index(self):
+    """Test MembershipIndex expansion with nested groups and cycles."""
+    members = [('user/u1', 'user'), ('user/u2', 'user'),
+               ('group/g1', 'group'), ('group/g2', 'group'),
+               ('group/g3', 'group'), ('projectviewer/p1', 'projectviewer'),
+               ('serviceaccount/s1', 'serviceaccount')]
+    memberships = [('group/g1', 'user/u1'), ('group/g2', 'group/g1'),
+                   ('group/g1', 'group/g2'), ('group/g3', 'group/g2'),
+                   ('group/g3', 'user/u2'), ('projectviewer/p1', 'group/g3'),
+                   ('group/gone', 'user/u1')]
+    index = dao.MembershipIndex(members, memberships,
+                                {'group', 'projectviewer'})
+
+    graph = {}
+    self.assertEqual(
+        set(['user/u1', 'group/g1', 'group/g2', 'group/g3',
+             'projectviewer/p1']),
+        set(index.reverse_expand(['user/u1', 'user/unknown'], graph)))
+    self.assertEqual({'user/u1': set(['group/g1']),
+                      'group/g1': set(['group/g2']),
+                      'group/g2': set(['group/g1', 'group/g3']),
+                      'group/g3': set(['projectviewer/p1'])}, graph)
+    self.assertEqual(['serviceaccount/s1'],
+                     index.reverse_expand(['serviceaccount/s1']))
+
+    self.assertEqual(
+        set(['group/g3', 'group/g2', 'group/g1', 'user/u1', 'user/u2']),
+        set(index.expand(['group/g3'])))
+    self.assertEqual(
+        set(['group/g1', 'group/g2', 'user/u1']),
+        set(index.expand(['group/g1', 'user/unknown'])))
+    self.assertEqual(['user/u2'], index.expand(['user/u2']))
+
+  def test_membership_index_refresh(self):
+    """Test the membership index is reloaded after members are added."""
+    session_maker, data_access = session_creator('test')
+    session = session_maker()
+    client = ModelCreatorClient(session, data_access)
+    _ = ModelCreator(test_models.EXPLAIN_GRANTED_1, client)
+
+    index = data_access.get_membership_index(session)
+    self.assertIs(index, data_access.get_membership_index(session))
+    self.assertEqual(
+        set(['group/g3', 'group/g3g1', 'user/u3', 'user/u4']),
+        set(m.name for m in data_access.expand_members(session,
+                                                       ['group/g3'])))
+
+    data_access.add_member(session, 'user/u5', ['group/g3g1'])
+    self.assertIsNot(index, data_access.get_membership_index(session))
+    self.assertIn('user/u5', set(
+        m.name for m in data_access.expand_members(session, ['group/g3'])))
+    self.assertIn('group/g3', set(
+        m.name for m in data_access.reverse_expand_members(session,
+                                                           ['user/u5'])))
+
+  def test_denorm_resource_ancestry(self):
+    """Test the imported ancestry matches the one added with resources."""
+    session_maker, data_access = session_creator('test')
+    session = session_maker()
+    client = ModelCreatorClient(session, data_access)
+    _ = ModelCreator(test_models.RESOURCE_PATH_TESTING_1, client)
+    ancestry = data_access.TBL_RESOURCE_ANCESTOR
+
+    def ancestry_rows():
+      return set(session.query(ancestry.ancestor, ancestry.descendant,
+                               ancestry.depth))
+
+    expected = ancestry_rows()
+    self.assertIn((u'r/r1', u'r/r1r6r1r1r1', 4), expected)
+    self.assertEqual(
+        [u'r/r1r6r1r1r1', u'r/r1r6r1r1', u'r/r1r6r1', u'r/r1r5', u'r/r1'],
+        [r.type_name for r in
+         data_access.find_resource_path(session, u'r/r1r6r1r1r1')])
+
+    self.assertEqual(len(expected),
+                     data_access.denorm_resource_ancestry(session))
+    self.assertEqual(expected, ancestry_rows())
+
   def test_get_member(self):
     session_maker, data_access = session_creator('test')
     session = session_maker()
@@ -0,0 +1,193 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Unit Tests: In memory access graph, compared to the database queries."""
+
+import unittest
+
+from tests.services import test_models
+from tests.services.model_tester import ModelCreator
+from tests.services.model_tester import ModelCreatorClient
+from tests.unittest_utils import ForsetiTestCase
+from google.cloud.forseti.services.dao import session_creator
+from google.cloud.forseti.services.explain.access_graph import AccessGraph
+
+# A member in several groups which share a binding.
+SHARED_BINDING_MODEL = {
+    'resources': {
+        'organization/o1': {
+            'project/p1': {},
+        },
+    },
+    'memberships': {
+        'group/g1': {
+            'user/u1': {},
+        },
+        'group/g2': {
+            'user/u1': {},
+            'user/u2': {},
+        },
+    },
+    'roles': {
+        'a': ['permission/read'],
+        'b': ['permission/read', 'permission/write'],
+    },
+    'bindings': {
+        'organization/o1': {
+            'b': ['user/u1', 'group/g2'],
+        },
+        'project/p1': {
+            'a': ['group/g1', 'group/g2'],
+        },
+    },
+}
+
+
+def _call(function, *args):
+    """Call a function, returning its result or the error message.
+
+    Args:
+        function (func): The function to call.
+        *args: The arguments to the function.
+
+    Returns:
+        object: The result, or the message of the exception raised.
+    """
+    try:
+        return function(*args)
+    except Exception as e:  # pylint: disable=broad-except
+        return str(e)
+
+
+class AccessGraphTest(ForsetiTestCase):
+    """Test the access graph gives the same answers as the database."""
+
+    def _load(self, model):
+        """Create a model and its access graph.
+
+        Args:
+            model (dict): The declarative model.
+        """
+        session_maker, self.data_access = session_creator('test')
+        self.session = session_maker()
+        client = ModelCreatorClient(self.session, self.data_access)
+        _ = ModelCreator(model, client)
+        self.graph = AccessGraph(self.session, self.data_access)
+
+        self.resources = [r.type_name for r in
+                          self.session.query(self.data_access.TBL_RESOURCE)]
+        self.members = [m.name for m in
+                        self.session.query(self.data_access.TBL_MEMBER)]
+        self.roles = [r.name for r in
+                      self.session.query(self.data_access.TBL_ROLE)]
+        self.permissions = [p.name for p in self.session.query(
+            self.data_access.TBL_PERMISSION)] + ['permission/unknown']
+
+    def _assert_same_answers(self):
+        """Compare the graph and the database for all model entities."""
+        session = self.session
+        data_access = self.data_access
+        graph = self.graph
+
+        checks = [(resource, permission, member)
+                  for resource in self.resources
+                  for permission in self.permissions
+                  for member in self.members]
+        self.assertEqual(
+            data_access.batch_check_iam_policy(session, checks),
+            graph.batch_check_iam_policy(checks))
+
+        for resource in self.resources + ['vm/unknown']:
+            self.assertEqual(
+                [r.type_name for r in
+                 data_access.find_resource_path(session, resource)],
+                graph.find_resource_path(resource))
+
+            for permission in self.permissions:
+                for member in self.members + ['user/unknown']:
+                    self.assertEqual(
+                        _call(data_access.check_iam_policy, session,
+                              resource, permission, member),
+                        _call(graph.check_iam_policy,
+                              resource, permission, member))
+
+            for permissions in [[], self.permissions[:1], self.permissions]:
+                for expand_groups in [False, True]:
+                    expected = data_access.query_access_by_resource(
+                        session, resource, permissions, expand_groups)
+                    actual = graph.query_access_by_resource(
+                        resource, permissions, expand_groups)
+                    self.assertEqual(
+                        {k: set(v) for k, v in expected.items()},
+                        {k: set(v) for k, v in actual.items()})
+
+        for member in self.members:
+            self.assertEqual(
+                data_access.reverse_expand_members(session, [member],
+                                                   request_graph=True)[1],
+                graph.reverse_expand_members([member], request_graph=True)[1])
+            self.assertEqual(
+                set(m.name for m in
+                    data_access.expand_members(session, [member])),
+                graph.expand_members([member]))
+
+            for resource in self.resources:
+                for role, permission in (
+                        [(r, None) for r in self.roles] +
+                        [(None, p) for p in self.permissions]):
+                    expected = _call(data_access.explain_granted, session,
+                                     member, resource, role, permission)
+                    actual = _call(graph.explain_granted,
+                                   member, resource, role, permission)
+                    if isinstance(expected, tuple):
+                        expected = (set(expected[0]),) + expected[1:]
+                        actual = (set(actual[0]),) + actual[1:]
+                    self.assertEqual(expected, actual)
+
+            for permissions in [[], self.permissions[:2]]:
+                for expand_resources in [False, True]:
+                    expected = data_access.query_access_by_member(
+                        session, member, permissions, expand_resources)
+                    actual = graph.query_access_by_member(
+                        member, permissions, expand_resources)
+                    self.assertEqual(
+                        sorted((role, sorted(res)) for role, res in expected),
+                        sorted((role, sorted(res)) for role, res in actual))
+
+    def test_complex_model(self):
+        """Validate the answers on the complex model."""
+        self._load(test_models.COMPLEX_MODEL)
+        self._assert_same_answers()
+
+    def test_explain_granted_model(self):
+        """Validate the answers on the explain granted model."""
+        self._load(test_models.EXPLAIN_GRANTED_1)
+        self._assert_same_answers()
+
+    def test_group_in_group_model(self):
+        """Validate the answers on a nested groups model."""
+        self._load(test_models.GROUP_IN_GROUP_TESTING_1)
+        self._assert_same_answers()
+
+    def test_shared_binding_model(self):
+        """Validate the answers for a member in groups sharing bindings."""
+        self._load(SHARED_BINDING_MODEL)
+        self._assert_same_answers()
+        self.assertEqual(
+            [('a', ['project/p1']), ('b', ['organization/o1'])],
+            sorted(self.graph.query_access_by_member('user/u1',
+                                                     ['permission/read'])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -25,6 +25,7 @@ from tests.services.util.db import create_test_engine
 from tests.unittest_utils import ForsetiTestCase
 from google.cloud.forseti.services.base.config import InventoryConfig
 from google.cloud.forseti.services.dao import ModelManager
+from google.cloud.forseti.services.explain.result_cache import ResultCache
 from google.cloud.forseti.services.explain.service import GrpcExplainerFactory
 from google.cloud.forseti.services.inventory.service import GrpcInventoryFactory
 from google.cloud.forseti.services.model.service import GrpcModellerFactory
@@ -36,6 +37,7 @@ class TestServiceConfig(object):
     def __init__(self, inventory_config):
         self.engine = create_test_engine()
         self.model_manager = ModelManager(self.engine)
+        self.explain_cache = ResultCache()
         self.inventory_config = inventory_config
 
     def run_in_background(self, function):
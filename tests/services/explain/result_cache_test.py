@@ -0,0 +1,128 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Unit Tests: Explain query result cache."""
+
+from builtins import object
+import unittest
+
+from tests.services import test_models
+from tests.services.model_tester import ModelCreator
+from tests.services.model_tester import ModelCreatorClient
+from tests.services.util.db import create_test_engine
+from tests.unittest_utils import ForsetiTestCase
+from google.cloud.forseti.services.dao import ModelManager
+from google.cloud.forseti.services.explain import result_cache
+from google.cloud.forseti.services.explain.explainer import Explainer
+from google.cloud.forseti.services.model.modeller import Modeller
+
+
+class TestServiceConfig(object):
+    """ServiceConfig stub."""
+
+    def __init__(self):
+        self.engine = create_test_engine()
+        self.model_manager = ModelManager(self.engine)
+        self.explain_cache = result_cache.ResultCache()
+
+    @staticmethod
+    def get_global_config():
+        """Stub."""
+        return {}
+
+
+class ResultCacheTest(ForsetiTestCase):
+    """Test the result cache."""
+
+    def test_normalize_args(self):
+        """Validate name lists are sorted and other arguments kept."""
+        self.assertEqual(
+            ('user/a', ('permission/a', 'permission/b'), True),
+            result_cache.normalize_args(
+                'user/a', ['permission/b', 'permission/a'], True))
+
+    def test_lru_eviction(self):
+        """Validate the least recently used results are evicted."""
+        cache = result_cache.ResultCache(maxsize=2)
+        cache.put('m1', 0, 'query', ('a',), 'A')
+        cache.put('m1', 0, 'query', ('b',), 'B')
+        self.assertEqual((True, 'A'), cache.get('m1', 0, 'query', ('a',)))
+        cache.put('m1', 0, 'query', ('c',), 'C')
+
+        self.assertEqual((False, None), cache.get('m1', 0, 'query', ('b',)))
+        self.assertEqual((True, 'A'), cache.get('m1', 0, 'query', ('a',)))
+        self.assertEqual((True, 'C'), cache.get('m1', 0, 'query', ('c',)))
+        self.assertEqual({'hits': 3, 'misses': 1, 'size': 2, 'maxsize': 2},
+                         cache.statistics())
+
+    def test_invalidation(self):
+        """Validate updated and deleted models are not served."""
+        cache = result_cache.ResultCache()
+        cache.put('m1', 0, 'query', ('a',), 'A')
+        cache.put('m2', 0, 'query', ('a',), 'A')
+
+        self.assertEqual((False, None), cache.get('m1', 1, 'query', ('a',)))
+        cache.invalidate('m2')
+        self.assertEqual((False, None), cache.get('m2', 0, 'query', ('a',)))
+        self.assertEqual(0, cache.statistics()['size'])
+
+
+class ExplainerCacheTest(ForsetiTestCase):
+    """Test the Explainer queries through the result cache."""
+
+    def setUp(self):
+        """Setup method."""
+        ForsetiTestCase.setUp(self)
+        self.config = TestServiceConfig()
+        model_manager = self.config.model_manager
+        self.handle = model_manager.create(name='cached')
+        scoped_session, self.data_access = model_manager.get(self.handle)
+        self.session = scoped_session.session
+        _ = ModelCreator(test_models.COMPLEX_MODEL,
+                         ModelCreatorClient(self.session, self.data_access))
+        self.explainer = Explainer(self.config)
+
+    def _access_by_resource(self):
+        return self.explainer.get_access_by_resources(
+            self.handle, 'project/project2', ['permission/a'], True)
+
+    def test_cache_hit_and_update(self):
+        """Validate results are cached until the model is updated."""
+        expected = self._access_by_resource()
+        self.assertEqual(expected, self._access_by_resource())
+        self.assertEqual(list(self.explainer.get_access_by_members(
+            self.handle, 'user/e', [], False)), list(
+                self.explainer.get_access_by_members(
+                    self.handle, 'user/e', [], False)))
+        statistics = self.config.explain_cache.statistics()
+        self.assertEqual(2, statistics['hits'])
+        self.assertEqual(2, statistics['misses'])
+
+        self.data_access.add_group_member(self.session, 'user/new',
+                                          ['group/b'])
+        updated = self._access_by_resource()
+        self.assertIn('user/new', updated['role/a'])
+        self.assertNotIn('user/new', expected['role/a'])
+        self.assertEqual(3, self.config.explain_cache.statistics()['misses'])
+
+    def test_model_delete(self):
+        """Validate deleting a model drops its cached results."""
+        self._access_by_resource()
+        self.assertEqual(1, self.config.explain_cache.statistics()['size'])
+
+        Modeller(self.config).delete_model(self.handle)
+        self.assertEqual(0, self.config.explain_cache.statistics()['size'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Unit Tests: Model snapshot files."""
+
+from builtins import object
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests.services import test_models
+from tests.services.explain import access_graph_test
+from tests.services.model_tester import ModelCreator
+from tests.services.model_tester import ModelCreatorClient
+from tests.services.util.db import create_test_engine
+from tests.unittest_utils import ForsetiTestCase
+from google.cloud.forseti.services.dao import ModelManager
+from google.cloud.forseti.services.explain import snapshot
+from google.cloud.forseti.services.explain.explainer import Explainer
+from google.cloud.forseti.services.explain.result_cache import ResultCache
+from google.cloud.forseti.services.model.modeller import Modeller
+
+
+class SnapshotAccessGraphTest(access_graph_test.AccessGraphTest):
+    """Test the snapshot graph gives the same answers as the database."""
+
+    def setUp(self):
+        """Setup method."""
+        access_graph_test.AccessGraphTest.setUp(self)
+        self.snapshot_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Tear down method."""
+        shutil.rmtree(self.snapshot_dir)
+        access_graph_test.AccessGraphTest.tearDown(self)
+
+    def _load(self, model):
+        """Create a model and open the snapshot of its access graph.
+
+        Args:
+            model (dict): The declarative model.
+        """
+        access_graph_test.AccessGraphTest._load(self, model)
+        path = snapshot.snapshot_path(self.snapshot_dir, 'test')
+        snapshot.write_snapshot(self.graph, path)
+        self.graph = snapshot.SnapshotAccessGraph(path)
+
+    def test_not_a_snapshot(self):
+        """Validate other files are rejected."""
+        path = os.path.join(self.snapshot_dir, 'other')
+        with open(path, 'wb') as other_file:
+            other_file.write(b'not a snapshot')
+        with self.assertRaises(ValueError):
+            snapshot.SnapshotAccessGraph(path)
+
+
+class TestServiceConfig(object):
+    """ServiceConfig stub."""
+
+    def __init__(self, snapshot_dir):
+        self.engine = create_test_engine()
+        self.model_manager = ModelManager(self.engine)
+        self.explain_cache = ResultCache()
+        self.global_config = {'explain_snapshot_dir': snapshot_dir}
+
+    def get_global_config(self):
+        """Stub."""
+        return self.global_config
+
+
+class FreezeModelTest(ForsetiTestCase):
+    """Test freezing a model and explaining it from its snapshot."""
+
+    def setUp(self):
+        """Setup method."""
+        ForsetiTestCase.setUp(self)
+        self.snapshot_dir = tempfile.mkdtemp()
+        self.config = TestServiceConfig(self.snapshot_dir)
+        model_manager = self.config.model_manager
+        self.handle = model_manager.create(name='frozen')
+        scoped_session, data_access = model_manager.get(self.handle)
+        _ = ModelCreator(test_models.COMPLEX_MODEL,
+                         ModelCreatorClient(scoped_session.session,
+                                            data_access))
+        with model_manager.modelmaker() as session:
+            model_manager.model(self.handle, expunge=False,
+                                session=session).set_done()
+        self.modeller = Modeller(self.config)
+        self.explainer = Explainer(self.config)
+
+    def tearDown(self):
+        """Tear down method."""
+        shutil.rmtree(self.snapshot_dir)
+        ForsetiTestCase.tearDown(self)
+
+    def test_freeze_model(self):
+        """Validate Explain uses the snapshot of a frozen model."""
+        expected = self.explainer.get_access_by_resources(
+            self.handle, 'vm/instance-1', ['permission/c'], True)
+        self.assertIsNone(self.explainer._access_graph(self.handle))
+
+        path = self.modeller.freeze_model(self.handle)
+        self.assertEqual(
+            path, self.config.model_manager.get_description(
+                self.handle)['snapshot'])
+        self.assertIsInstance(self.explainer._access_graph(self.handle),
+                              snapshot.SnapshotAccessGraph)
+        self.assertEqual(
+            {role: set(members) for role, members in expected.items()},
+            {role: set(members) for role, members in
+             self.explainer.get_access_by_resources(
+                 self.handle, 'vm/instance-1', ['permission/c'],
+                 True).items()})
+        self.assertTrue(self.explainer.check_iam_policy(
+            self.handle, 'bucket/bucket1', 'permission/h', 'user/b'))
+
+        self.modeller.delete_model(self.handle)
+        self.assertFalse(os.path.exists(path))
+
+    def test_frozen_model_not_changed(self):
+        """Validate changes to a frozen model are refused."""
+        model_manager = self.config.model_manager
+        self.modeller.freeze_model(self.handle)
+
+        # Also once the model is loaded again, e.g. after a restart.
+        for _ in range(2):
+            scoped_session, data_access = model_manager.get(self.handle)
+            with scoped_session as session:
+                with self.assertRaises(ValueError):
+                    data_access.add_role_by_name(session, 'new_role',
+                                                 ['permission/a'])
+                with self.assertRaises(ValueError):
+                    data_access.add_group_member(session, 'user/new',
+                                                 ['group/a'])
+                with self.assertRaises(ValueError):
+                    data_access.set_iam_policy(
+                        session, 'bucket/bucket1',
+                        data_access.get_iam_policy(session, 'bucket/bucket1'))
+            del model_manager.sessionmakers[self.handle]
+
+    def test_freeze_model_without_directory(self):
+        """Validate models are not frozen without a snapshot directory."""
+        self.config.global_config = {}
+        with self.assertRaises(ValueError):
+            self.modeller.freeze_model(self.handle)
+
+
+if __name__ == '__main__':
+    unittest.main()
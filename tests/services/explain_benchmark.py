@@ -0,0 +1,166 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmark checking IAM policies one at a time and in a batch.
+
+Generates a resource hierarchy, nested groups, roles and bindings, then
+answers the same random (resource, permission, member) checks with
+check_iam_policy one at a time and with batch_check_iam_policy, and reports
+the time of each.
+
+From the top forseti-security dir, run:
+
+PYTHONPATH=. python tests/services/explain_benchmark.py \
+    [--checks 10000] [--projects 50] [--users 500] [--db /tmp/bench.db]
+"""
+import argparse
+import random
+import time
+
+from google.cloud.forseti.services import dao
+from tests.services.model_tester import ModelCreator
+from tests.services.model_tester import ModelCreatorClient
+
+PERMISSIONS = ['permission/p{}'.format(i) for i in range(30)]
+
+
+def generate_model(projects, users):
+    """Generate a declarative model.
+
+    Projects are spread over folders under one organization and hold a few
+    buckets each. Users are members of one or two groups, groups are
+    members of a team group. Roles grant random subsets of the permissions
+    and are bound to groups and users on random resources.
+
+    Args:
+        projects (int): The number of projects.
+        users (int): The number of users.
+
+    Returns:
+        dict: The model, in the format of tests.services.test_models.
+    """
+    rng = random.Random(42)
+    folders = {}
+    for project in range(projects):
+        folder = folders.setdefault('folder/f{}'.format(project % 10), {})
+        folder['project/p{}'.format(project)] = {
+            'bucket/p{}-b{}'.format(project, bucket): {}
+            for bucket in range(4)}
+    resources = {'organization/org1': folders}
+
+    groups = ['group/g{}'.format(i) for i in range(max(1, users // 20))]
+    group_members = {group: {} for group in groups}
+    for user in range(users):
+        for group in rng.sample(groups, min(len(groups), rng.randint(1, 2))):
+            group_members[group]['user/u{}'.format(user)] = {}
+    teams = {}
+    for i, group in enumerate(groups):
+        teams.setdefault('group/team{}'.format(i % 5), {})[group] = (
+            group_members[group])
+
+    roles = {'role/r{}'.format(i): rng.sample(PERMISSIONS, rng.randint(1, 8))
+             for i in range(12)}
+
+    def all_resources(tree):
+        """All the resource names of a tree."""
+        for name, subtree in tree.items():
+            yield name
+            for child in all_resources(subtree):
+                yield child
+
+    members = groups + list(teams) + ['user/u{}'.format(i)
+                                      for i in range(0, users, 7)]
+    bindings = {}
+    for resource in all_resources(resources):
+        if rng.random() < 0.4:
+            bindings[resource] = {
+                role: rng.sample(members, rng.randint(1, 3))
+                for role in rng.sample(sorted(roles), rng.randint(1, 3))}
+
+    return {'resources': resources,
+            'memberships': teams,
+            'roles': roles,
+            'bindings': bindings}
+
+
+def generate_checks(model, checks):
+    """Generate random checks against a model.
+
+    Args:
+        model (dict): The declarative model.
+        checks (int): The number of checks.
+
+    Returns:
+        list: The (resource, permission, member) checks.
+    """
+    rng = random.Random(7)
+    resources = []
+    stack = [model['resources']]
+    while stack:
+        tree = stack.pop()
+        resources.extend(tree)
+        stack.extend(tree.values())
+    users = set()
+    stack = [model['memberships']]
+    while stack:
+        tree = stack.pop()
+        users.update(name for name in tree if name.startswith('user/'))
+        stack.extend(tree.values())
+    users = sorted(users)
+    return [(rng.choice(resources), rng.choice(PERMISSIONS), rng.choice(users))
+            for _ in range(checks)]
+
+
+def run_benchmark(session, data_access, checks):
+    """Answer the checks one at a time, then in a batch.
+
+    Args:
+        session (object): Database session of the model.
+        data_access (object): The model data access.
+        checks (list): The (resource, permission, member) checks.
+    """
+    print('{} checks'.format(len(checks)))
+
+    start = time.time()
+    single = [data_access.check_iam_policy(session, *check)
+              for check in checks]
+    print('{:>8}: {:8.2f}s'.format('single', time.time() - start))
+
+    start = time.time()
+    batch = data_access.batch_check_iam_policy(session, checks)
+    print('{:>8}: {:8.2f}s'.format('batch', time.time() - start))
+
+    print('{} allowed'.format(sum(batch)))
+    if single != batch:
+        print('Results differ!')
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--checks', type=int, default=10000)
+    parser.add_argument('--projects', type=int, default=50)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--db', default=None,
+                        help='Sqlite file to use, in memory by default.')
+    args = parser.parse_args()
+
+    session_maker, data_access = dao.session_creator('bench', args.db)
+    session = session_maker()
+    model = generate_model(args.projects, args.users)
+    _ = ModelCreator(model, ModelCreatorClient(session, data_access))
+    run_benchmark(session, data_access, generate_checks(model, args.checks))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for google.services.inventory.cai_memory_storage."""
+
+from io import StringIO
+import os
+import unittest
+
+from tests.services.inventory.cai_temporary_storage_test import (
+    CAI_IAM_POLICY_DATA)
+from tests.services.inventory.cai_temporary_storage_test import (
+    CAI_RESOURCE_DATA)
+from tests.unittest_utils import ForsetiTestCase
+
+from google.cloud.forseti.services.inventory import cai_memory_storage
+from google.cloud.forseti.services.inventory import cai_temporary_storage
+
+LOOKUPS = [
+    ('iter', cai_temporary_storage.ContentTypes.resource,
+     'cloudresourcemanager.googleapis.com/Folder',
+     '//cloudresourcemanager.googleapis.com/organizations/1234567890'),
+    ('iter', cai_temporary_storage.ContentTypes.resource,
+     'storage.googleapis.com/Bucket',
+     '//cloudresourcemanager.googleapis.com/projects/44444'),
+    ('iter', cai_temporary_storage.ContentTypes.iam_policy,
+     'cloudresourcemanager.googleapis.com/Project',
+     '//cloudresourcemanager.googleapis.com/projects/33333'),
+    ('fetch', cai_temporary_storage.ContentTypes.resource,
+     'cloudresourcemanager.googleapis.com/Folder',
+     '//cloudresourcemanager.googleapis.com/folders/22222'),
+    ('fetch', cai_temporary_storage.ContentTypes.iam_policy,
+     'cloudresourcemanager.googleapis.com/Organization',
+     '//cloudresourcemanager.googleapis.com/organizations/1234567890'),
+    ('fetch', cai_temporary_storage.ContentTypes.resource,
+     'cloudresourcemanager.googleapis.com/Folder',
+     '//cloudresourcemanager.googleapis.com/folders/missing'),
+]
+
+
+class CaiMemoryStoreTest(ForsetiTestCase):
+    """Test the CaiMemoryStore and its data access."""
+
+    def setUp(self):
+        """Setup method."""
+        ForsetiTestCase.setUp(self)
+        self.engine, self.dbfile = cai_temporary_storage.create_sqlite_db()
+        self.sqlite_rows = self._populate(cai_temporary_storage.CaiDataAccess,
+                                          self.engine)
+
+    def tearDown(self):
+        """Tear down method."""
+        os.unlink(self.dbfile)
+        ForsetiTestCase.tearDown(self)
+
+    @staticmethod
+    def _populate(data_access, engine):
+        """Load the test dumps into a store.
+
+        Args:
+            data_access (class): The data access class of the store.
+            engine (object): The sqlite engine or memory store.
+
+        Returns:
+            int: The number of rows loaded.
+        """
+        return sum(data_access.populate_cai_data(StringIO(data), engine)
+                   for data in (CAI_RESOURCE_DATA, CAI_IAM_POLICY_DATA))
+
+    @staticmethod
+    def _lookup(engine):
+        """Run all test lookups against a store.
+
+        Args:
+            engine (object): The sqlite engine or memory store.
+
+        Returns:
+            list: The results of each lookup.
+        """
+        data_access = cai_memory_storage.get_data_access(engine)
+        results = []
+        for method, content_type, asset_type, name in LOOKUPS:
+            if method == 'iter':
+                results.append(list(data_access.iter_cai_assets(
+                    content_type, asset_type, name, engine)))
+            else:
+                results.append(data_access.fetch_cai_asset(
+                    content_type, asset_type, name, engine))
+        return results
+
+    def test_lookups_match_sqlite(self):
+        """Validate the memory store returns the same data as sqlite."""
+        store = cai_memory_storage.CaiMemoryStore(64 * 1024 * 1024)
+        rows = self._populate(cai_memory_storage.CaiMemoryDataAccess, store)
+
+        self.assertEqual((self.sqlite_rows, self.sqlite_rows),
+                         (rows, len(store)))
+        self.assertIsNone(store.engine)
+        self.assertEqual(self._lookup(self.engine), self._lookup(store))
+        summary = cai_temporary_storage.get_query_stats(store).summary()
+        self.assertEqual(3, summary['iter_cai_assets']['calls'])
+        self.assertEqual(3, summary['fetch_cai_asset']['calls'])
+
+    def test_fetch_returns_copies(self):
+        """Validate fetched assets can be modified by the caller."""
+        store = cai_memory_storage.CaiMemoryStore(64 * 1024 * 1024)
+        self._populate(cai_memory_storage.CaiMemoryDataAccess, store)
+        args = LOOKUPS[3][1:] + (store,)
+
+        asset, _ = cai_memory_storage.CaiMemoryDataAccess.fetch_cai_asset(*args)
+        asset['displayName'] = 'changed'
+        asset, _ = cai_memory_storage.CaiMemoryDataAccess.fetch_cai_asset(*args)
+        self.assertEqual('test-folder-22222', asset['displayName'])
+
+    def test_spill_to_sqlite(self):
+        """Validate the store moves to sqlite once over the memory cap."""
+        store = cai_memory_storage.CaiMemoryStore(2048)
+        rows = self._populate(cai_memory_storage.CaiMemoryDataAccess, store)
+
+        self.assertIsNotNone(store.engine)
+        self.addCleanup(os.unlink, store.tmpfile)
+        self.assertEqual(0, len(store))
+        self.assertEqual(self.sqlite_rows, rows)
+        self.assertEqual(self._lookup(self.engine), self._lookup(store))
+
+    def test_clear_cai_data(self):
+        """Validate clearing the memory store."""
+        store = cai_memory_storage.CaiMemoryStore(64 * 1024 * 1024)
+        rows = self._populate(cai_memory_storage.CaiMemoryDataAccess, store)
+
+        self.assertEqual(
+            rows, cai_memory_storage.CaiMemoryDataAccess.clear_cai_data(store))
+        self.assertEqual(0, store.memory_usage)
+        self.assertEqual([[], [], [], ({}, None), ({}, None), ({}, None)],
+                         self._lookup(store))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmark the CAI temporary store data formats.
+
+Writes a synthetic CAI dump, then for each data format measures loading the
+dump into a temporary store, decoding every stored asset and repeated
+fetch_cai_asset lookups, which are served by the asset cache.
+
+From the top forseti-security dir, run:
+
+PYTHONPATH=. python tests/services/inventory/cai_temporary_storage_benchmark.py \
+    [--lines 1000000] [--fetches 100000]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from google.cloud.forseti.services.inventory import cai_temporary_storage
+
+BUCKET_TYPE = 'storage.googleapis.com/Bucket'
+PROJECT_TYPE = 'cloudresourcemanager.googleapis.com/Project'
+BUCKETS_PER_PROJECT = 50
+
+
+def project_name(project):
+    """Full CAI name of a synthetic project.
+
+    Args:
+        project (int): The project number.
+
+    Returns:
+        str: The full name.
+    """
+    return '//cloudresourcemanager.googleapis.com/projects/{}'.format(project)
+
+
+def write_dump(dump_file, lines):
+    """Write a synthetic dump of projects, buckets and their IAM policies.
+
+    Args:
+        dump_file (file): The file to write the dump to.
+        lines (int): The number of lines to write.
+    """
+    written = 0
+    project = 0
+    while written < lines:
+        parent = project_name(project)
+        assets = [{'name': parent,
+                   'asset_type': PROJECT_TYPE,
+                   'resource': {'parent': '//cloudresourcemanager.googleapis'
+                                          '.com/organizations/1',
+                                'data': {'projectNumber': str(project),
+                                         'projectId': 'p-{}'.format(project),
+                                         'lifecycleState': 'ACTIVE',
+                                         'labels': {'env': 'test'}}}}]
+        for bucket in range(BUCKETS_PER_PROJECT):
+            bucket_id = 'bucket-{}-{}'.format(project, bucket)
+            bucket_name = '//storage.googleapis.com/{}'.format(bucket_id)
+            assets.append({
+                'name': bucket_name,
+                'asset_type': BUCKET_TYPE,
+                'resource': {'parent': parent,
+                             'data': {'id': bucket_id,
+                                      'location': 'US',
+                                      'storageClass': 'STANDARD',
+                                      'labels': {},
+                                      'acl': [],
+                                      'versioning': {'enabled': False},
+                                      'internal_data': 'x' * 200}}})
+            assets.append({
+                'name': bucket_name,
+                'asset_type': BUCKET_TYPE,
+                'iam_policy': {'etag': 'CAE=',
+                               'bindings': [
+                                   {'role': 'roles/storage.legacyBucketOwner',
+                                    'members': ['projectOwner:p-{}'.format(
+                                        project)]},
+                                   {'role': 'roles/storage.objectViewer',
+                                    'members': ['user:a@example.com',
+                                                'group:b@example.com']}]}})
+        for asset in assets[:lines - written]:
+            dump_file.write(json.dumps(asset))
+            dump_file.write('\n')
+        written += len(assets)
+        project += 1
+
+
+def run_benchmark(dump_path, data_format, fetches):
+    """Load, decode and fetch the dump with a data format.
+
+    Args:
+        dump_path (str): Path to the synthetic dump.
+        data_format (str): The CAI temporary store data format.
+        fetches (int): The number of fetch_cai_asset lookups.
+
+    Returns:
+        dict: Elapsed seconds for each stage and the cache hit rate.
+    """
+    data_access = cai_temporary_storage.CaiDataAccess
+    engine, tmpfile = cai_temporary_storage.create_sqlite_db()
+    try:
+        results = {}
+        start = time.time()
+        with open(dump_path) as dump_file:
+            rows = data_access.populate_cai_data(dump_file, engine,
+                                                 data_format)
+        results['rows'] = rows
+        results['load'] = time.time() - start
+
+        start = time.time()
+        for row in engine.execute(
+                cai_temporary_storage.CaiTemporaryStore.__table__.select()):
+            cai_temporary_storage.decode_asset_data(row['asset_data'])
+        results['decode'] = time.time() - start
+
+        # Crawls look up a small set of parents many times.
+        projects = rows // (BUCKETS_PER_PROJECT * 2 + 1) + 1
+        hot_projects = [project_name(p)
+                        for p in range(min(projects, 1000))]
+        start = time.time()
+        for _ in range(fetches):
+            data_access.fetch_cai_asset(
+                cai_temporary_storage.ContentTypes.resource, PROJECT_TYPE,
+                random.choice(hot_projects), engine)
+        results['fetch'] = time.time() - start
+        cache = cai_temporary_storage.get_asset_cache(engine)
+        results['hit_rate'] = cache.hits / float(cache.hits + cache.misses)
+        return results
+    finally:
+        engine.dispose()
+        os.unlink(tmpfile)
+
+
+def main():
+    """Run the benchmark and print the timings for each data format."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lines', type=int, default=1000000)
+    parser.add_argument('--fetches', type=int, default=100000)
+    args = parser.parse_args()
+
+    dump_fd, dump_path = tempfile.mkstemp('.dump', 'forseti-cai-benchmark-')
+    try:
+        with os.fdopen(dump_fd, 'w') as dump_file:
+            write_dump(dump_file, args.lines)
+
+        for data_format in sorted(cai_temporary_storage.DATA_FORMATS):
+            results = run_benchmark(dump_path, data_format, args.fetches)
+            print('{:<8} load {:>8.2f}s {:>9.0f} rows/sec  decode {:>7.2f}s  '
+                  'fetch {:>7.2f}s ({:.0%} cached)'.format(
+                      data_format, results['load'],
+                      results['rows'] / results['load'], results['decode'],
+                      results['fetch'], results['hit_rate']))
+    finally:
+        os.unlink(dump_path)
+
+
+if __name__ == '__main__':
+    main()
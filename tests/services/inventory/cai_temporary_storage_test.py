@@ -3,6 +3,7 @@
 from future import standard_library
 standard_library.install_aliases()
 from io import StringIO
+import os
 import unittest
 
 from tests.unittest_utils import ForsetiTestCase
@@ -125,6 +126,112 @@ class CaiTemporaryStoreTest(ForsetiTestCase):
                           AssetMetadata(cai_type=cai_type, cai_name=cai_name)),
                          results)
 
+    def test_pickle_data_format(self):
+        """Validate assets stored as pickle read back like json assets."""
+        data_access = cai_temporary_storage.CaiDataAccess
+        pickle_engine, pickle_dbfile = cai_temporary_storage.create_sqlite_db()
+        self.addCleanup(os.unlink, pickle_dbfile)
+        data_access.populate_cai_data(StringIO(CAI_RESOURCE_DATA),
+                                      pickle_engine,
+                                      cai_temporary_storage.PICKLE_DATA_FORMAT)
+        self._add_resources()
+
+        for engine in (self.engine, pickle_engine):
+            row = engine.execute(
+                cai_temporary_storage.CaiTemporaryStore.__table__.select()
+            ).first()
+            self.assertEqual(engine is pickle_engine,
+                             row['asset_data'].startswith(b'\x80'))
+
+        args = (cai_temporary_storage.ContentTypes.resource,
+                'cloudresourcemanager.googleapis.com/Project',
+                '//cloudresourcemanager.googleapis.com/folders/22222')
+        self.assertEqual(
+            list(data_access.iter_cai_assets(*(args + (self.engine,)))),
+            list(data_access.iter_cai_assets(*(args + (pickle_engine,)))))
+
+    def test_fetch_cai_asset_cache(self):
+        """Validate cached fetches return independent copies."""
+        self._add_resources()
+        cache = cai_temporary_storage.get_asset_cache(self.engine)
+        args = (cai_temporary_storage.ContentTypes.resource,
+                'cloudresourcemanager.googleapis.com/Folder',
+                '//cloudresourcemanager.googleapis.com/folders/11111',
+                self.engine)
+
+        first, _ = cai_temporary_storage.CaiDataAccess.fetch_cai_asset(*args)
+        first['displayName'] = 'changed'
+        second, _ = cai_temporary_storage.CaiDataAccess.fetch_cai_asset(*args)
+        self.assertEqual('test-folder-11111', second['displayName'])
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+        # Missing assets are cached until new rows are written.
+        missing_args = args[:2] + ('//missing', self.engine)
+        self.assertEqual(({}, None),
+                         cai_temporary_storage.CaiDataAccess.fetch_cai_asset(
+                             *missing_args))
+        cai_temporary_storage.CaiDataAccess.fetch_cai_asset(*missing_args)
+        self.assertEqual((2, 2), (cache.hits, cache.misses))
+
+        cai_temporary_storage.CaiDataAccess.clear_cai_data(self.engine)
+        self.assertEqual(({}, None),
+                         cai_temporary_storage.CaiDataAccess.fetch_cai_asset(
+                             *args))
+
+    def test_lookup_indexes(self):
+        """Validate lookup indexes are built after the load and used."""
+        index_names = lambda: [
+            row['name'] for row in self.engine.execute(
+                'pragma index_list(cai_temporary_store)')
+            if not row['name'].startswith('sqlite_autoindex')]
+        self.assertEqual([], index_names())
+
+        self._add_resources()
+        self.assertEqual(['idx_cai_parent_lookup'], index_names())
+
+        plan = ' '.join(
+            row[-1] for row in self.engine.execute(
+                'explain query plan select * from cai_temporary_store '
+                'where parent_name = ? and content_type = ? and '
+                'asset_type = ? order by name',
+                ('p', 'resource', 't')))
+        self.assertIn('idx_cai_parent_lookup', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_query_stats(self):
+        """Validate lookup queries are timed per query."""
+        self._add_resources()
+        data_access = cai_temporary_storage.CaiDataAccess
+        for _ in range(2):
+            list(data_access.iter_cai_assets(
+                cai_temporary_storage.ContentTypes.resource,
+                'cloudresourcemanager.googleapis.com/Folder',
+                '//cloudresourcemanager.googleapis.com/organizations/'
+                '1234567890',
+                self.engine))
+        data_access.fetch_cai_asset(
+            cai_temporary_storage.ContentTypes.resource,
+            'cloudresourcemanager.googleapis.com/Folder',
+            '//cloudresourcemanager.googleapis.com/folders/11111',
+            self.engine)
+
+        summary = cai_temporary_storage.get_query_stats(self.engine).summary()
+        self.assertEqual(2, summary['iter_cai_assets']['calls'])
+        self.assertEqual(1, summary['fetch_cai_asset']['calls'])
+        self.assertGreaterEqual(summary['iter_cai_assets']['total'],
+                                summary['iter_cai_assets']['max'])
+
+    def test_asset_cache_eviction(self):
+        """Validate the least recently used entry is evicted."""
+        cache = cai_temporary_storage.AssetCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(1, cache.get('a'))
+        self.assertEqual(3, cache.get('c'))
+
 
 
 CAI_RESOURCE_DATA = """{"name":"//cloudresourcemanager.googleapis.com/organizations/1234567890","asset_type":"cloudresourcemanager.googleapis.com/Organization","resource":{"version":"v1beta1","discovery_document_uri":"https://cloudresourcemanager.googleapis.com/$discovery/rest","discovery_name":"Organization","data":{"creationTime":"2016-09-02T18:55:58.783Z","displayName":"test.forseti","lastModifiedTime":"2017-02-14T05:43:45.012Z","lifecycleState":"ACTIVE","name":"organizations/1234567890","organizationId":"1234567890","owner":{"directoryCustomerId":"C00h00n00"}}}}
@@ -14,6 +14,7 @@
 """Unit Tests: Cloud Asset API integration for Forseti Server."""
 
 import os
+import threading
 import time
 import unittest
 from googleapiclient import errors
@@ -328,6 +329,47 @@ class InventoryCloudAssetTest(unittest_utils.ForsetiTestCase):
             'state': 'READY'}, AssetMetadata(cai_type=cai_type, cai_name=cai_name))
         self.assertEqual(expected_resource, resource)
 
+    def test_load_cloudasset_data_local_dumps_parallel(self):
+        """Validate local dump files are loaded with parser processes."""
+        inventory_config = InventoryConfig(
+            'organizations/987654321',
+            '',
+            {},
+            0,
+            {'enabled': True,
+             'gcs_path': 'gs://test-bucket',
+             'ingestion_workers': 2,
+             'cai_dump_file_gcs_paths': [
+                 os.path.join(TEST_RESOURCE_DIR_PATH,
+                              'mock_cai_resources.dump'),
+                 os.path.join(TEST_RESOURCE_DIR_PATH,
+                              'mock_cai_iam_policies.dump')]})
+
+        results = cloudasset.load_cloudasset_data(self.engine,
+                                                  inventory_config,
+                                                  self.inventory_index_id)
+        self.assertTrue(results)
+        self.assertFalse(self.mock_export_assets.called)
+        self.assertFalse(self.mock_download.called)
+        self.validate_data_in_table()
+
+    def test_parser_pool_batches_bounded(self):
+        """Validate batches wait for a slot until earlier rows are written."""
+        in_flight = threading.Semaphore(2)
+        stopped = threading.Event()
+        line_batches = cloudasset._acquire_batches(
+            iter([['l1'], ['l2'], ['l3'], ['l4']]), in_flight, stopped)
+        self.assertEqual([['l1'], ['l2']],
+                         [next(line_batches), next(line_batches)])
+        self.assertFalse(in_flight.acquire(blocking=False))
+
+        rows = cloudasset._release_batches(iter([['r1', 'r2']]), in_flight)
+        self.assertEqual(['r1', 'r2'], list(rows))
+        self.assertEqual(['l3'], next(line_batches))
+
+        stopped.set()
+        self.assertEqual(['l4'], next(line_batches))
+
     def test_load_cloudasset_data_cai_apierror(self):
         """Validate load_cloud_asset handles an API error from CAI."""
         response = httplib2.Response(
@@ -43,5 +43,19 @@ class ConfigTest(unittest_utils.ForsetiTestCase):
                              'folder/12345'})
 
 
+    def test_inventory_config_cai_data_format(self):
+        cai_configs = {'enabled': True, 'gcs_path': 'gs://test-bucket'}
+        inventory_config = InventoryConfig('test-org-id', '', {}, 0,
+                                           cai_configs)
+        self.assertEqual('json', inventory_config.get_cai_data_format())
+
+        cai_configs['data_format'] = 'pickle'
+        self.assertEqual('pickle', inventory_config.get_cai_data_format())
+
+        cai_configs['data_format'] = 'pikle'
+        with self.assertRaises(ValueError):
+            inventory_config.get_cai_data_format()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -602,6 +602,15 @@ class CloudAssetCrawlerTest(CrawlerBase):
 
         self.assertEqual(expected_counts, result_counts)
 
+    def test_cai_crawl_with_memory_store(self):
+        """Validate crawling CAI data held in memory matches sqlite."""
+        sqlite_counts = self._run_crawler(self.inventory_config)
+
+        self.inventory_config.cai_configs['memory_store_max_mb'] = 64
+        memory_counts = self._run_crawler(self.inventory_config)
+
+        self.assertEqual(sqlite_counts, memory_counts)
+
     def test_crawl_cai_api_polling_disabled(self):
         """Validate using only CAI and no API polling works."""
         self.inventory_config.api_quota_configs = {
@@ -0,0 +1,76 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Unit Tests: Inventory resource dedupe."""
+
+import unittest
+import unittest.mock as mock
+
+from google.cloud.forseti.services.inventory import dedupe
+from tests.unittest_utils import ForsetiTestCase
+
+
+class DedupeTest(ForsetiTestCase):
+    """Test the inventory dedupe implementations."""
+
+    def test_create_dedupe(self):
+        """Test the dedupe type is selected from the configuration."""
+        self.assertIsInstance(dedupe.create_dedupe(), dedupe.ExactDedupe)
+        self.assertIsInstance(dedupe.create_dedupe({'type': 'hashed'}),
+                              dedupe.HashedDedupe)
+
+    def test_exact_dedupe(self):
+        """Test duplicates are detected and counted."""
+        exact = dedupe.ExactDedupe()
+        self.assertTrue(exact.add('organization/1/'))
+        self.assertTrue(exact.add('organization/1/project/2/'))
+        self.assertFalse(exact.add('organization/1/'))
+        self.assertEqual(1, exact.duplicates)
+        self.assertGreater(exact.memory_usage(), 0)
+
+    def test_hashed_dedupe(self):
+        """Test duplicates are detected across shards."""
+        hashed = dedupe.HashedDedupe(shards=4)
+        names = ['organization/1/project/{}/'.format(i) for i in range(100)]
+        for name in names:
+            self.assertTrue(hashed.add(name))
+        for name in names:
+            self.assertFalse(hashed.add(name))
+        self.assertEqual(100, hashed.duplicates)
+        self.assertGreater(hashed.memory_usage(), 0)
+
+    def test_hashed_dedupe_exact_check_on_collision(self):
+        """Test the exact check resolves a hash collision."""
+        exact_check = mock.Mock(return_value=False)
+        hashed = dedupe.HashedDedupe(shards=1, exact_check=exact_check)
+        with mock.patch.object(dedupe.HashedDedupe, '_hash', return_value=42):
+            self.assertTrue(hashed.add('organization/1/'))
+            # Still in flight, no database check needed.
+            self.assertFalse(hashed.add('organization/1/'))
+            exact_check.assert_not_called()
+            hashed.done('organization/1/')
+
+            # Same hash but never written, so it is a collision.
+            self.assertTrue(hashed.add('organization/2/'))
+            exact_check.assert_called_once_with('organization/2/')
+            hashed.done('organization/2/')
+
+            exact_check.return_value = True
+            self.assertFalse(hashed.add('organization/2/'))
+
+        self.assertEqual(1, hashed.collisions)
+        self.assertEqual(2, hashed.duplicates)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,6 +16,7 @@
 from future import standard_library
 standard_library.install_aliases()
 import os
+import threading
 import unittest
 import unittest.mock as mock
 
@@ -23,7 +24,8 @@ from datetime import datetime
 from google.cloud.forseti.services import db
 from google.cloud.forseti.services.inventory.base.gcp import AssetMetadata
 from google.cloud.forseti.services.inventory.storage import (
-    Categories, DataAccess, initialize, InventoryIndex, Storage)
+    BufferedStorage, Categories, DataAccess, initialize, InventoryIndex,
+    Storage)
 from sqlalchemy.orm import sessionmaker
 from tests.services.util.db import create_test_engine_with_file
 from tests.services.util.mock import ResourceMock
@@ -272,6 +274,137 @@ class StorageTest(ForsetiTestCase):
                                      [])),
                                  'No types should yield empty list')
 
+    def test_buffered_write(self):
+        """Test batched writes keep parent ids and policy rows intact."""
+
+        initialize(self.engine)
+        scoped_sessionmaker = db.create_scoped_sessionmaker(self.engine)
+
+        res_org = ResourceMock('1', {'id': 'test'}, 'organization', 'resource')
+        res_org.set_org_policy(MOCK_ORG_POLICY)
+        res_proj1 = ResourceMock('2', {'id': 'test'}, 'project', 'resource',
+                                 res_org)
+        res_proj1.set_iam_policy({'id': 'test'})
+        res_proj1.set_billing_info({'id': 'test'})
+        res_buc1 = ResourceMock('3', {'id': 'test'}, 'bucket', 'resource',
+                                res_proj1)
+        res_proj2 = ResourceMock('4', {'id': 'test'}, 'project', 'resource',
+                                 res_org)
+        res_dup = ResourceMock('4', {'id': 'dup'}, 'project', 'resource',
+                               res_org)
+
+        resources = [res_org, res_proj1, res_buc1, res_proj2, res_dup]
+
+        with scoped_sessionmaker() as session:
+            with BufferedStorage(session, self.engine,
+                                 max_buffered_rows=3) as storage:
+                for resource in resources:
+                    storage.write(resource)
+                storage.commit()
+                inventory_index_id = storage.inventory_index.id
+
+                rows = self.reduced_inventory(session, inventory_index_id, [])
+                self.assertEqual(4, len(rows))
+                parents = {row.resource_id: row.parent_id for row in rows}
+                self.assertIsNone(parents['1'])
+                self.assertEqual(res_org.inventory_key(), parents['2'])
+                self.assertEqual(res_proj1.inventory_key(), parents['3'])
+                self.assertEqual(res_org.inventory_key(), parents['4'])
+
+                iam_policies = self.reduced_inventory(
+                    session, inventory_index_id, ['project'],
+                    Categories.iam_policy)
+                self.assertEqual(1, len(iam_policies))
+                self.assertEqual(res_proj1.inventory_key(),
+                                 iam_policies[0].parent_id)
+
+                org_policy = self.reduced_inventory(
+                    session, inventory_index_id, ['organization'],
+                    Categories.org_policy)
+                self.assertEqual(1, len(org_policy))
+
+            # A second inventory continues the id sequence.
+            with BufferedStorage(session, self.engine) as storage:
+                storage.write(ResourceMock('1', {'id': 'test'},
+                                           'organization', 'resource'))
+                storage.commit()
+                second_rows = self.reduced_inventory(
+                    session, storage.inventory_index.id, [])
+                self.assertEqual(1, len(second_rows))
+                self.assertGreater(second_rows[0].id,
+                                   max(row.id for row in rows))
+
+    def test_hashed_dedupe(self):
+        """Test duplicates are skipped with the hashed dedupe."""
+
+        initialize(self.engine)
+        scoped_sessionmaker = db.create_scoped_sessionmaker(self.engine)
+
+        res_org = ResourceMock('1', {'id': 'test'}, 'organization', 'resource')
+        res_proj = ResourceMock('2', {'id': 'test'}, 'project', 'resource',
+                                res_org)
+        res_dup = ResourceMock('2', {'id': 'dup'}, 'project', 'resource',
+                               res_org)
+
+        for storage_cls in (Storage, BufferedStorage):
+            with scoped_sessionmaker() as session:
+                with storage_cls(session, self.engine,
+                                 dedupe_configs={'type': 'hashed'}) as storage:
+                    self.assertTrue(storage.write(res_org))
+                    self.assertTrue(storage.write(res_proj))
+                    self.assertFalse(storage.write(res_dup))
+                    storage.commit()
+
+                    self.assertEqual(1, storage.dedupe.duplicates)
+                    self.assertEqual(2, len(self.reduced_inventory(
+                        session, storage.inventory_index.id, [])))
+                    self.assertTrue(storage._is_stored(
+                        res_proj.get_full_resource_name()))
+
+
+    def test_hashed_dedupe_during_flush(self):
+        """Test a duplicate is skipped while its batch is being inserted."""
+
+        initialize(self.engine)
+        scoped_sessionmaker = db.create_scoped_sessionmaker(self.engine)
+
+        res_org = ResourceMock('1', {'id': 'test'}, 'organization', 'resource')
+        res_dup = ResourceMock('1', {'id': 'dup'}, 'organization', 'resource')
+        engine = self.engine
+        written = []
+
+        with scoped_sessionmaker() as session:
+            with BufferedStorage(session, self.engine,
+                                 dedupe_configs={'type': 'hashed'}) as storage:
+
+                class FlushingEngine(object):
+                    """Engine writing a duplicate from another thread while
+                    a batch is being inserted."""
+
+                    def __getattr__(self, name):
+                        return getattr(engine, name)
+
+                    def execute(self, statement, *args):
+                        if args and not written:
+                            write_thread = threading.Thread(
+                                target=lambda: written.append(
+                                    storage.write(res_dup)))
+                            write_thread.start()
+                            write_thread.join(10)
+                        return engine.execute(statement, *args)
+
+                storage.engine = FlushingEngine()
+                self.assertTrue(storage.write(res_org))
+                storage.flush()
+                storage.engine = self.engine
+                storage.commit()
+
+                self.assertEqual([False], written)
+                self.assertEqual(1, storage.dedupe.duplicates)
+                self.assertEqual(0, storage.dedupe.collisions)
+                self.assertEqual(1, len(self.reduced_inventory(
+                    session, storage.inventory_index.id, [])))
+
 
 class InventoryIndexTest(ForsetiTestCase):
     """Test inventory storage."""
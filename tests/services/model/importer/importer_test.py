@@ -203,6 +203,115 @@ class ImporterTest(ForsetiTestCase):
              },
             model_description)
 
+    def _import(self, name, source, **kwargs):
+        """Import the test inventory into a new model.
+
+        Args:
+            name (str): The model name.
+            source (str): The import source.
+            **kwargs (dict): Additional arguments to the importer.
+
+        Returns:
+            tuple: The model handle and its data access.
+        """
+        model_name = self.model_manager.create(name=name)
+        scoped_session, data_access = self.model_manager.get(model_name)
+        with scoped_session as session:
+            import_runner = importer.by_source(source)(
+                session,
+                session,
+                self.model_manager.model(model_name,
+                                         expunge=False,
+                                         session=session),
+                data_access,
+                self.service_config,
+                FAKE_DATETIME_TIMESTAMP,
+                **kwargs)
+            import_runner.run()
+        model = self.model_manager.model(model_name)
+        self.assertIn(model.state, ['SUCCESS', 'PARTIAL_SUCCESS'],
+                      model.message)
+        return model_name, data_access
+
+    def _dump(self, data_access):
+        """Read the model tables that depend on the inventory.
+
+        Args:
+            data_access (object): The data access of the model.
+
+        Returns:
+            dict: The sorted rows of each table.
+        """
+        with self.scoped_session as session:
+            bindings = [(b.resource_type_name, b.role_name,
+                         sorted(m.name for m in b.members))
+                        for b in session.query(data_access.TBL_BINDING)]
+            tables = [data_access.TBL_RESOURCE.__table__,
+                      data_access.TBL_MEMBER.__table__,
+                      data_access.TBL_MEMBERSHIP,
+                      data_access.TBL_GROUP_IN_GROUP.__table__]
+            dump = {table.name.split('_', 1)[1]:
+                        sorted(tuple(row) for row in session.query(table))
+                    for table in tables}
+            dump['bindings'] = sorted(bindings)
+            ancestry = data_access.TBL_RESOURCE_ANCESTOR
+            dump['resource_ancestors'] = sorted(session.query(
+                ancestry.ancestor, ancestry.descendant, ancestry.depth))
+            return dump
+
+    def test_resource_ancestry(self):
+        """Validate the resource ancestry is denormalized on import."""
+        _, data_access = self._import('ancestry', 'INVENTORY')
+        with self.scoped_session as session:
+            resource = data_access.TBL_RESOURCE
+            parents = dict(session.query(resource.type_name,
+                                         resource.parent_type_name))
+            for type_name in parents:
+                path = [type_name]
+                while parents.get(path[-1]) in parents:
+                    path.append(parents[path[-1]])
+                self.assertEqual(
+                    path,
+                    [r.type_name for r in
+                     data_access.find_resource_path(session, type_name)])
+
+    def test_incremental_importer(self):
+        """Validate an incremental import matches a full import."""
+        base_model, base_access = self._import('base', 'INVENTORY')
+        with self.scoped_session as session:
+            resources = base_access.TBL_RESOURCE.__table__
+            session.execute(resources.update().where(
+                resources.c.type_name == 'bucket/bucket1').values(data='{}'))
+            session.execute(resources.delete().where(
+                resources.c.type_name == 'lien/120'))
+            session.execute(resources.insert().values(
+                full_name='organization/111222333/project/project3/'
+                          'bucket/stale/',
+                type_name='bucket/stale',
+                parent_type_name='project/project3',
+                name='stale',
+                type='bucket'))
+            membership = base_access.TBL_MEMBERSHIP
+            session.execute(membership.delete().where(
+                membership.c.group_name == 'group/a_grp@forseti.test'))
+            session.execute(membership.insert().values(
+                group_name='group/stale@forseti.test',
+                members_name='group/b_grp@forseti.test'))
+            session.add(base_access.TBL_GROUP_IN_GROUP(
+                parent='group/stale@forseti.test',
+                member='group/b_grp@forseti.test'))
+            session.commit()
+
+        incremental_model, incremental_access = self._import(
+            'incremental', 'INCREMENTAL', base_model=base_model)
+        _, full_access = self._import('full', 'INVENTORY')
+
+        self.assertEqual(self._dump(full_access),
+                         self._dump(incremental_access))
+        description = self.model_manager.get_description(incremental_model)
+        self.assertEqual(base_model,
+                         description['source_info']['base_model'])
+
     def test_model_action_wrapper_post_action_called(self):
         session = mock.Mock()
         session.flush = mock.Mock()
@@ -364,6 +473,46 @@ class ImporterTest(ForsetiTestCase):
         session.flush.assert_called()
         self.assertEqual(session.flush.call_count, 2)
 
+    @mock.patch.object(importer, 'RESOURCE_BATCH_SIZE', 2)
+    def test_resource_rows_bulk_inserted(self):
+        """Resource rows are inserted in batches, not added to the session."""
+        session = mock.Mock()
+        import_runner = self.importer_cls(
+            session,
+            session,
+            self.model_manager.model(self.model_name,
+                                     expunge=False,
+                                     session=session),
+            self.data_access,
+            self.service_config,
+            inventory_index_id=FAKE_DATETIME_TIMESTAMP)
+        session.reset_mock()
+
+        for i in range(3):
+            resource = mock.Mock()
+            resource.get_resource_id.return_value = str(i)
+            row = import_runner._add_resource_row(
+                resource,
+                full_name='project/{}/'.format(i),
+                type_name='project/{}'.format(i),
+                type='project',
+                parent_type_name=None)
+            import_runner._add_to_cache(row, i)
+
+        self.assertEqual(1, session.execute.call_count)
+        _, rows = session.execute.call_args[0]
+        self.assertEqual(['0', '1'], [row['name'] for row in rows])
+
+        import_runner._commit_session()
+        self.assertEqual(2, session.execute.call_count)
+        _, rows = session.execute.call_args[0]
+        self.assertEqual(['2'], [row['name'] for row in rows])
+        self.assertEqual([], import_runner.resource_rows)
+        session.add.assert_not_called()
+        session.commit.assert_called_once()
+        self.assertEqual(('project/2', 'project/2/'),
+                         import_runner.resource_cache[2])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,152 @@
+# Copyright 2020 The Forseti Security Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Unit Tests: Import phase scheduler."""
+
+from builtins import object
+import threading
+import unittest
+
+from tests.unittest_utils import ForsetiTestCase
+from google.cloud.forseti.services.model.importer import scheduler
+from google.cloud.forseti.services.model.importer.scheduler import ImportPhase
+
+
+class FakeSession(object):
+    """Session handed to the phase fetch functions."""
+
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def _fetch(count, error=None):
+    """Create a fetch function yielding count rows.
+
+    Args:
+        count (int): Number of rows.
+        error (Exception): Raised after the rows, if set.
+
+    Returns:
+        func: The fetch function.
+    """
+    def fetch(session):
+        for i in range(count):
+            yield (session.name, i)
+        if error:
+            raise error
+    return fetch
+
+
+class ImportSchedulerTest(ForsetiTestCase):
+    """Test the import phase scheduler."""
+
+    def setUp(self):
+        """Setup method."""
+        ForsetiTestCase.setUp(self)
+        self.sessions = []
+        self.lock = threading.Lock()
+
+    def _session_factory(self):
+        with self.lock:
+            session = FakeSession('reader')
+            self.sessions.append(session)
+        return session
+
+    @staticmethod
+    def _phases():
+        return [
+            ImportPhase('resources', None, fetch=_fetch(2500)),
+            ImportPhase('roles', None, depends_on=['resources'],
+                        fetch=_fetch(3)),
+            ImportPhase('principals', None, fetch=_fetch(5)),
+            ImportPhase('closure', None, depends_on=['principals']),
+            ImportPhase('policies', None,
+                        depends_on=['roles', 'closure'],
+                        fetch=_fetch(7)),
+        ]
+
+    @staticmethod
+    def _run(import_scheduler):
+        written = []
+
+        def write_phase(phase, rows):
+            written.append((phase.name,
+                            None if rows is None else list(rows)))
+
+        import_scheduler.run(write_phase, FakeSession('writer'))
+        return written
+
+    def test_order_phases(self):
+        """Validate phases are ordered by their dependencies."""
+        phases = [ImportPhase('b', None, depends_on=['a']),
+                  ImportPhase('c', None),
+                  ImportPhase('a', None)]
+        self.assertEqual(['c', 'a', 'b'],
+                         [p.name for p in scheduler.order_phases(phases)])
+
+    def test_order_phases_invalid(self):
+        """Validate unknown and circular dependencies are rejected."""
+        with self.assertRaises(ValueError):
+            scheduler.order_phases([ImportPhase('a', None, depends_on=['x'])])
+        with self.assertRaises(ValueError):
+            scheduler.order_phases([ImportPhase('a', None, depends_on=['b']),
+                                    ImportPhase('b', None, depends_on=['a'])])
+
+    def test_run_without_readers(self):
+        """Validate the writer reads the rows when readers are disabled."""
+        written = self._run(scheduler.ImportScheduler(self._phases()))
+
+        self.assertEqual(['resources', 'roles', 'principals', 'closure',
+                          'policies'], [name for name, _ in written])
+        self.assertEqual([('writer', i) for i in range(2500)], written[0][1])
+        self.assertIsNone(written[3][1])
+        self.assertEqual([], self.sessions)
+
+    def test_run_with_readers(self):
+        """Validate rows are read on reader sessions, respecting dependencies.
+        """
+        written = self._run(scheduler.ImportScheduler(
+            self._phases(), session_factory=self._session_factory, readers=2))
+
+        names = [name for name, _ in written]
+        self.assertEqual(sorted(['resources', 'roles', 'principals', 'closure',
+                                 'policies']), sorted(names))
+        for phase in self._phases():
+            for dependency in phase.depends_on:
+                self.assertLess(names.index(dependency),
+                                names.index(phase.name))
+
+        rows = dict(written)
+        self.assertEqual([('reader', i) for i in range(2500)],
+                         rows['resources'])
+        self.assertEqual([('reader', i) for i in range(7)], rows['policies'])
+        self.assertEqual(4, len(self.sessions))
+        self.assertTrue(all(session.closed for session in self.sessions))
+
+    def test_reader_error(self):
+        """Validate reader errors are raised in the writer."""
+        phases = [ImportPhase('resources', None,
+                              fetch=_fetch(10, ValueError('read failed')))]
+        import_scheduler = scheduler.ImportScheduler(
+            phases, session_factory=self._session_factory)
+
+        with self.assertRaises(ValueError):
+            self._run(import_scheduler)
+
+
+if __name__ == '__main__':
+    unittest.main()
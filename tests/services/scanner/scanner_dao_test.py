@@ -105,6 +105,74 @@ class ScannerDaoTest(scanner_base_db.ScannerBaseDbTestCase):
                                          saved_key_value)
                     )
 
+    @mock.patch.object(scanner_dao, 'VIOLATION_CHUNK_SIZE', 2)
+    def test_save_violations_in_chunks(self):
+        """Test violations from a generator are saved in chunks."""
+        scanner_index_id = self.populate_db(inv_index_id=self.inv_index_id1)
+        violations = [dict(violation, rule_index=i)
+                      for i, violation in enumerate(
+                          scanner_base_db.FAKE_VIOLATIONS * 3)]
+
+        count = self.violation_access.create(
+            (violation for violation in violations), scanner_index_id)
+        self.session.commit()
+
+        self.assertEqual(len(violations), count)
+        saved_violations = self.violation_access.list(
+            scanner_index_id=scanner_index_id)[2:]
+        self.assertEqual([violation['rule_index'] for violation in violations],
+                         [saved.rule_index for saved in saved_violations])
+        for violation, saved in zip(violations, saved_violations):
+            self.assertEqual(
+                scanner_dao._create_violation_hash(
+                    violation['full_name'], violation['resource_data'],
+                    violation['violation_data'], violation['rule_name']),
+                saved.violation_hash)
+
+    @mock.patch.object(scanner_dao, 'VIOLATION_CHUNK_SIZE', 2)
+    def test_stream_and_count_by_resource(self):
+        """Test violations are counted and streamed by resource."""
+        violation_types = ['FIREWALL_BLACKLIST_VIOLATION', 'BUCKET_VIOLATION',
+                           'cv_enforce_location', 'UNKNOWN_VIOLATION',
+                           'FIREWALL_MATCHES_VIOLATION']
+        violations = [dict(scanner_base_db.FAKE_VIOLATIONS[0],
+                           violation_type=violation_type, rule_index=i)
+                      for i, violation_type in enumerate(violation_types)]
+        scanner_index_id = self.populate_db(violations=violations,
+                                            inv_index_id=self.inv_index_id1)
+
+        self.assertEqual({'firewall_rule_violations': 2,
+                          'buckets_acl_violations': 1,
+                          'config_validator_violations': 1},
+                         self.violation_access.count_by_resource(
+                             scanner_index_id))
+
+        streamed = list(self.violation_access.stream(
+            scanner_index_id, 'firewall_rule_violations'))
+        self.assertEqual([0, 4], [v['rule_index'] for v in streamed])
+        self.assertEqual(violations[0]['violation_data'],
+                         streamed[0]['violation_data'])
+        self.assertEqual(['cv_enforce_location'], [
+            v['violation_type'] for v in self.violation_access.stream(
+                scanner_index_id, 'config_validator_violations')])
+
+        streamed = list(self.violation_access.stream(scanner_index_id))
+        self.assertEqual(sorted(violation_types),
+                         [v['violation_type'] for v in streamed])
+        expected = scanner_dao.map_by_resource([
+            scanner_dao.convert_sqlalchemy_object_to_dict(violation)
+            for violation in self.violation_access.list(
+                scanner_index_id=scanner_index_id)])
+        self.assertEqual(
+            sorted(expected['firewall_rule_violations'],
+                   key=lambda v: v['id']),
+            list(self.violation_access.stream(
+                scanner_index_id, 'firewall_rule_violations')))
+        self.assertEqual({}, self.violation_access.count_by_resource(
+            scanner_index_id + 1))
+        self.assertEqual(5, self.violation_access.count(scanner_index_id))
+        self.assertEqual(0, self.violation_access.count(scanner_index_id + 1))
+
     @mock.patch.object(scanner_dao, '_create_violation_hash')
     def test_convert_sqlalchemy_object_to_dict(self, mock_violation_hash):
         mock_violation_hash.side_effect = [